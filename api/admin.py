@@ -1,6 +1,9 @@
 from django.contrib import admin
+from django.utils import timezone
 from django.utils.html import format_html
-from .models import Skill, Project, ContactMessage, PageView, WorkExperience, ResumeFile
+from .models import (
+    Skill, Project, ContactMessage, Notification, PageView, PageViewRollup, WorkExperience, ResumeFile,
+)
 
 
 @admin.register(Skill)
@@ -44,14 +47,44 @@ class ContactMessageAdmin(admin.ModelAdmin):
         return False
 
 
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ['__str__', 'channel', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at']
+    list_filter = ['status', 'channel']
+    readonly_fields = ['message', 'channel', 'payload', 'attempts', 'last_error', 'created_at', 'sent_at']
+    actions = ['retry']
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description='Повторить отправку')
+    def retry(self, request, queryset):
+        updated = queryset.exclude(status='sent').update(status='pending', attempts=0, next_attempt_at=timezone.now())
+        self.message_user(request, f'В очередь: {updated}')
+
+
 @admin.register(PageView)
 class PageViewAdmin(admin.ModelAdmin):
     list_display = ['date', 'count', 'unique_count']
-    readonly_fields = ['date', 'count', 'unique_ips']
+    readonly_fields = ['date', 'count', 'unique_count']
+
+    def unique_count(self, obj):
+        return obj.unique_count
+    unique_count.short_description = 'Уникальных (≈)'
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(PageViewRollup)
+class PageViewRollupAdmin(admin.ModelAdmin):
+    list_display = ['period', 'start', 'count', 'unique_count']
+    list_filter = ['period']
+    readonly_fields = ['period', 'start', 'count', 'unique_count']
 
     def unique_count(self, obj):
-        return len(obj.unique_ips)
-    unique_count.short_description = 'Уникальных'
+        return obj.unique_count
+    unique_count.short_description = 'Уникальных (≈)'
 
     def has_add_permission(self, request):
         return False
@@ -61,9 +94,10 @@ from .models import TelegramUser
 
 @admin.register(TelegramUser)
 class TelegramUserAdmin(admin.ModelAdmin):
-    list_display = ['full_name', 'username_link', 'telegram_id', 'created_at']
+    list_display = ['full_name', 'username_link', 'telegram_id', 'last_login_at', 'created_at']
     search_fields = ['first_name', 'last_name', 'username']
-    readonly_fields = ['telegram_id', 'first_name', 'last_name', 'username', 'photo_url', 'created_at']
+    readonly_fields = ['telegram_id', 'first_name', 'last_name', 'username', 'photo_url',
+                       'auth_date', 'last_login_at', 'created_at']
 
     def username_link(self, obj):
         if obj.username:
@@ -0,0 +1,342 @@
+"""
+Сборка index.html для продакшена (команда build_assets).
+
+Из шаблона вынимаются <style> и встроенные <script>:
+  CSS  — минифицируется в static/build/index.css, а правила для первого экрана
+         (всё до конца секции FOLD_ID, с классами, которые ставит JS)
+         встраиваются в <style>; полный файл грузится следом без блокировки
+         отрисовки;
+  JS   — минифицируется в static/build/index.js (index-2.js, … если скриптов
+         несколько) и подключается на том же месте.
+Сам HTML сжимается построчно. Файлы в static/build/ получают хеш в имени
+при collectstatic (CompressedManifestStaticFilesStorage), шаблон ссылается
+на них через {% static %}.
+
+Минификаторы консервативные: строки, шаблонные литералы, регулярки и
+переводы строк в JS сохраняются, поэтому ASI и содержимое строк не меняются.
+"""
+import re
+
+FOLD_ID = 'hero'
+
+# строки и комментарии одним проходом: /* внутри строки — не комментарий,
+# кавычка внутри комментария — не строка
+_STRING_OR_COMMENT_RE = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|/\*.*?\*/', re.S)
+_WS_RE = re.compile(r'\s+')
+
+
+# ── CSS ──
+
+def _protect_strings(css):
+    """Строки — в заглушки, комментарии — прочь."""
+    strings = []
+
+    def keep(match):
+        if match.group(0).startswith('/*'):
+            return ''
+        strings.append(match.group(0))
+        return f'\x00{len(strings) - 1}\x00'
+    return _STRING_OR_COMMENT_RE.sub(keep, css), strings
+
+
+def _restore_strings(css, strings):
+    return re.sub(r'\x00(\d+)\x00', lambda m: strings[int(m.group(1))], css)
+
+
+def parse_css(css):
+    """
+    Дерево верхнего уровня: ('rule', селектор, тело) | ('block', @media…, [дети])
+    | ('raw', @keyframes…, тело). Строки уже заменены заглушками.
+    """
+    items, i = [], 0
+    while True:
+        start = css.find('{', i)
+        if start < 0:
+            return items
+        prelude = css[i:start].strip()
+        depth, end = 1, start + 1
+        while depth:
+            if css[end] == '{':
+                depth += 1
+            elif css[end] == '}':
+                depth -= 1
+            end += 1
+        body = css[start + 1:end - 1]
+        if prelude.startswith(('@media', '@supports', '@layer', '@container')):
+            items.append(('block', prelude, parse_css(body)))
+        elif prelude.startswith('@'):
+            items.append(('raw', prelude, body))
+        else:
+            items.append(('rule', prelude, body))
+        i = end
+
+
+def _squeeze(text):
+    return _WS_RE.sub(' ', text).strip()
+
+
+def _selector(selector):
+    selector = _squeeze(selector)
+    return re.sub(r'\s*([,>~+])\s*', r'\1', selector)
+
+
+def _declarations(body):
+    parts = []
+    for declaration in body.split(';'):
+        if ':' not in declaration:
+            continue
+        prop, value = declaration.split(':', 1)
+        value = re.sub(r'\s*,\s*', ',', _squeeze(value))
+        value = re.sub(r'\s*!important', '!important', value)
+        parts.append(f'{prop.strip()}:{value}')
+    return ';'.join(parts)
+
+
+def _raw(prelude, body):
+    # @keyframes: внутри обычные правила
+    inner = ''.join(f'{_selector(sel)}{{{_declarations(decl)}}}' for _, sel, decl in parse_css(body))
+    return f'{_squeeze(prelude)}{{{inner}}}'
+
+
+def render_css(items):
+    out = []
+    for kind, prelude, body in items:
+        if kind == 'rule':
+            declarations = _declarations(body)
+            if declarations:
+                out.append(f'{_selector(prelude)}{{{declarations}}}')
+        elif kind == 'block':
+            inner = render_css(body)
+            if inner:
+                out.append(f'{_squeeze(prelude)}{{{inner}}}')
+        else:
+            out.append(_raw(prelude, body))
+    return ''.join(out)
+
+
+def _used_tokens(html):
+    tokens = set()
+    for classes in re.findall(r'\bclass="([^"]*)"', html):
+        tokens.update('.' + c for c in classes.split())
+    tokens.update('#' + i for i in re.findall(r'\bid="([^"]*)"', html))
+    return tokens
+
+
+_NAME = r"""(['"])([\w-]+)\{}"""
+_CLASS_ADD_RE = re.compile(r'classList\.add\(([^()]*)\)')
+_CLASS_TOGGLE_RE = re.compile(r'classList\.toggle\(\s*' + _NAME.format(1))
+_CLASS_REPLACE_RE = re.compile(r'classList\.replace\(\s*' + _NAME.format(1) + r'\s*,\s*' + _NAME.format(3))
+
+
+def script_classes(js):
+    """
+    Классы, которые скрипт ставит через classList.add/toggle/replace:
+    состояния вроде .reveal.in должны попасть в критический CSS вместе с
+    базовым правилом, иначе видимый сразу блок ждёт полного CSS скрытым.
+    """
+    classes = set()
+    for args in _CLASS_ADD_RE.findall(js):
+        classes.update(name for _, name in re.findall(_NAME.format(1), args))
+    classes.update(name for _, name in _CLASS_TOGGLE_RE.findall(js))
+    classes.update(match[3] for match in _CLASS_REPLACE_RE.findall(js))
+    return classes
+
+
+def _selector_used(selector, tokens):
+    # теги и атрибуты не проверяем, классы и id — все должны быть в разметке
+    needed = re.findall(r'[.#][\w-]+', re.sub(r'::?[\w-]+(\([^)]*\))?', '', selector))
+    return all(token in tokens for token in needed)
+
+
+def _critical(items, tokens):
+    picked = []
+    for kind, prelude, body in items:
+        if kind == 'rule':
+            if any(_selector_used(s, tokens) for s in prelude.split(',')):
+                picked.append((kind, prelude, body))
+        elif kind == 'block':
+            inner = _critical(body, tokens)
+            if inner:
+                picked.append((kind, prelude, inner))
+    return picked
+
+
+def _keyframes(items):
+    found = []
+    for kind, prelude, body in items:
+        if kind == 'raw' and prelude.startswith('@keyframes'):
+            found.append((prelude.split()[1], (kind, prelude, body)))
+        elif kind == 'block':
+            found.extend(_keyframes(body))
+    return found
+
+
+def build_css(css, above_fold_html, state_classes=()):
+    """
+    (критический CSS, полный CSS), оба минифицированы. state_classes —
+    классы, которые добавит JS (script_classes): правила с ними тоже нужны.
+    """
+    protected, strings = _protect_strings(css)
+    items = parse_css(protected)
+    tokens = _used_tokens(above_fold_html) | {'.' + name for name in state_classes}
+    critical = _critical(items, tokens)
+    text = render_css(critical)
+    animations = [item for name, item in _keyframes(items) if re.search(rf'\b{re.escape(name)}\b', text)]
+    return (
+        _restore_strings(text + render_css(animations), strings),
+        _restore_strings(render_css(items), strings),
+    )
+
+
+# ── JS ──
+
+_REGEX_PREFIX = set('(,=:[!&|?{};+-*%<>~^')
+
+
+def minify_js(js):
+    """Убирает комментарии и отступы вне строк, шаблонных литералов и регулярок."""
+    out = []
+    stack = [0]  # int — глубина {} в коде; 'tpl' — внутри `…`
+    i, n = 0, len(js)
+    last = ''  # последний значимый символ кода
+    while i < n:
+        c = js[i]
+        if stack[-1] == 'tpl':
+            if c == '\\':
+                out.append(js[i:i + 2])
+                i += 2
+                continue
+            if c == '`':
+                stack.pop()
+                last = '`'
+            elif js.startswith('${', i):
+                stack.append(0)
+                out.append('${')
+                i += 2
+                continue
+            out.append(c)
+            i += 1
+            continue
+
+        if c in '\'"':
+            end = i + 1
+            while end < n and js[end] != c:
+                end += 2 if js[end] == '\\' else 1
+            out.append(js[i:end + 1])
+            i, last = end + 1, c
+        elif c == '`':
+            stack.append('tpl')
+            out.append(c)
+            i += 1
+        elif js.startswith('//', i):
+            while i < n and js[i] != '\n':
+                i += 1
+        elif js.startswith('/*', i):
+            end = js.find('*/', i + 2)
+            i = n if end < 0 else end + 2
+            if out and out[-1] not in (' ', '\n'):
+                out.append(' ')  # a/**/b — всё ещё два токена
+        elif c == '/' and (last in _REGEX_PREFIX or not last or re.search(r'\b(return|typeof)\s*$', ''.join(out[-3:]))):
+            end, in_class = i + 1, False
+            while end < n and (js[end] != '/' or in_class):
+                if js[end] == '\\':
+                    end += 1
+                elif js[end] == '[':
+                    in_class = True
+                elif js[end] == ']':
+                    in_class = False
+                end += 1
+            end += 1
+            while end < n and js[end].isalpha():
+                end += 1
+            out.append(js[i:end])
+            i, last = end, '/'
+        elif c == '\n':
+            # перевод строки оставляем (ASI), хвостовые и ведущие пробелы — нет
+            while out and out[-1] in (' ', '\t'):
+                out.pop()
+            if out and out[-1] != '\n':
+                out.append('\n')
+            i += 1
+            while i < n and js[i] in ' \t':
+                i += 1
+        else:
+            if c == '{':
+                stack[-1] += 1
+            elif c == '}':
+                if stack[-1] == 0 and len(stack) > 1:
+                    stack.pop()  # конец ${…}
+                else:
+                    stack[-1] -= 1
+            if not c.isspace():
+                last = c
+            elif out and out[-1] in (' ', '\n'):
+                i += 1
+                continue
+            out.append(' ' if c.isspace() else c)
+            i += 1
+    return ''.join(out).strip() + '\n'
+
+
+# ── HTML ──
+
+_PROTECTED_RE = re.compile(r'<(script|style|pre|textarea)\b.*?</\1>', re.S | re.I)
+
+
+def minify_html(html):
+    """Комментарии и отступы; <script>, <style>, <pre>, <textarea> не трогает."""
+    blocks = []
+
+    def keep(match):
+        blocks.append(match.group(0))
+        return f'\x00{len(blocks) - 1}\x00'
+    html = _PROTECTED_RE.sub(keep, html)
+    html = re.sub(r'<!--(?!\[if).*?-->', '', html, flags=re.S)
+    html = '\n'.join(line.strip() for line in html.splitlines() if line.strip())
+    return re.sub(r'\x00(\d+)\x00', lambda m: blocks[int(m.group(1))], html) + '\n'
+
+
+def _above_fold(html, fold_id):
+    body = html.find('<body')
+    match = re.search(rf'<(\w+)[^>]*\bid="{re.escape(fold_id)}"', html)
+    if body < 0 or not match:
+        return html
+    tag, depth, i = match.group(1), 0, match.start()
+    for tag_match in re.finditer(rf'<(/?){tag}\b', html[i:]):
+        depth += -1 if tag_match.group(1) else 1
+        if depth == 0:
+            return html[body:i + tag_match.end()]
+    return html[body:]
+
+
+def build(html, fold_id=FOLD_ID, static_prefix='build/index'):
+    """
+    Возвращает (шаблон, {имя файла в static: содержимое}).
+    Шаблон ссылается на файлы через {% static %}.
+    """
+    files = {}
+    above_fold = _above_fold(html, fold_id)
+    state_classes = script_classes(''.join(re.findall(r'<script>(.*?)</script>', html, flags=re.S)))
+
+    def style(match):
+        critical, full = build_css(match.group(1), above_fold, state_classes)
+        name = f'{static_prefix}.css'
+        files[name] = full
+        href = f"{{% static '{name}' %}}"
+        return (
+            f'<style>{{% verbatim %}}{critical}{{% endverbatim %}}</style>'
+            f'<link rel="preload" href="{href}" as="style" onload="this.onload=null;this.rel=\'stylesheet\'">'
+            f'<noscript><link rel="stylesheet" href="{href}"></noscript>'
+        )
+    html = re.sub(r'<style>(.*?)</style>', style, html, count=1, flags=re.S)
+
+    def script(match):
+        number = sum(1 for name in files if name.endswith('.js')) + 1
+        name = f'{static_prefix}.js' if number == 1 else f'{static_prefix}-{number}.js'
+        files[name] = minify_js(match.group(1))
+        return f"<script src=\"{{% static '{name}' %}}\"></script>"
+    html = re.sub(r'<script>(.*?)</script>', script, html, flags=re.S)
+
+    if '{% load static %}' not in html:
+        html = '{% load static %}\n' + html
+    return minify_html(html), files
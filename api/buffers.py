@@ -0,0 +1,82 @@
+"""
+Буферы записи в БД: данные копятся в памяти воркера и пишутся пачкой.
+
+Сброс — когда набралось max_size, по таймеру раз в interval секунд и при
+остановке процесса (atexit регистрирует модуль, создающий буфер). Таймер —
+фоновый поток, он стартует при первой записи в процессе, поэтому переживает
+fork воркеров gunicorn. Что не удалось записать, возвращается в буфер до
+следующего сброса.
+"""
+import os
+import threading
+
+from django.db import connections
+
+
+class FlushBuffer:
+    """
+    Подкласс хранит данные в self._pending (под self._lock) и задаёт:
+      size(pending)     — сколько накоплено, сравнивается с max_size;
+      write(pending)    — запись в БД, возвращает то, что записать не удалось;
+      requeue(pending)  — вернуть незаписанное в self._pending (лок уже взят).
+    """
+
+    def __init__(self, max_size, interval):
+        self.max_size = max_size
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._timer_pid = None
+        self._stopped = threading.Event()
+
+    def size(self, pending):
+        return len(pending)
+
+    def write(self, pending):
+        raise NotImplementedError
+
+    def requeue(self, pending):
+        for key, value in pending.items():
+            self._pending.setdefault(key, value)
+
+    def added(self):
+        """Вызывать после каждого добавления в self._pending."""
+        self._start_timer()
+        with self._lock:
+            due = self.size(self._pending) >= self.max_size
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        try:
+            rest = self.write(pending)
+        except Exception:
+            # БД недоступна — запишем со следующим сбросом
+            rest = pending
+        if rest:
+            with self._lock:
+                self.requeue(rest)
+
+    def stop(self):
+        self._stopped.set()
+
+    def _start_timer(self):
+        pid = os.getpid()
+        if self._timer_pid == pid:
+            return
+        with self._lock:
+            if self._timer_pid == pid:
+                return
+            self._timer_pid = pid
+        name = f'{type(self).__name__}-flush'
+        threading.Thread(target=self._run, name=name, daemon=True).start()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self.flush()
+            # соединение потока таймера не держим открытым между сбросами
+            connections.close_all()
@@ -0,0 +1,86 @@
+"""
+Попадания в кеш ответов (api/caching.py), общие для всех воркеров.
+
+Воркер считает HIT/MISS в памяти и раз в CACHE_STATS_FLUSH_INTERVAL секунд
+прибавляет их к строкам отдельного SQLite-файла (как у api/ratelimit.py),
+так что в ответ ничего не добавляется. Ключ — имя ответа без параметров:
+'projects:<md5 запроса>' и 'project:12' считаются как 'projects' и 'project'.
+
+Посмотреть: manage.py cache_stats.
+"""
+import atexit
+import os
+import sqlite3
+import threading
+
+from django.conf import settings
+
+from .buffers import FlushBuffer
+
+_local = threading.local()
+
+
+def _connection():
+    conn = getattr(_local, 'conn', None)
+    path = str(settings.CACHE_STATS_DB)
+    if conn is None or _local.path != path:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        conn = sqlite3.connect(path, timeout=5, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS cache_stats '
+            '(name TEXT PRIMARY KEY, hits INTEGER NOT NULL, misses INTEGER NOT NULL)'
+        )
+        _local.conn, _local.path = conn, path
+    return conn
+
+
+class CacheStatsBuffer(FlushBuffer):
+    """{имя: [попадания, промахи]} до записи в файл."""
+
+    def __init__(self, max_requests=None, interval=None):
+        super().__init__(
+            max_requests or getattr(settings, 'CACHE_STATS_FLUSH_SIZE', 1000),
+            interval or getattr(settings, 'CACHE_STATS_FLUSH_INTERVAL', 30),
+        )
+
+    def add(self, name, hit):
+        with self._lock:
+            entry = self._pending.setdefault(name.split(':', 1)[0], [0, 0])
+            entry[0 if hit else 1] += 1
+        self.added()
+
+    def size(self, pending):
+        return sum(hits + misses for hits, misses in pending.values())
+
+    def write(self, pending):
+        conn = _connection()
+        with conn:
+            conn.executemany(
+                'INSERT INTO cache_stats (name, hits, misses) VALUES (?, ?, ?) '
+                'ON CONFLICT (name) DO UPDATE SET hits = hits + excluded.hits, misses = misses + excluded.misses',
+                [(name, hits, misses) for name, (hits, misses) in pending.items()],
+            )
+
+    def requeue(self, pending):
+        for name, (hits, misses) in pending.items():
+            entry = self._pending.setdefault(name, [0, 0])
+            entry[0] += hits
+            entry[1] += misses
+
+
+counter = CacheStatsBuffer()
+atexit.register(counter.flush)
+
+
+def read():
+    """[(имя, попадания, промахи)] по всем воркерам, с несброшенным этого процесса."""
+    counter.flush()
+    return _connection().execute('SELECT name, hits, misses FROM cache_stats ORDER BY name').fetchall()
+
+
+def reset():
+    counter.flush()
+    with _connection() as conn:
+        conn.execute('DELETE FROM cache_stats')
@@ -0,0 +1,162 @@
+"""
+Кеш публичных ответов API.
+
+Версия контента каждой модели лежит в общем для всех воркеров кеше
+(`shared`) и меняется сигналами post_save/post_delete после коммита.
+Готовые JSON-байты лежат в локальном кеше воркера под ключом с версией,
+поэтому правка в админке видна уже на следующем запросе: он прочитает
+новую версию и промахнётся мимо старого ключа.
+
+QuerySet.update() сигналов не шлёт — после него нужен bump() вручную.
+
+conditional() добавляет ETag/Last-Modified и отвечает 304, не вызывая view.
+Доля попаданий по всем воркерам — api/cachestats.py (manage.py cache_stats).
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from rest_framework.renderers import JSONRenderer
+
+from . import cachestats, compression
+
+_renderer = JSONRenderer()
+
+
+def _label(model):
+    return model if isinstance(model, str) else model._meta.label_lower
+
+
+def version(*models):
+    """Составная версия контента для набора моделей."""
+    shared = caches['shared']
+    keys = [f'content_version:{_label(m)}' for m in models]
+    found = shared.get_many(keys)
+    for key in keys:
+        if key not in found:
+            # случайная стартовая версия не совпадёт с версией до очистки кеша
+            shared.add(key, time.time_ns(), None)
+            found[key] = shared.get(key)
+    return '.'.join(str(found[key]) for key in keys)
+
+
+def bump(model):
+    """Сменить версию после коммита текущей транзакции."""
+    key = f'content_version:{_label(model)}'
+    transaction.on_commit(lambda: caches['shared'].set(key, time.time_ns(), None))
+
+
+_memo = {}
+
+
+def memoized(name, models, build):
+    """Значение в памяти процесса, пересчитывается при смене версии моделей."""
+    current = version(*models)
+    entry = _memo.get(name)
+    if entry is None or entry[0] != current:
+        entry = (current, build())
+        _memo[name] = entry
+    return entry[1]
+
+
+def cached_response(request, name, models, build, content_type, per_host=False, max_age=None):
+    """
+    Отдаёт готовые байты из кеша или строит их через `build()` → (status, body).
+    Сжатые варианты (gzip/br) считаются при построении и кешируются вместе с телом.
+    per_host — в ответе есть абсолютные URL, ключ зависит от хоста.
+    max_age — в ответе есть данные без версии (счётчики): через столько секунд
+    он перестраивается под тем же ключом, а не копится под новыми.
+    """
+    key = f'{name}:{version(*models)}'
+    if per_host:
+        key += f':{request.scheme}://{request.get_host()}'
+    local = caches['default']
+    entry = local.get(key)
+    if entry is None or (max_age and time.time() - entry[3] >= max_age):
+        status_code, body = build()
+        entry = (status_code, body, compression.variants(body), time.time())
+        local.set(key, entry, getattr(settings, 'API_CACHE_TTL', 3600))
+        hit = 'MISS'
+    else:
+        hit = 'HIT'
+    cachestats.counter.add(name, hit == 'HIT')
+    status_code, body, compressed, _ = entry
+    coding = compression.choose(request, compressed)
+    response = HttpResponse(compressed[coding] if coding else body, status=status_code, content_type=content_type)
+    if coding:
+        response['Content-Encoding'] = coding
+    if compressed:
+        patch_vary_headers(response, ['Accept-Encoding'])
+    response['X-Cache'] = hit
+    return response
+
+
+def cached_json(request, name, models, build, per_host=False, max_age=None):
+    """JSON-ответ API. `build()` возвращает данные для сериализации или None (→ 404)."""
+    def render():
+        data = build()
+        if data is None:
+            return 404, _renderer.render({'error': 'Не найден'})
+        return 200, _renderer.render(data)
+    return cached_response(request, f'api:{name}', models, render, 'application/json', per_host, max_age)
+
+
+def cached_html(request, name, models, build, per_host=False):
+    """Страница целиком. `build()` возвращает отрендеренный HTML."""
+    return cached_response(
+        request, f'page:{name}', models, lambda: (200, build().encode()),
+        'text/html; charset=utf-8', per_host,
+    )
+
+
+def validators(*models):
+    """
+    (ETag, Last-Modified) из версий контента — тех же, что в ключах кеша
+    ответов. Любая правка, удаление строки или bump() метки меняют оба;
+    Last-Modified — время самой свежей версии.
+    """
+    current = version(*models)
+    labels = ','.join(_label(m) for m in models)
+    etag = '"%s"' % hashlib.md5(f'{labels}:{current}'.encode()).hexdigest()
+    last_modified = max(int(stamp) for stamp in current.split('.')) // 10 ** 9
+    return etag, last_modified
+
+
+def _weak(request, etag):
+    """Клиент держит сжатый вариант (W/-тег) или, без If-None-Match, получил бы его."""
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        return f'W/{etag}' in if_none_match
+    return compression.choose(request, ('br', 'gzip')) is not None
+
+
+def conditional(*models):
+    """Декоратор view: If-None-Match / If-Modified-Since → 304 без сериализации."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            etag, last_modified = validators(*models)
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is None:
+                response = view(request, *args, **kwargs)
+                if response.status_code == 200:
+                    # сжатое представление — другие байты, поэтому ETag слабый
+                    encoded = response.has_header('Content-Encoding')
+                    response.headers.setdefault('ETag', f'W/{etag}' if encoded else etag)
+                    response.headers.setdefault('Last-Modified', http_date(last_modified))
+            elif response.status_code == 304:
+                # те же валидаторы и Vary, что у 200, иначе кеш клиента их перезапишет
+                response['ETag'] = f'W/{etag}' if _weak(request, etag) else etag
+                response['Last-Modified'] = http_date(last_modified)
+                patch_vary_headers(response, ['Accept-Encoding'])
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,61 @@
+"""
+Сжатие готовых ответов: варианты считаются один раз на версию контента
+и лежат в кеше рядом с исходными байтами.
+
+Brotli используется, если установлен пакет `brotli`, иначе только gzip.
+"""
+import gzip
+import re
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+MIN_SIZE = 200  # меньше — сжатие не окупает заголовки
+
+# brotli: ответы API сжимаются на пути запроса при сбросе кеша — быстрое
+# качество; загрузки (api/storage.py) — один раз, можно максимальное
+DYNAMIC_QUALITY = 5
+STATIC_QUALITY = 11
+
+_ACCEPT_RE = re.compile(r'\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*')
+
+
+def variants(body, quality=DYNAMIC_QUALITY):
+    """
+    {'br': ..., 'gzip': ...} — только те, что реально меньше исходника.
+    quality — уровень brotli (0–11).
+    """
+    found = {}
+    if len(body) < MIN_SIZE:
+        return found
+    if brotli is not None:
+        found['br'] = brotli.compress(body, quality=quality)
+    # mtime=0 — одинаковые байты при одинаковом входе
+    found['gzip'] = gzip.compress(body, compresslevel=9, mtime=0)
+    return {coding: data for coding, data in found.items() if len(data) < len(body)}
+
+
+def accepted(request):
+    """Кодировки из Accept-Encoding с q > 0."""
+    codings = set()
+    for part in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        match = _ACCEPT_RE.fullmatch(part)
+        if not match or not match.group(1):
+            continue
+        try:
+            if float(match.group(2) or 1) > 0:
+                codings.add(match.group(1).lower())
+        except ValueError:
+            continue
+    return codings
+
+
+def choose(request, available):
+    """Лучшая из доступных кодировок, которую принимает клиент, или None."""
+    codings = accepted(request)
+    for coding in ('br', 'gzip'):
+        if coding in available and (coding in codings or '*' in codings):
+            return coding
+    return None
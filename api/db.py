@@ -0,0 +1,35 @@
+"""
+Профиль SQLite для продакшена.
+
+На каждое новое соединение (сигнал connection_created) выполняются PRAGMA из
+settings.SQLITE_PRAGMAS: WAL — читатели не ждут писателя, synchronous=NORMAL —
+без fsync на каждый коммит (в WAL это безопасно), mmap, busy_timeout и кеш
+страниц. Соединения живут CONN_MAX_AGE секунд, так что настройка делается
+один раз на воркер, а не на запрос.
+
+Соединения только для чтения (mode=ro, алиас replica) журнал не переключают:
+journal_mode записывается в файл и на них недоступен.
+"""
+from django.conf import settings
+
+
+def apply_pragmas(conn, pragmas=None):
+    """Выполняет PRAGMA на соединении sqlite3 (или курсоре) по порядку."""
+    if pragmas is None:
+        pragmas = getattr(settings, 'SQLITE_PRAGMAS', {})
+    for name, value in pragmas.items():
+        conn.execute(f'PRAGMA {name}={value}')
+
+
+def configure_connection(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', {})
+    if is_read_only(connection):
+        pragmas = {name: value for name, value in pragmas.items() if name != 'journal_mode'}
+    with connection.cursor() as cursor:
+        apply_pragmas(cursor, pragmas)
+
+
+def is_read_only(connection):
+    return 'mode=ro' in str(connection.settings_dict['NAME'])
@@ -0,0 +1,156 @@
+"""
+Отсев повторов в контактной форме до записи в БД.
+
+Текст нормализуется (регистр, пунктуация, цифры, пробелы), дальше две проверки
+по окну недавних сообщений в памяти воркера:
+  точная  — blake2b отправителя (email или имя) и нормализованного текста:
+            одинаковое «Здравствуйте, вы свободны?» от двух людей — не повтор;
+  похожая — MinHash по символьным шинглам + LSH-корзины, так что на сообщение
+            проверяется лишь несколько кандидатов, а не всё окно. Только для
+            текстов от MIN_SHINGLES шинглов — короткие типовые фразы похожи
+            у всех.
+
+Длина текста для отпечатка обрезана, число перестановок и корзин фиксировано —
+стоимость проверки не растёт с заполнением окна. Повторы в окно не добавляются,
+только продлевают жизнь оригинала.
+"""
+import hashlib
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict, namedtuple
+
+from django.conf import settings
+
+
+MAX_CHARS = 1000
+SHINGLE = 5
+NUM_PERM = 64
+BANDS = 16
+MAX_CANDIDATES = 32
+MIN_SHINGLES = 40  # ~45 символов после нормализации
+
+_PRIME = (1 << 61) - 1
+_MASK = (1 << 64) - 1
+# фиксированные коэффициенты перестановок, чтобы подписи совпадали между процессами
+_PERMUTATIONS = [
+    (
+        int.from_bytes(hashlib.blake2b(b'a%d' % i, digest_size=8).digest(), 'big') % (_PRIME - 1) + 1,
+        int.from_bytes(hashlib.blake2b(b'b%d' % i, digest_size=8).digest(), 'big') % _PRIME,
+    )
+    for i in range(NUM_PERM)
+]
+
+Fingerprint = namedtuple('Fingerprint', 'digest signature')
+
+
+def normalize(text):
+    text = unicodedata.normalize('NFKC', text or '').casefold()
+    text = re.sub(r'\d+', '0', text)
+    text = re.sub(r'[\W_]+', ' ', text)
+    return text.strip()[:MAX_CHARS]
+
+
+def _shingles(text):
+    if len(text) <= SHINGLE:
+        return {text}
+    return {text[i:i + SHINGLE] for i in range(len(text) - SHINGLE + 1)}
+
+
+def fingerprint(text, sender=''):
+    """Отпечаток сообщения; signature=None, если текст слишком короткий для сравнения."""
+    text = normalize(text)
+    digest = hashlib.blake2b(f'{normalize(sender)}\0{text}'.encode(), digest_size=16).digest()
+    shingles = _shingles(text)
+    if len(shingles) < MIN_SHINGLES:
+        return Fingerprint(digest, None)
+    hashes = [
+        int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), 'big')
+        for s in shingles
+    ]
+    signature = tuple(
+        min((a * h + b) % _PRIME for h in hashes) & _MASK
+        for a, b in _PERMUTATIONS
+    )
+    return Fingerprint(digest, signature)
+
+
+def similarity(left, right):
+    """Оценка коэффициента Жаккара по двум MinHash-подписям."""
+    return sum(x == y for x, y in zip(left, right)) / len(left)
+
+
+class RecentMessages:
+    """Ограниченное по размеру и времени окно отпечатков недавних сообщений."""
+
+    def __init__(self, size=None, ttl=None, threshold=None):
+        self.size = size or getattr(settings, 'CONTACT_DEDUP_WINDOW', 500)
+        self.ttl = ttl or getattr(settings, 'CONTACT_DEDUP_TTL', 3600)
+        self.threshold = threshold or getattr(settings, 'CONTACT_DEDUP_THRESHOLD', 0.8)
+        self.rows = NUM_PERM // BANDS
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # digest -> (signature, истекает)
+        self._buckets = {}             # (полоса, значения) -> {digest}
+
+    def _bands(self, signature):
+        if signature is None:
+            return
+        for band in range(BANDS):
+            yield band, signature[band * self.rows:(band + 1) * self.rows]
+
+    def _evict(self, digest):
+        signature, _ = self._entries.pop(digest)
+        for key in self._bands(signature):
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(digest)
+                if not bucket:
+                    del self._buckets[key]
+
+    def _expire(self, now):
+        while self._entries:
+            digest, (_, expires) = next(iter(self._entries.items()))
+            if expires > now and len(self._entries) <= self.size:
+                break
+            self._evict(digest)
+
+    def _touch(self, digest, now):
+        signature, _ = self._entries[digest]
+        self._entries[digest] = (signature, now + self.ttl)
+        self._entries.move_to_end(digest)
+
+    def seen(self, fp):
+        """True, если в окне есть такое же или похожее сообщение."""
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            if fp.digest in self._entries:
+                self._touch(fp.digest, now)
+                return True
+            checked = set()
+            for key in self._bands(fp.signature):
+                for digest in self._buckets.get(key, ()):
+                    if digest in checked:
+                        continue
+                    checked.add(digest)
+                    if similarity(fp.signature, self._entries[digest][0]) >= self.threshold:
+                        self._touch(digest, now)
+                        return True
+                    if len(checked) >= MAX_CANDIDATES:
+                        return False
+            return False
+
+    def add(self, fp):
+        now = time.monotonic()
+        with self._lock:
+            if fp.digest in self._entries:
+                self._touch(fp.digest, now)
+                return
+            self._entries[fp.digest] = (fp.signature, now + self.ttl)
+            for key in self._bands(fp.signature):
+                self._buckets.setdefault(key, set()).add(fp.digest)
+            self._expire(now)
+
+
+recent = RecentMessages()
@@ -0,0 +1,71 @@
+"""
+Быстрый путь для read-only эндпоинтов: values_list() → готовые dict → JSON.
+
+Без интроспекции полей DRF на каждый объект. Результат побайтно совпадает с
+SkillSerializer / ProjectSerializer / WorkExperienceSerializer + JSONRenderer —
+сериализаторы остаются эталоном, сверка в api/tests.py.
+При изменении полей сериализатора поменяй и функцию здесь.
+"""
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from . import images
+from .models import Project, WorkExperience
+
+_renderer = JSONRenderer()
+
+SKILL_FIELDS = ('id', 'name', 'icon', 'percent', 'category', 'order')
+PROJECT_FIELDS = ('id', 'slug', 'title', 'description', 'stack', 'status',
+                  'github_url', 'demo_url', 'is_featured', 'order', 'created_at')
+EXPERIENCE_FIELDS = ('id', 'company', 'role', 'period', 'description', 'logo', 'order')
+
+_STATUS_DISPLAY = dict(Project.STATUS_CHOICES)
+
+
+def _datetime(value):
+    # как serializers.DateTimeField: в текущую зону, ISO 8601, UTC → Z
+    if not value:
+        return None
+    value = value.astimezone(timezone.get_current_timezone()).isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+def skill_rows(queryset):
+    return [dict(zip(SKILL_FIELDS, row)) for row in queryset.values_list(*SKILL_FIELDS)]
+
+
+def project_rows(queryset):
+    return [
+        {
+            'id': pk, 'slug': slug, 'title': title, 'description': description, 'stack': stack,
+            'status': status, 'status_display': _STATUS_DISPLAY.get(status, status),
+            'github_url': github_url, 'demo_url': demo_url, 'is_featured': is_featured,
+            'order': order, 'created_at': _datetime(created_at),
+        }
+        for (pk, slug, title, description, stack, status,
+             github_url, demo_url, is_featured, order, created_at) in queryset.values_list(*PROJECT_FIELDS)
+    ]
+
+
+def experience_rows(queryset, request=None):
+    storage = WorkExperience._meta.get_field('logo').storage
+    rows = []
+    for pk, company, role, period, description, logo, order in queryset.values_list(*EXPERIENCE_FIELDS):
+        logo_url = None
+        if logo:
+            logo_url = storage.url(logo)
+            if request:
+                logo_url = request.build_absolute_uri(logo_url)
+        rows.append({
+            'id': pk, 'company': company, 'role': role, 'period': period,
+            'description': description, 'logo_url': logo_url,
+            'logo_srcset': images.srcset(storage.path(logo), 'logo', request) if logo else None,
+            'order': order,
+        })
+    return rows
+
+
+def to_json(data):
+    return _renderer.render(data)
@@ -0,0 +1,114 @@
+"""
+Отдача файлов с диска: Range, условные запросы, sendfile.
+
+FileResponse отдаёт открытый файл через wsgi.file_wrapper — gunicorn
+шлёт его через os.sendfile с текущей позиции и ровно Content-Length байт,
+без копирования в Python. Для Range файл заранее ставится на начало
+диапазона и оборачивается в FileRange, который ограничивает чтение там, где
+file_wrapper недоступен (runserver).
+"""
+import hashlib
+import os
+import re
+
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class FileRange:
+    """Окно [start, start + length) открытого файла."""
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        size = self.remaining if size is None or size < 0 else min(size, self.remaining)
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def file_etag(path, chunk_size=1 << 20):
+    """Сильный ETag по содержимому файла."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def parse_range(header, size):
+    """
+    (start, end) включительно для одного диапазона bytes=…, None — отдать файл
+    целиком (нет заголовка, несколько диапазонов, мусор), False — 416.
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if first == '':
+        length = int(last)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def serve(request, path, etag, content_type, filename=None, cache_control='no-cache'):
+    """
+    Ответ с файлом `path`: 200, 206 на Range, 304/412 по If-None-Match /
+    If-Modified-Since / If-Match, 416 на недостижимый диапазон.
+    """
+    stat = os.stat(path)
+    last_modified = int(stat.st_mtime)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        return _validators(response, etag, last_modified, cache_control)
+
+    size = stat.st_size
+    byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if byte_range and if_range and if_range != etag and parse_http_date_safe(if_range) != last_modified:
+        byte_range = None  # файл изменился — отдаём целиком
+
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response.headers['Content-Range'] = f'bytes */{size}'
+    else:
+        f = open(path, 'rb')
+        if byte_range:
+            start, end = byte_range
+            response = FileResponse(FileRange(f, start, end - start + 1), status=206,
+                                    content_type=content_type, filename=filename or '')
+            response.headers['Content-Range'] = f'bytes {start}-{end}/{size}'
+            response.headers['Content-Length'] = str(end - start + 1)
+        else:
+            response = FileResponse(f, content_type=content_type, filename=filename or '')
+
+    response.headers['Accept-Ranges'] = 'bytes'
+    return _validators(response, etag, last_modified, cache_control)
+
+
+def _validators(response, etag, last_modified, cache_control):
+    response.headers['ETag'] = etag
+    response.headers['Last-Modified'] = http_date(last_modified)
+    response.headers['Cache-Control'] = cache_control
+    return response
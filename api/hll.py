@@ -0,0 +1,60 @@
+"""
+HyperLogLog — оценка числа уникальных значений в фиксированном объёме.
+
+2048 однобайтовых регистров (2 КБ на скетч), стандартная ошибка ~2.3%.
+Скетчи разных дней объединяются поэлементным максимумом, поэтому
+уникальных за любой период можно посчитать, не храня сами IP.
+"""
+import hashlib
+import math
+
+P = 11
+M = 1 << P
+ALPHA = 0.7213 / (1 + 1.079 / M)
+
+_RANK_BITS = 64 - P
+_POW = [2.0 ** -r for r in range(_RANK_BITS + 2)]
+
+
+class HyperLogLog:
+    __slots__ = ('registers',)
+
+    def __init__(self, data=b''):
+        if data and len(data) != M:
+            raise ValueError(f'Ожидается скетч на {M} байт, получено {len(data)}')
+        self.registers = bytearray(data) if data else bytearray(M)
+
+    @classmethod
+    def from_values(cls, values):
+        sketch = cls()
+        for value in values:
+            sketch.add(value)
+        return sketch
+
+    def add(self, value):
+        x = int.from_bytes(hashlib.blake2b(str(value).encode(), digest_size=8).digest(), 'big')
+        idx = x >> _RANK_BITS
+        rank = _RANK_BITS - (x & ((1 << _RANK_BITS) - 1)).bit_length() + 1
+        if rank > self.registers[idx]:
+            self.registers[idx] = rank
+
+    def update(self, other):
+        """Объединение: после вызова скетч покрывает оба множества."""
+        if not isinstance(other, HyperLogLog):
+            other = HyperLogLog(other)
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def count(self):
+        regs = self.registers
+        zeros = regs.count(0)
+        if zeros == M:
+            return 0
+        estimate = ALPHA * M * M / sum(_POW[r] for r in regs)
+        if estimate <= 2.5 * M and zeros:
+            # малые кардинальности — линейный подсчёт точнее
+            estimate = M * math.log(M / zeros)
+        return int(round(estimate))
+
+    def __bytes__(self):
+        return bytes(self.registers)
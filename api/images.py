@@ -0,0 +1,183 @@
+"""
+Уменьшенные копии картинок (логотипы, фото) в AVIF/WebP/JPEG.
+
+Копии лежат в MEDIA_ROOT/derivatives/<хеш исходника>/ — имя содержит хеш
+и ширину, поэтому MediaFilesMiddleware отдаёт их с immutable-кешем.
+manifest.json пишется последним: есть он — готов весь набор.
+
+Генерация идёт в фоновом потоке воркера: при загрузке логотипа (сигнал)
+или при первом запросе srcset. Пока копий нет, srcset() возвращает None и
+страница показывает оригинал; по готовности версия 'api.images' меняется,
+и кешированные ответы перестраиваются уже с srcset.
+"""
+import functools
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+from . import caching
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:  # pragma: no cover
+    Image = None
+
+VERSION = 'api.images'
+DIRECTORY = 'derivatives'
+EXTENSIONS = {'avif': 'avif', 'webp': 'webp', 'jpeg': 'jpg'}
+SAVE_OPTIONS = {
+    'avif': {'quality': 55},
+    'webp': {'quality': 80, 'method': 6},
+    'jpeg': {'quality': 82, 'optimize': True, 'progressive': True},
+}
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='images')
+_lock = threading.Lock()
+_inflight = set()
+_failed = set()  # не картинки (SVG, битые файлы) — не пробуем снова
+_keys = {}      # (путь, mtime, размер) -> хеш исходника
+_manifests = {}  # хеш -> manifest
+
+
+def _widths(profile):
+    return getattr(settings, 'IMAGE_DERIVATIVES', {}).get(profile, ())
+
+
+def _formats():
+    """Форматы из IMAGE_FORMATS, которые умеет эта сборка Pillow (AVIF — с 11.2)."""
+    return tuple(fmt for fmt in getattr(settings, 'IMAGE_FORMATS', ('avif', 'webp', 'jpeg'))
+                 if _supported(fmt))
+
+
+@functools.lru_cache(maxsize=None)
+def _supported(fmt):
+    return fmt == 'jpeg' or bool(features.check(fmt))
+
+
+def source_key(path):
+    """12 символов sha256 содержимого; считается один раз на версию файла."""
+    stat = os.stat(path)
+    cache_key = (path, stat.st_mtime_ns, stat.st_size)
+    key = _keys.get(cache_key)
+    if key is None:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        key = _keys[cache_key] = digest.hexdigest()[:12]
+    return key
+
+
+def _manifest_path(key):
+    return os.path.join(settings.MEDIA_ROOT, DIRECTORY, key, 'manifest.json')
+
+
+def manifest(path, profile):
+    """{формат: [[ширина, имя в storage], …]} или None, если копий ещё нет."""
+    if Image is None or not path or not os.path.isfile(path):
+        return None
+    key = source_key(path)
+    found = _manifests.get(key)
+    if found is None:
+        try:
+            with open(_manifest_path(key)) as f:
+                found = _manifests[key] = json.load(f)
+        except (OSError, ValueError):
+            schedule(path, profile, key)
+            return None
+    return found
+
+
+def srcset(path, profile, request=None):
+    """{'avif': 'url 64w, url 128w', 'webp': …, 'jpeg': …} или None."""
+    found = manifest(path, profile)
+    if not found:
+        return None
+    result = {}
+    for fmt, entries in found.items():
+        urls = []
+        for width, name in entries:
+            url = default_storage.url(name)
+            if request:
+                url = request.build_absolute_uri(url)
+            urls.append(f'{url} {width}w')
+        result[fmt] = ', '.join(urls)
+    return result
+
+
+def schedule(path, profile, key=None):
+    """Поставить генерацию в фоновый поток, если она ещё не идёт."""
+    key = key or source_key(path)
+    with _lock:
+        if key in _inflight or key in _failed:
+            return
+        _inflight.add(key)
+    _executor.submit(_run, path, profile, key)
+
+
+def _run(path, profile, key):
+    try:
+        generate(path, profile, key)
+    except Exception:
+        # остаётся оригинал
+        with _lock:
+            _failed.add(key)
+    finally:
+        with _lock:
+            _inflight.discard(key)
+
+
+def generate(path, profile, key=None):
+    """Пишет копии всех ширин и форматов и manifest.json. Возвращает manifest."""
+    key = key or source_key(path)
+    stem = os.path.splitext(os.path.basename(path))[0].split('.')[0]
+
+    with Image.open(path) as source:
+        image = ImageOps.exif_transpose(source)
+        alpha = image.mode in ('RGBA', 'LA') or 'transparency' in image.info
+        image = image.convert('RGBA' if alpha else 'RGB')
+    os.makedirs(os.path.join(settings.MEDIA_ROOT, DIRECTORY, key), exist_ok=True)
+    widths = sorted({w for w in _widths(profile) if w < image.width} | {min(image.width, max(_widths(profile)))})
+
+    found, error = {}, None
+    for fmt in _formats():
+        try:
+            found[fmt] = _save(image, fmt, widths, stem, key)
+        except (OSError, ValueError, KeyError) as exc:
+            # кодек не справился — остальные форматы всё равно пригодятся
+            error = exc
+    if not found:
+        raise error or ValueError('Нет доступных форматов')
+
+    with open(_manifest_path(key) + '.tmp', 'w') as f:
+        json.dump(found, f)
+    os.replace(_manifest_path(key) + '.tmp', _manifest_path(key))
+    _manifests[key] = found
+    caching.bump(VERSION)
+    return found
+
+
+def _save(image, fmt, widths, stem, key):
+    entries = []
+    for width in widths:
+        resized = image.copy()
+        resized.thumbnail((width, image.height), Image.LANCZOS)
+        if fmt == 'jpeg' and resized.mode != 'RGB':
+            resized = _flatten(resized)
+        name = f'{DIRECTORY}/{key}/{stem}-{width}w.{key}.{EXTENSIONS[fmt]}'
+        target = os.path.join(settings.MEDIA_ROOT, name)
+        resized.save(target + '.tmp', format=fmt.upper(), **SAVE_OPTIONS[fmt])
+        os.replace(target + '.tmp', target)
+        entries.append([width, name])
+    return entries
+
+
+def _flatten(image):
+    background = Image.new('RGB', image.size, (255, 255, 255))
+    background.paste(image, mask=image.getchannel('A'))
+    return background
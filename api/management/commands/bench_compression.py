@@ -0,0 +1,67 @@
+import gzip
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import Client, RequestFactory, override_settings
+
+from api import compression
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = ('Сравнить сжатие на каждый запрос и заранее сжатые варианты из кеша: '
+            'байты в сети и CPU. Ответы снимаются один раз (просмотры, которые '
+            'они насчитают, откатываются), дальше замеряется только сжатие.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=200, help='Повторов на замер')
+        parser.add_argument('--urls', default='/,/api/bootstrap/,/api/projects/,/api/skills/,/api/experience/')
+
+    @override_settings(ALLOWED_HOSTS=['testserver'], PAGEVIEW_BUFFERED=False)
+    def handle(self, *args, **options):
+        payloads = self._payloads(options['urls'].split(','))
+        n = options['repeat']
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='br, gzip')
+        self.stdout.write(
+            f"{'url':<20}{'identity B':>12}{'gzip B':>10}{'br B':>10}"
+            f"{'gzip/req µs':>13}{'variants µs':>13}{'cached µs':>11}"
+        )
+        for url, body in payloads:
+            found = compression.variants(body)
+            # прежнее поведение: gzip_page/GZipMiddleware жмут каждый ответ заново
+            per_request_us = self._per_call(lambda: gzip.compress(body, compresslevel=6), n)
+            # сейчас: варианты считаются один раз на версию, на запрос — только выбор
+            build_us = self._per_call(lambda: compression.variants(body), max(1, n // 20))
+            cached_us = self._per_call(lambda: found.get(compression.choose(request, found)), n)
+            self.stdout.write(
+                f"{url:<20}{len(body):>12}{len(found.get('gzip', body)):>10}"
+                f"{len(found['br']) if 'br' in found else '-':>10}"
+                f"{per_request_us:>13.0f}{build_us:>13.0f}{cached_us:>11.1f}"
+            )
+
+    @staticmethod
+    def _payloads(urls):
+        client = Client()
+        payloads = []
+        try:
+            with transaction.atomic():
+                for url in urls:
+                    response = client.get(url)
+                    if response.status_code != 200:
+                        raise CommandError(f'{url}: ответ {response.status_code}')
+                    payloads.append((url, response.content))
+                raise Rollback
+        except Rollback:
+            pass
+        return payloads
+
+    @staticmethod
+    def _per_call(fn, n):
+        start = time.perf_counter()
+        for _ in range(n):
+            fn()
+        return (time.perf_counter() - start) / n * 1e6
@@ -0,0 +1,58 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import override_settings
+
+from api import notifications
+from api.models import ContactMessage
+from api.stubs import FakeTelegramServer
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = ('Всплеск сообщений против локальной заглушки Telegram: по одному '
+            'и дайджестами. Тестовые строки создаются в транзакции и откатываются.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=50, help='Сообщений во всплеске')
+        parser.add_argument('--delay', type=float, default=0.02, help='Задержка ответа заглушки, сек')
+
+    def handle(self, *args, **options):
+        server = FakeTelegramServer(delay=options['delay']).start()
+        try:
+            self.stdout.write(f"{'режим':<10}{'сообщений':>11}{'запросов':>10}{'сек':>8}")
+            for mode, window in (('по одному', 0), ('дайджест', 1)):
+                server.messages.clear()
+                with override_settings(TELEGRAM_API_URL=server.url, TELEGRAM_BOT_TOKEN='bench',
+                                       TELEGRAM_CHAT_ID='1', EMAIL_HOST_USER='', NOTIFY_DIGEST_WINDOW=window):
+                    delivered, elapsed = self._burst(options['messages'], window)
+                self.stdout.write(f'{mode:<10}{delivered:>11}{len(server.messages):>10}{elapsed:>8.2f}')
+        finally:
+            server.stop()
+
+    def _burst(self, n, window):
+        delivered = 0
+        try:
+            with transaction.atomic():
+                for i in range(n):
+                    msg = ContactMessage.objects.create(
+                        name=f'Bench {i}', email='', subject=f'Тема {i}', message='Текст сообщения ' * 10,
+                    )
+                    notifications.enqueue(msg)
+                # окно дайджеста считается от created_at — ждём, пока оно истечёт
+                time.sleep(window)
+                start = time.perf_counter()
+                while True:
+                    sent, failed = notifications.deliver_batch()
+                    delivered += sent
+                    if not (sent or failed):
+                        break
+                elapsed = time.perf_counter() - start
+                raise Rollback
+        except Rollback:
+            pass
+        return delivered, elapsed
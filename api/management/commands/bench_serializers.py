@@ -0,0 +1,88 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import RequestFactory, override_settings
+from rest_framework.renderers import JSONRenderer
+
+from api import fastjson
+from api.models import Project, Skill, WorkExperience
+from api.serializers import ProjectSerializer, SkillSerializer, WorkExperienceSerializer
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = ('Сравнить DRF-сериализаторы и api.fastjson: стоимость на объект. '
+            'Тестовые строки создаются в транзакции и откатываются. '
+            'Побайтное совпадение проверяют тесты (manage.py test api).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='10,1000,100000',
+                            help='Размеры выборок через запятую')
+        parser.add_argument('--repeat', type=int, default=3, help='Повторов на замер (берётся лучший)')
+
+    @override_settings(ALLOWED_HOSTS=['bench.local'])
+    def handle(self, *args, **options):
+        sizes = [int(n) for n in options['sizes'].split(',')]
+        request = RequestFactory().get('/', HTTP_HOST='bench.local')
+        renderer = JSONRenderer()
+        cases = [
+            ('skills', Skill, self._skills,
+             lambda qs: SkillSerializer(qs, many=True).data,
+             fastjson.skill_rows),
+            ('projects', Project, self._projects,
+             lambda qs: ProjectSerializer(qs, many=True).data,
+             fastjson.project_rows),
+            ('experience', WorkExperience, self._experience,
+             lambda qs: WorkExperienceSerializer(qs, many=True, context={'request': request}).data,
+             lambda qs: fastjson.experience_rows(qs, request)),
+        ]
+
+        self.stdout.write(f"{'endpoint':<12}{'rows':>8}{'drf µs/obj':>14}{'fast µs/obj':>14}{'speedup':>10}")
+        for n in sizes:
+            try:
+                with transaction.atomic():
+                    for name, model, make, reference, fast in cases:
+                        model.objects.bulk_create(make(n), batch_size=2000)
+                        qs = model.objects.filter(name__startswith='bench-') if model is Skill else \
+                            model.objects.filter(pk__in=model.objects.order_by('-pk').values('pk')[:n])
+                        slow = self._best(lambda: renderer.render(reference(qs)), options['repeat'])
+                        quick = self._best(lambda: fastjson.to_json(fast(qs)), options['repeat'])
+                        self.stdout.write(
+                            f'{name:<12}{n:>8}{slow / n * 1e6:>14.2f}{quick / n * 1e6:>14.2f}{slow / quick:>9.1f}x'
+                        )
+                    raise Rollback
+            except Rollback:
+                pass
+
+    @staticmethod
+    def _best(fn, repeat):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    @staticmethod
+    def _skills(n):
+        return [Skill(name=f'bench-{i}', icon='🐍', percent=i % 101, category='backend', order=i)
+                for i in range(n)]
+
+    @staticmethod
+    def _projects(n):
+        return [Project(title=f'Проект {i}', slug=f'bench-{i}', description='Описание ' * 5, stack=['Python', 'Django'],
+                        status=('active', 'done', 'planned')[i % 3], github_url='https://github.com/x/y',
+                        is_featured=not i % 7, order=i)
+                for i in range(n)]
+
+    @staticmethod
+    def _experience(n):
+        return [WorkExperience(company=f'Компания {i}', role='Backend Developer', period='2024 — н.в.',
+                               description='Описание', logo=f'company_logos/logo{i}.png' if i % 2 else None,
+                               order=i)
+                for i in range(n)]
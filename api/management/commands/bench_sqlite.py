@@ -0,0 +1,123 @@
+import multiprocessing
+import os
+import sqlite3
+import tempfile
+import time
+from datetime import date
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from api import db
+
+
+BASELINE = {'journal_mode': 'DELETE', 'synchronous': 'FULL', 'busy_timeout': 5000}
+
+READS = (
+    'SELECT date, count FROM api_pageview ORDER BY date DESC LIMIT 30',
+    'SELECT * FROM api_project WHERE is_active ORDER BY "order", id',
+    'SELECT * FROM api_skill WHERE is_active ORDER BY category, "order"',
+)
+
+
+def _connect(path, pragmas):
+    conn = sqlite3.connect(path, timeout=5, isolation_level=None)
+    db.apply_pragmas(conn, pragmas)
+    return conn
+
+
+def _read(conn):
+    for sql in READS:
+        conn.execute(sql).fetchall()
+
+
+def _write(conn, day):
+    # как pageviews.record: дневная строка и три агрегата в одной транзакции
+    conn.execute('BEGIN IMMEDIATE')
+    conn.execute('UPDATE api_pageview SET count = count + 1 WHERE date = ?', (day,))
+    conn.execute('UPDATE api_pageviewrollup SET count = count + 1 WHERE start <= ?', (day,))
+    conn.execute('COMMIT')
+
+
+def _worker(args):
+    path, pragmas, persistent, kind, seconds = args
+    day = str(date.today())
+    latencies, errors, conn = [], 0, None
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        try:
+            if conn is None:
+                conn = _connect(path, pragmas)
+            if kind == 'read':
+                _read(conn)
+            else:
+                _write(conn, day)
+        except sqlite3.OperationalError:
+            errors += 1
+            if conn is not None and conn.in_transaction:
+                conn.execute('ROLLBACK')
+            continue
+        finally:
+            if not persistent and conn is not None:
+                conn.close()
+                conn = None
+        latencies.append(time.perf_counter() - start)
+    return kind, latencies, errors
+
+
+class Command(BaseCommand):
+    help = ('Чтение под нагрузкой записей просмотров: исходный SQLite (rollback journal, '
+            'соединение на запрос) против SQLITE_PRAGMAS с постоянными соединениями. '
+            'Работает на копии базы во временном каталоге.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4, help='Процессов-читателей')
+        parser.add_argument('--writers', type=int, default=2, help='Процессов-писателей')
+        parser.add_argument('--seconds', type=float, default=5.0, help='Длительность замера')
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'bench.sqlite3')
+            self._copy(path)
+
+            self.stdout.write(f"{'профиль':<10}{'чтений/с':>10}{'p50 мс':>9}{'p99 мс':>9}"
+                              f"{'записей/с':>11}{'ошибок':>8}")
+            profiles = (
+                ('исходный', BASELINE, False),
+                ('профиль', settings.SQLITE_PRAGMAS, True),
+            )
+            for name, pragmas, persistent in profiles:
+                # journal_mode хранится в файле — ставим заранее, до старта процессов
+                _connect(path, pragmas).close()
+                jobs = (
+                    [(path, pragmas, persistent, 'read', options['seconds'])] * options['readers'] +
+                    [(path, pragmas, persistent, 'write', options['seconds'])] * options['writers']
+                )
+                with multiprocessing.Pool(len(jobs)) as pool:
+                    results = pool.map(_worker, jobs)
+                reads = sorted(t for kind, latencies, _ in results if kind == 'read' for t in latencies)
+                writes = sum(len(latencies) for kind, latencies, _ in results if kind == 'write')
+                errors = sum(e for _, _, e in results)
+                p50 = reads[len(reads) // 2] * 1e3 if reads else 0
+                p99 = reads[int(len(reads) * 0.99)] * 1e3 if reads else 0
+                self.stdout.write(
+                    f"{name:<10}{len(reads) / options['seconds']:>10.0f}{p50:>9.2f}{p99:>9.2f}"
+                    f"{writes / options['seconds']:>11.0f}{errors:>8}"
+                )
+
+    @staticmethod
+    def _copy(path):
+        connection.ensure_connection()
+        target = sqlite3.connect(path)
+        connection.connection.backup(target)
+        day = str(date.today())
+        target.execute('INSERT OR IGNORE INTO api_pageview (date, count, visitors) VALUES (?, 0, ?)', (day, b''))
+        for period in ('week', 'month', 'all'):
+            target.execute(
+                'INSERT OR IGNORE INTO api_pageviewrollup (period, start, count, visitors) VALUES (?, ?, 0, ?)',
+                (period, '1970-01-01' if period == 'all' else day, b''),
+            )
+        target.commit()
+        target.close()
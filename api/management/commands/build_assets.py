@@ -0,0 +1,40 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api import assets
+
+
+class Command(BaseCommand):
+    help = ('Собрать templates/build/index.html: критический CSS встроен, '
+            'остальной CSS и JS — минифицированные файлы в static/build/. '
+            'Запускать перед collectstatic, который добавит к ним хеш.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--template', default='index.html', help='Шаблон в templates/')
+        parser.add_argument('--fold', default=assets.FOLD_ID,
+                            help='id элемента, которым заканчивается первый экран')
+
+    def handle(self, *args, **options):
+        templates = settings.BASE_DIR / 'templates'
+        source = templates / options['template']
+        html = source.read_text(encoding='utf-8')
+        name = os.path.splitext(options['template'])[0]
+
+        built, files = assets.build(html, fold_id=options['fold'], static_prefix=f'build/{name}')
+
+        self._write(templates / 'build' / options['template'], built)
+        self.stdout.write(f"{'файл':<32}{'байт':>10}")
+        self.stdout.write(f"{str(source.relative_to(settings.BASE_DIR)):<32}{len(html.encode()):>10}")
+        self.stdout.write(f"{'templates/build/' + options['template']:<32}{len(built.encode()):>10}")
+        for static_name, content in files.items():
+            self._write(settings.BASE_DIR / 'static' / static_name, content)
+            self.stdout.write(f"{'static/' + static_name:<32}{len(content.encode()):>10}")
+
+    @staticmethod
+    def _write(path, content):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + '.tmp')
+        tmp.write_text(content, encoding='utf-8')
+        os.replace(tmp, path)
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from api import cachestats
+
+
+class Command(BaseCommand):
+    help = 'Попадания в кеш ответов API по всем воркерам (HIT/MISS по именам ответов)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Обнулить счётчики')
+
+    def handle(self, *args, **options):
+        if options['reset']:
+            cachestats.reset()
+            self.stdout.write(self.style.SUCCESS('✅ Счётчики обнулены'))
+            return
+        rows = cachestats.read()
+        if not rows:
+            self.stdout.write('Пока нет данных')
+            return
+        self.stdout.write(f"{'ответ':<20}{'HIT':>10}{'MISS':>10}{'доля HIT':>10}")
+        total_hits = total_misses = 0
+        for name, hits, misses in rows:
+            self.stdout.write(f'{name:<20}{hits:>10}{misses:>10}{hits / (hits + misses):>10.1%}')
+            total_hits += hits
+            total_misses += misses
+        self.stdout.write(f"{'всего':<20}{total_hits:>10}{total_misses:>10}"
+                          f"{total_hits / (total_hits + total_misses):>10.1%}")
@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api import notifications
+
+
+class Command(BaseCommand):
+    help = 'Доставлять уведомления из outbox (Telegram, email) с повторами'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Один проход и выход')
+        parser.add_argument('--batch', type=int, default=20, help='Уведомлений за проход')
+        parser.add_argument('--interval', type=float, default=2.0, help='Пауза, если очередь пуста (сек)')
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = notifications.deliver_batch(options['batch'])
+            if sent or failed:
+                self.stdout.write(f'Отправлено: {sent}, ошибок: {failed}')
+            if options['once']:
+                return
+            if not (sent or failed):
+                time.sleep(options['interval'])
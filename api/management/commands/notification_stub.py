@@ -0,0 +1,37 @@
+import threading
+
+from django.core.management.base import BaseCommand
+
+from api.stubs import FakeSMTPServer, FakeTelegramServer
+
+
+class Command(BaseCommand):
+    help = ('Локальные заглушки Telegram Bot API и SMTP. Запусти и укажи '
+            'TELEGRAM_API_URL=http://127.0.0.1:<http-port>, EMAIL_HOST=127.0.0.1, '
+            'EMAIL_PORT=<smtp-port>, EMAIL_USE_TLS=False')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--http-port', type=int, default=8081)
+        parser.add_argument('--smtp-port', type=int, default=8025)
+        parser.add_argument('--fail-rate', type=float, default=0.0, help='Доля ответов с ошибкой, 0..1')
+        parser.add_argument('--delay', type=float, default=0.0, help='Задержка ответа, сек')
+
+    def handle(self, *args, **options):
+        telegram = FakeTelegramServer(port=options['http_port'], fail_rate=options['fail_rate'],
+                                      delay=options['delay']).start()
+        smtp = FakeSMTPServer(port=options['smtp_port'], fail_rate=options['fail_rate'],
+                              delay=options['delay']).start()
+        self.stdout.write(f'Telegram: {telegram.url}  SMTP: {smtp.host}:{smtp.port}  (Ctrl+C — выход)')
+        seen_tg = seen_mail = 0
+        try:
+            while not threading.Event().wait(1):
+                for data in telegram.messages[seen_tg:]:
+                    self.stdout.write(f"📨 Telegram → {data.get('chat_id')}:\n{data.get('text')}\n")
+                for envelope in smtp.messages[seen_mail:]:
+                    self.stdout.write(f"✉️  SMTP {envelope['from']} → {', '.join(envelope['to'])}\n")
+                seen_tg, seen_mail = len(telegram.messages), len(smtp.messages)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            telegram.stop()
+            smtp.stop()
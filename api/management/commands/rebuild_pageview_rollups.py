@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api.pageviews import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Пересчитать агрегаты просмотров (неделя/месяц/всё время) по дневным строкам'
+
+    def handle(self, *args, **kwargs):
+        rows = rebuild_rollups()
+        self.stdout.write(self.style.SUCCESS(f'✅ Агрегатов пересчитано: {rows}'))
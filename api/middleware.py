@@ -1,4 +1,13 @@
-from datetime import date
+import os
+from urllib.parse import urlparse
+
+from django.conf import settings
+from whitenoise.base import WhiteNoise
+from whitenoise.middleware import WhiteNoiseMiddleware
+from whitenoise.string_utils import ensure_leading_trailing_slash
+
+from . import pageviews
+from .storage import HASHED_NAME_RE
 
 
 class PageViewMiddleware:
@@ -20,13 +29,54 @@ class PageViewMiddleware:
 
     def _record(self, request):
         try:
-            from .models import PageView
             ip = request.META.get('HTTP_X_FORWARDED_FOR', '').split(',')[0].strip() \
                  or request.META.get('REMOTE_ADDR', '')
-            pv, _ = PageView.objects.get_or_create(date=date.today())
-            pv.count += 1
-            if ip and ip not in pv.unique_ips:
-                pv.unique_ips.append(ip)
-            pv.save(update_fields=['count', 'unique_ips'])
+            pageviews.track(ip)
         except Exception:
             pass
+
+
+class MediaFilesMiddleware(WhiteNoise):
+    """
+    MEDIA_ROOT так же, как WhiteNoise отдаёт STATIC_ROOT: индекс файлов в памяти
+    (без stat на запрос), .gz/.br-варианты, ETag и Range. Имена с хешем
+    содержимого (api.storage) кешируются навсегда, остальные — MEDIA_MAX_AGE.
+
+    Файл, загруженный после старта воркера, находится одним stat при первом
+    запросе и дальше берётся из индекса; удалённый — выпадает из него.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        super().__init__(application=None, max_age=getattr(settings, 'MEDIA_MAX_AGE', 3600),
+                         allow_all_origins=False)
+        self.prefix = ensure_leading_trailing_slash(urlparse(settings.MEDIA_URL).path)
+        self.root = os.path.abspath(settings.MEDIA_ROOT) + os.sep
+        if os.path.isdir(self.root):
+            self.add_files(self.root, prefix=self.prefix)
+
+    def __call__(self, request):
+        url = request.path_info
+        if not url.startswith(self.prefix):
+            return self.get_response(request)
+        media_file = self.files.get(url) or self._discover(url)
+        if media_file is None:
+            return self.get_response(request)
+        try:
+            return WhiteNoiseMiddleware.serve(media_file, request)
+        except FileNotFoundError:
+            self.files.pop(url, None)
+            return self.get_response(request)
+
+    def _discover(self, url):
+        if not self.url_is_canonical(url):
+            return None
+        path = os.path.join(self.root, url[len(self.prefix):])
+        if not self.path_is_child_of(path, self.root) or self.is_compressed_variant(path) \
+                or not os.path.isfile(path):
+            return None
+        self.add_file_to_dictionary(url, path)
+        return self.files.get(url)
+
+    def immutable_file_test(self, path, url):
+        return bool(HASHED_NAME_RE.search(url))
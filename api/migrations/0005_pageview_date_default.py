@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:37
+
+import datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_add_workexperience_logo'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='pageview',
+            name='date',
+            field=models.DateField(db_index=True, default=datetime.date.today),
+        ),
+    ]
@@ -0,0 +1,47 @@
+import hashlib
+
+from django.db import migrations, models
+
+# Копия api.hll на момент миграции (P = 11): миграция не должна зависеть
+# от текущего кода приложения.
+P = 11
+RANK_BITS = 64 - P
+
+
+def sketch(values):
+    registers = bytearray(1 << P)
+    for value in values:
+        x = int.from_bytes(hashlib.blake2b(str(value).encode(), digest_size=8).digest(), 'big')
+        idx = x >> RANK_BITS
+        rank = RANK_BITS - (x & ((1 << RANK_BITS) - 1)).bit_length() + 1
+        registers[idx] = max(registers[idx], rank)
+    return bytes(registers)
+
+
+def ips_to_sketch(apps, schema_editor):
+    PageView = apps.get_model('api', 'PageView')
+    for pv in PageView.objects.all().iterator():
+        ips = pv.unique_ips if isinstance(pv.unique_ips, list) else []
+        pv.visitors = sketch(ips)
+        pv.save(update_fields=['visitors'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_pageview_date_default'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pageview',
+            name='visitors',
+            field=models.BinaryField(default=bytes, editable=False),
+        ),
+        # IP не восстановить из скетча, поэтому откат оставляет пустые списки
+        migrations.RunPython(ips_to_sketch, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='pageview',
+            name='unique_ips',
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:38
+
+from datetime import date, timedelta
+
+from django.db import migrations, models
+
+# Копия логики api.pageviews/api.hll на момент миграции: миграция не должна
+# зависеть от текущего кода приложения.
+HLL_SIZE = 2048
+
+
+def period_start(period, day):
+    if period == 'week':
+        return day - timedelta(days=day.weekday())
+    if period == 'month':
+        return day.replace(day=1)
+    return date(1970, 1, 1)
+
+
+def build_rollups(apps, schema_editor):
+    PageView = apps.get_model('api', 'PageView')
+    PageViewRollup = apps.get_model('api', 'PageViewRollup')
+
+    totals = {}
+    for day, count, visitors in PageView.objects.values_list('date', 'count', 'visitors').iterator():
+        for period in ('week', 'month', 'all'):
+            entry = totals.setdefault((period, period_start(period, day)), [0, bytearray(HLL_SIZE)])
+            entry[0] += count
+            if visitors and len(visitors) == HLL_SIZE:
+                entry[1] = bytearray(map(max, entry[1], bytes(visitors)))
+
+    PageViewRollup.objects.bulk_create(
+        PageViewRollup(period=period, start=start, count=count, visitors=bytes(registers))
+        for (period, start), (count, registers) in totals.items()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_pageview_visitors_sketch'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PageViewRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('week', 'Неделя'), ('month', 'Месяц'), ('all', 'Всё время')], max_length=10)),
+                ('start', models.DateField(verbose_name='Начало периода')),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('visitors', models.BinaryField(default=bytes)),
+            ],
+            options={
+                'verbose_name': 'Просмотры за период',
+                'verbose_name_plural': 'Просмотры за периоды',
+                'ordering': ['period', '-start'],
+                'constraints': [models.UniqueConstraint(fields=('period', 'start'), name='uniq_rollup_period_start')],
+            },
+        ),
+        migrations.RunPython(build_rollups, migrations.RunPython.noop),
+    ]
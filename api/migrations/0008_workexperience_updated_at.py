@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_pageviewrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workexperience',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_technologies(apps, schema_editor):
+    Project = apps.get_model('api', 'Project')
+    ProjectTechnology = apps.get_model('api', 'ProjectTechnology')
+    rows = []
+    for pk, stack in Project.objects.values_list('pk', 'stack'):
+        names = {str(item).strip().lower()[:100] for item in (stack if isinstance(stack, list) else [])}
+        rows.extend(ProjectTechnology(project_id=pk, name=name) for name in names if name)
+    ProjectTechnology.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_workexperience_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectTechnology',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='В нижнем регистре', max_length=100)),
+            ],
+            options={
+                'verbose_name': 'Технология проекта',
+                'verbose_name_plural': 'Технологии проектов',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['is_active', 'order', '-created_at', '-id'], name='project_active_page_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['is_active', 'status', 'order', '-created_at', '-id'], name='project_status_page_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['is_active', 'is_featured', 'order', '-created_at', '-id'], name='project_featured_page_idx'),
+        ),
+        migrations.AddField(
+            model_name='projecttechnology',
+            name='project',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='technologies', to='api.project'),
+        ),
+        migrations.AddIndex(
+            model_name='projecttechnology',
+            index=models.Index(fields=['name', 'project'], name='technology_name_project_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='projecttechnology',
+            constraint=models.UniqueConstraint(fields=('project', 'name'), name='uniq_project_technology'),
+        ),
+        migrations.RunPython(fill_technologies, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:45
+
+from django.db import migrations, models
+from django.utils.text import slugify
+
+# Копия api.models на момент миграции: миграция не должна зависеть
+# от текущего кода приложения.
+TRANSLIT = str.maketrans({
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ё': 'e', 'ж': 'zh', 'з': 'z',
+    'и': 'i', 'й': 'i', 'к': 'k', 'л': 'l', 'м': 'm', 'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r',
+    'с': 's', 'т': 't', 'у': 'u', 'ф': 'f', 'х': 'h', 'ц': 'ts', 'ч': 'ch', 'ш': 'sh', 'щ': 'sch',
+    'ъ': '', 'ы': 'y', 'ь': '', 'э': 'e', 'ю': 'yu', 'я': 'ya', 'ң': 'ng', 'ө': 'o', 'ү': 'u',
+})
+RESERVED_SLUGS = {'search'}
+
+
+def fill_slugs(apps, schema_editor):
+    Project = apps.get_model('api', 'Project')
+    taken = set(RESERVED_SLUGS)
+    projects = list(Project.objects.order_by('pk'))
+    for project in projects:
+        # slug из одних цифр не открыть: /api/projects/<int:pk>/ стоит раньше
+        if project.slug and project.slug not in taken and not project.slug.isdigit():
+            taken.add(project.slug)
+        else:
+            project.slug = ''
+    for project in projects:
+        if project.slug:
+            continue
+        base = slugify(project.title.lower().translate(TRANSLIT))[:200] or 'project'
+        if base.isdigit():
+            base = f'project-{base}'
+        slug, n = base, 2
+        while slug in taken:
+            slug, n = f'{base}-{n}', n + 1
+        taken.add(slug)
+        project.slug = slug
+        project.save(update_fields=['slug'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_project_page_indexes_technology'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_slugs, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='project',
+            name='slug',
+            field=models.SlugField(blank=True, help_text='Пусто — сгенерируется из названия', max_length=220, unique=True),
+        ),
+    ]
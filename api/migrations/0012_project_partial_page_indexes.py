@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_notification_outbox'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='project',
+            name='project_active_page_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='project',
+            name='project_status_page_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='project',
+            name='project_featured_page_idx',
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['order', '-created_at', '-id'], name='project_active_page_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['status', 'order', '-created_at', '-id'], name='project_status_page_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_featured', True)), fields=['order', '-created_at', '-id'], name='project_featured_page_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_featured', False)), fields=['order', '-created_at', '-id'], name='project_regular_page_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_featured', True)), fields=['status', 'order', '-created_at', '-id'], name='project_stat_feat_page_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_featured', False)), fields=['status', 'order', '-created_at', '-id'], name='project_stat_reg_page_idx'),
+        ),
+    ]
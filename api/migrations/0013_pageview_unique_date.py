@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:38
+
+import datetime
+from django.db import migrations, models
+from django.db.models import Count
+
+# Размер скетча api.hll на момент миграции
+HLL_SIZE = 2048
+
+
+def merge_duplicate_days(apps, schema_editor):
+    """
+    Два воркера могли создать строку за один день одновременно. Сводим их в
+    строку с меньшим id: просмотры складываем, скетчи посетителей объединяем.
+    Агрегаты PageViewRollup считались по хитам, а не по строкам, — верны.
+    """
+    PageView = apps.get_model('api', 'PageView')
+    days = PageView.objects.values('date').annotate(rows=Count('id')).filter(rows__gt=1).values_list('date', flat=True)
+    for day in list(days):
+        keep, *extra = PageView.objects.filter(date=day).order_by('id')
+        registers = bytearray(keep.visitors) if len(keep.visitors) == HLL_SIZE else bytearray(HLL_SIZE)
+        for row in extra:
+            keep.count += row.count
+            if len(row.visitors) == HLL_SIZE:
+                registers = bytearray(map(max, registers, bytes(row.visitors)))
+        if any(registers):
+            keep.visitors = bytes(registers)
+        keep.save(update_fields=['count', 'visitors'])
+        PageView.objects.filter(pk__in=[row.pk for row in extra]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_project_partial_page_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_days, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='pageview',
+            name='date',
+            field=models.DateField(default=datetime.date.today, unique=True),
+        ),
+    ]
@@ -1,8 +1,25 @@
 from __future__ import annotations
 
+from datetime import date
+
 from django.db import models
+from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, MaxValueValidator
-from django.db.models import Sum
+from django.db.models import Q, Sum
+from django.utils import timezone
+from django.utils.text import slugify
+
+from .hll import HyperLogLog
+
+_TRANSLIT = str.maketrans({
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ё': 'e', 'ж': 'zh', 'з': 'z',
+    'и': 'i', 'й': 'i', 'к': 'k', 'л': 'l', 'м': 'm', 'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r',
+    'с': 's', 'т': 't', 'у': 'u', 'ф': 'f', 'х': 'h', 'ц': 'ts', 'ч': 'ch', 'ш': 'sh', 'щ': 'sch',
+    'ъ': '', 'ы': 'y', 'ь': '', 'э': 'e', 'ю': 'yu', 'я': 'ya', 'ң': 'ng', 'ө': 'o', 'ү': 'u',
+})
+
+# заняты маршрутами /api/projects/<...>/; slug из одних цифр ушёл бы в <int:pk>
+RESERVED_SLUGS = {'search'}
 
 
 class TelegramUser(models.Model):
@@ -84,7 +101,8 @@ class Project(models.Model):
     ]
 
     title = models.CharField(max_length=200)
-    slug = models.SlugField(max_length=220, blank=True, db_index=True)
+    slug = models.SlugField(max_length=220, blank=True, unique=True,
+                            help_text='Пусто — сгенерируется из названия')
     short_description = models.CharField(max_length=255, blank=True)
     description = models.TextField()
 
@@ -110,11 +128,85 @@ class Project(models.Model):
             models.Index(fields=['status']),
             models.Index(fields=['is_active']),
             models.Index(fields=['is_featured']),
+            # под keyset-пагинацию (order, -created_at, -id) и фильтры списка.
+            # Частичные: булевы фильтры SQLite компилирует в WHERE is_active /
+            # NOT is_featured, искать по ним в индексе не умеет, а по условию
+            # частичного индекса — выбирает его
+            models.Index(fields=['order', '-created_at', '-id'], condition=Q(is_active=True),
+                         name='project_active_page_idx'),
+            models.Index(fields=['status', 'order', '-created_at', '-id'], condition=Q(is_active=True),
+                         name='project_status_page_idx'),
+            models.Index(fields=['order', '-created_at', '-id'], condition=Q(is_active=True, is_featured=True),
+                         name='project_featured_page_idx'),
+            models.Index(fields=['order', '-created_at', '-id'], condition=Q(is_active=True, is_featured=False),
+                         name='project_regular_page_idx'),
+            models.Index(fields=['status', 'order', '-created_at', '-id'],
+                         condition=Q(is_active=True, is_featured=True), name='project_stat_feat_page_idx'),
+            models.Index(fields=['status', 'order', '-created_at', '-id'],
+                         condition=Q(is_active=True, is_featured=False), name='project_stat_reg_page_idx'),
         ]
 
     def __str__(self):
         return self.title
 
+    def clean(self):
+        super().clean()
+        if self.slug in RESERVED_SLUGS:
+            raise ValidationError({'slug': f'«{self.slug}» занят адресом API'})
+        if self.slug.isdigit():
+            raise ValidationError({'slug': 'Slug из одних цифр откроется как id проекта'})
+
+    def save(self, *args, **kwargs):
+        if not self.slug:
+            self.slug = self.unique_slug(self.title, exclude_pk=self.pk)
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def unique_slug(cls, title, exclude_pk=None):
+        base = slugify(str(title).lower().translate(_TRANSLIT))[:200] or 'project'
+        if base.isdigit():
+            base = f'project-{base}'
+        taken = set(
+            cls.objects.filter(slug__startswith=base).exclude(pk=exclude_pk).values_list('slug', flat=True)
+        ) | RESERVED_SLUGS
+        slug, n = base, 2
+        while slug in taken:
+            slug, n = f'{base}-{n}', n + 1
+        return slug
+
+
+class ProjectTechnology(models.Model):
+    """Элемент Project.stack отдельной строкой — для индексного фильтра по технологии."""
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='technologies')
+    name = models.CharField(max_length=100, help_text='В нижнем регистре')
+
+    class Meta:
+        verbose_name = 'Технология проекта'
+        verbose_name_plural = 'Технологии проектов'
+        constraints = [
+            models.UniqueConstraint(fields=['project', 'name'], name='uniq_project_technology'),
+        ]
+        indexes = [
+            models.Index(fields=['name', 'project'], name='technology_name_project_idx'),
+        ]
+
+    def __str__(self):
+        return self.name
+
+    @staticmethod
+    def normalize(stack):
+        names = []
+        for item in stack if isinstance(stack, list) else []:
+            name = str(item).strip().lower()[:100]
+            if name and name not in names:
+                names.append(name)
+        return names
+
+    @classmethod
+    def sync(cls, project):
+        cls.objects.filter(project=project).delete()
+        cls.objects.bulk_create(cls(project=project, name=name) for name in cls.normalize(project.stack))
+
 
 class ContactMessage(models.Model):
     STATUS_CHOICES = [
@@ -170,10 +262,56 @@ class ContactMessage(models.Model):
         return f"{self.name}{via} — {self.subject}"
 
 
+class Notification(models.Model):
+    """Исходящее уведомление (outbox): пишется в одной транзакции с сообщением,
+    доставляется командой deliver_notifications."""
+    CHANNEL_CHOICES = [
+        ('telegram', 'Telegram'),
+        ('email', 'Email'),
+    ]
+
+    STATUS_CHOICES = [
+        ('pending', 'В очереди'),
+        ('sent', 'Отправлено'),
+        ('dead', 'Не доставлено'),
+    ]
+
+    message = models.ForeignKey(
+        ContactMessage,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name='notifications',
+        verbose_name='Сообщение'
+    )
+    channel = models.CharField(max_length=20, choices=CHANNEL_CHOICES)
+    payload = models.JSONField(default=dict)
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Уведомление'
+        verbose_name_plural = 'Уведомления'
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_channel_display()} #{self.pk} — {self.get_status_display()}"
+
+
 class PageView(models.Model):
-    date = models.DateField(auto_now_add=True, db_index=True)
+    date = models.DateField(default=date.today, unique=True)
     count = models.PositiveIntegerField(default=0, validators=[MinValueValidator(0)])
-    unique_ips = models.JSONField(default=list)
+    # HyperLogLog-скетч уникальных IP (api/hll.py), размер фиксирован
+    visitors = models.BinaryField(default=bytes, editable=False)
     class Meta:
         ordering = ['-date']
         verbose_name = 'Просмотры'
@@ -182,6 +320,10 @@ class PageView(models.Model):
     def __str__(self):
         return f"{self.date} — {self.count} просмотров"
 
+    @property
+    def unique_count(self) -> int:
+        return HyperLogLog(self.visitors).count()
+
     @classmethod
     def get_total(cls) -> int:
         # быстрее, чем sum() в Python
@@ -189,11 +331,40 @@ class PageView(models.Model):
 
     @classmethod
     def get_unique_total(cls) -> int:
-        all_ips = set()
-        for row in cls.objects.values_list('unique_ips', flat=True):
-            if isinstance(row, list):
-                all_ips.update(row)
-        return len(all_ips)
+        sketch = HyperLogLog()
+        for row in cls.objects.values_list('visitors', flat=True):
+            if row:
+                sketch.update(row)
+        return sketch.count()
+
+
+class PageViewRollup(models.Model):
+    """Агрегаты просмотров за неделю/месяц/всё время, ведутся инкрементально."""
+    PERIOD_CHOICES = [
+        ('week', 'Неделя'),
+        ('month', 'Месяц'),
+        ('all', 'Всё время'),
+    ]
+
+    period = models.CharField(max_length=10, choices=PERIOD_CHOICES)
+    start = models.DateField(verbose_name='Начало периода')
+    count = models.PositiveIntegerField(default=0)
+    visitors = models.BinaryField(default=bytes, editable=False)
+
+    class Meta:
+        ordering = ['period', '-start']
+        verbose_name = 'Просмотры за период'
+        verbose_name_plural = 'Просмотры за периоды'
+        constraints = [
+            models.UniqueConstraint(fields=['period', 'start'], name='uniq_rollup_period_start'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_period_display()} с {self.start} — {self.count} просмотров"
+
+    @property
+    def unique_count(self) -> int:
+        return HyperLogLog(self.visitors).count()
 
 
 class WorkExperience(models.Model):
@@ -206,6 +377,7 @@ class WorkExperience(models.Model):
     order = models.PositiveIntegerField(default=0)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['order']
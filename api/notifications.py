@@ -0,0 +1,302 @@
+"""
+Уведомления о новых сообщениях через outbox.
+
+contact_send только кладёт строки Notification в ту же транзакцию, что и
+ContactMessage. Отправку делает команда deliver_notifications (её держит
+запущенной gunicorn, см. gunicorn.conf.py): пачками, с повторами,
+экспоненциальной задержкой и пометкой dead после лимита попыток.
+Повторяются только сетевые ошибки, 5xx и 429 (с его retry_after); прочие 4xx
+от Telegram сразу dead.
+
+Telegram-уведомления копятся NOTIFY_DIGEST_WINDOW секунд и уходят одним
+сообщением-дайджестом (не больше NOTIFY_DIGEST_MAX_MESSAGES штук и
+NOTIFY_DIGEST_MAX_CHARS символов). Запросы идут через одну keep-alive сессию.
+Разметка — HTML, текст посетителя экранируется; если Telegram всё же отверг
+дайджест, его сообщения уходят по одному.
+"""
+import random
+import re
+from datetime import timedelta
+from html import escape
+
+import requests
+from django.conf import settings
+from django.core.mail import send_mail
+from django.db.models import Min
+from django.utils import timezone
+from requests.adapters import HTTPAdapter
+
+from .models import Notification
+
+
+class DeliveryError(Exception):
+    """
+    permanent — повтор не поможет (Telegram 4xx, кроме 429): сразу dead;
+    retry_after — сколько секунд просил подождать Telegram (429).
+    """
+
+    def __init__(self, message, permanent=False, retry_after=None):
+        super().__init__(message)
+        self.permanent = permanent
+        self.retry_after = retry_after
+
+
+TELEGRAM_HEADER = '📬 <b>Новое сообщение с портфолио!</b>\n\n'
+# Текст посетителя обрезается, чтобы тело с полями влезло в лимит Telegram
+# и дайджест не резал разметку посередине
+MESSAGE_LIMIT = 3000
+
+
+def telegram_body(msg):
+    """Тело уведомления в HTML-разметке Telegram; всё пользовательское экранировано."""
+    tg_info = ''
+    if msg.telegram_user:
+        u = msg.telegram_user
+        tg_info = f'\n🔗 <b>Telegram:</b> <a href="tg://user?id={u.telegram_id}">{escape(u.full_name)}</a>'
+        if u.username:
+            tg_info += f' @{escape(u.username)}'
+    text = escape(msg.message)
+    if len(text) > MESSAGE_LIMIT:
+        # не разрываем &lt; и подобные сущности
+        text = re.sub(r'&[^;]*$', '', text[:MESSAGE_LIMIT]) + '…'
+    return (
+        f"👤 <b>Имя:</b> {escape(msg.name)}{tg_info}\n"
+        f"📧 <b>Email:</b> {escape(msg.email) or '—'}\n"
+        f"📝 <b>Тема:</b> {escape(msg.subject)}\n\n"
+        f"💬 <b>Сообщение:</b>\n{text}"
+    )
+
+
+def telegram_text(msg):
+    return TELEGRAM_HEADER + telegram_body(msg)
+
+
+def enqueue(msg):
+    """Ставит уведомления о `msg` в очередь. Вызывать внутри транзакции создания."""
+    rows = []
+    if settings.TELEGRAM_BOT_TOKEN and settings.TELEGRAM_CHAT_ID:
+        rows.append(Notification(message=msg, channel='telegram', payload={
+            'text': telegram_text(msg),
+            'body': telegram_body(msg),
+            'parse_mode': 'HTML',
+        }))
+    if msg.email and settings.EMAIL_HOST_USER:
+        rows.append(Notification(message=msg, channel='email', payload={
+            'subject': f'[Portfolio] {msg.subject}',
+            'message': f'От: {msg.name} <{msg.email}>\n\n{msg.message}',
+        }))
+    Notification.objects.bulk_create(rows)
+    return rows
+
+
+_session = None
+
+
+def session():
+    """Общая HTTP-сессия воркера: соединение с Telegram переиспользуется."""
+    global _session
+    if _session is None:
+        _session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=4, max_retries=0)
+        _session.mount('https://', adapter)
+        _session.mount('http://', adapter)
+    return _session
+
+
+def send_telegram(payload):
+    token = settings.TELEGRAM_BOT_TOKEN
+    chat_id = settings.TELEGRAM_CHAT_ID
+    if not token or not chat_id:
+        raise DeliveryError('Бот не настроен')
+    try:
+        response = session().post(
+            f'{settings.TELEGRAM_API_URL}/bot{token}/sendMessage',
+            # уведомления, поставленные в очередь до перехода на HTML, — в Markdown
+            json={'chat_id': chat_id, 'text': payload['text'],
+                  'parse_mode': payload.get('parse_mode', 'Markdown')},
+            timeout=getattr(settings, 'NOTIFY_TIMEOUT', 10),
+        )
+    except requests.RequestException as exc:
+        raise DeliveryError(str(exc))
+    try:
+        body = response.json()
+    except ValueError:
+        body = {}
+    if response.status_code == 200 and body.get('ok'):
+        return
+    error = f'Telegram {response.status_code}: {response.text[:200]}'
+    if response.status_code == 429:
+        retry_after = (body.get('parameters') or {}).get('retry_after')
+        raise DeliveryError(error, retry_after=retry_after if isinstance(retry_after, int) else None)
+    # 400 (разметка, длина), 403 (бот заблокирован), 404 (чат) и т.п.
+    raise DeliveryError(error, permanent=400 <= response.status_code < 500)
+
+
+def send_email(payload):
+    try:
+        send_mail(
+            subject=payload['subject'],
+            message=payload['message'],
+            from_email=settings.EMAIL_HOST_USER,
+            recipient_list=[settings.CONTACT_EMAIL],
+            fail_silently=False,
+        )
+    except Exception as exc:
+        raise DeliveryError(str(exc))
+
+
+SENDERS = {
+    'telegram': send_telegram,
+    'email': send_email,
+}
+
+
+def backoff(attempts):
+    """Задержка перед следующей попыткой: 30с, 1м, 2м, … до часа, ±10%."""
+    base = getattr(settings, 'NOTIFY_RETRY_BASE', 30)
+    delay = min(base * 2 ** (attempts - 1), getattr(settings, 'NOTIFY_RETRY_MAX', 3600))
+    return timedelta(seconds=delay * random.uniform(0.9, 1.1))
+
+
+def claim(batch, channels=None):
+    """
+    Забирает до `batch` уведомлений, чей срок подошёл. Захват — условный UPDATE
+    next_attempt_at вперёд, поэтому несколько воркеров не отправят одно и то же.
+    """
+    now = timezone.now()
+    lease = now + timedelta(seconds=getattr(settings, 'NOTIFY_LEASE', 120))
+    due = Notification.objects.filter(status='pending', next_attempt_at__lte=now).order_by('next_attempt_at', 'pk')
+    if channels is not None:
+        due = due.filter(channel__in=channels)
+    claimed = []
+    for item in due[:batch]:
+        if Notification.objects.filter(
+                pk=item.pk, status='pending', next_attempt_at=item.next_attempt_at,
+        ).update(next_attempt_at=lease):
+            claimed.append(item)
+    return claimed
+
+
+def _failed(item, exc):
+    item.attempts += 1
+    item.last_error = str(exc)[:2000]
+    if getattr(exc, 'permanent', False) or item.attempts >= getattr(settings, 'NOTIFY_MAX_ATTEMPTS', 8):
+        item.status = 'dead'
+    elif getattr(exc, 'retry_after', None):
+        item.next_attempt_at = timezone.now() + timedelta(seconds=exc.retry_after)
+    else:
+        item.next_attempt_at = timezone.now() + backoff(item.attempts)
+    item.save(update_fields=['attempts', 'last_error', 'status', 'next_attempt_at'])
+
+
+def _sent(items):
+    now = timezone.now()
+    for item in items:
+        item.attempts += 1
+        item.status = 'sent'
+        item.sent_at = now
+        item.last_error = ''
+    Notification.objects.bulk_update(items, ['attempts', 'last_error', 'status', 'sent_at'])
+
+
+def deliver(item):
+    """Одна попытка доставки. Возвращает True, если отправлено."""
+    try:
+        SENDERS[item.channel](item.payload)
+    except Exception as exc:
+        _failed(item, exc)
+        return False
+    _sent([item])
+    return True
+
+
+def digest_chunks(items, max_messages=None, max_chars=None):
+    """
+    Делит Telegram-уведомления на дайджесты: [(уведомления, payload)].
+    Одиночное уведомление (и старое, в Markdown) уходит со своим обычным текстом.
+    """
+    max_messages = max_messages or getattr(settings, 'NOTIFY_DIGEST_MAX_MESSAGES', 20)
+    max_chars = max_chars or getattr(settings, 'NOTIFY_DIGEST_MAX_CHARS', 4000)
+    separator = '\n\n— — —\n\n'
+    header_size = 64  # запас на заголовок с числом сообщений
+
+    groups, group, size = [], [], header_size
+    for item in items:
+        if item.payload.get('parse_mode') != 'HTML':
+            groups.append([(item, None)])
+            continue
+        body = item.payload['body']
+        if group and (len(group) >= max_messages or size + len(separator) + len(body) > max_chars):
+            groups.append(group)
+            group, size = [], header_size
+        group.append((item, body))
+        size += len(separator) + len(body)
+    if group:
+        groups.append(group)
+
+    chunks = []
+    for group in groups:
+        if len(group) == 1:
+            item, _ = group[0]
+            chunks.append(([item], item.payload))
+            continue
+        text = f'📬 <b>Новых сообщений с портфолио: {len(group)}</b>\n\n' + separator.join(body for _, body in group)
+        chunks.append(([item for item, _ in group], {'text': text, 'parse_mode': 'HTML'}))
+    return chunks
+
+
+def digest_due():
+    """Пора ли слать дайджест: самое старое ждёт дольше окна или набралось на полный."""
+    window = getattr(settings, 'NOTIFY_DIGEST_WINDOW', 0)
+    due = Notification.objects.filter(status='pending', channel='telegram', next_attempt_at__lte=timezone.now())
+    oldest = due.aggregate(oldest=Min('created_at'))['oldest']
+    if oldest is None:
+        return False
+    if oldest <= timezone.now() - timedelta(seconds=window):
+        return True
+    return due.count() >= getattr(settings, 'NOTIFY_DIGEST_MAX_MESSAGES', 20)
+
+
+def deliver_digests():
+    """(отправлено, не удалось) — Telegram-уведомления, собранные в дайджесты."""
+    sent = failed = 0
+    if not digest_due():
+        return sent, failed
+    batch = getattr(settings, 'NOTIFY_DIGEST_MAX_MESSAGES', 20) * 5
+    for items, payload in digest_chunks(claim(batch, channels=['telegram'])):
+        try:
+            send_telegram(payload)
+        except Exception as exc:
+            if len(items) == 1 or not getattr(exc, 'permanent', False):
+                # сеть, 5xx, 429 — повторим весь дайджест позже
+                for item in items:
+                    _failed(item, exc)
+                failed += len(items)
+                continue
+            # Telegram отверг дайджест — одно кривое сообщение не должно топить остальные
+            for item in items:
+                if deliver(item):
+                    sent += 1
+                else:
+                    failed += 1
+        else:
+            _sent(items)
+            sent += len(items)
+    return sent, failed
+
+
+def deliver_batch(batch=20):
+    """(отправлено, не удалось) за один проход."""
+    sent = failed = 0
+    digest = getattr(settings, 'NOTIFY_DIGEST_WINDOW', 0) > 0
+    channels = [c for c in SENDERS if c != 'telegram'] if digest else None
+    for item in claim(batch, channels):
+        if deliver(item):
+            sent += 1
+        else:
+            failed += 1
+    if digest:
+        digest_sent, digest_failed = deliver_digests()
+        sent += digest_sent
+        failed += digest_failed
+    return sent, failed
@@ -0,0 +1,195 @@
+"""
+Учёт просмотров.
+
+Хиты копятся в памяти воркера и сбрасываются в БД пачкой (api/buffers.py) —
+по количеству, по таймеру или при остановке процесса. Счётчик увеличивается атомарно
+через F(), поэтому параллельные воркеры gunicorn не теряют инкременты.
+"""
+import atexit
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .buffers import FlushBuffer
+from .hll import HyperLogLog
+
+
+PERIODS = ('week', 'month', 'all')
+ALL_TIME_START = date(1970, 1, 1)
+
+
+def period_start(period, day):
+    """Первый день периода ('week' | 'month' | 'all'), в который попадает `day`."""
+    if period == 'week':
+        return day - timedelta(days=day.weekday())
+    if period == 'month':
+        return day.replace(day=1)
+    return ALL_TIME_START
+
+
+def _bump(manager, lookup, count, sketch):
+    updated = manager.filter(**lookup).update(count=F('count') + count)
+    if not updated:
+        try:
+            # savepoint: строку мог только что создать другой воркер
+            with transaction.atomic():
+                manager.create(**lookup, count=count, visitors=bytes(sketch) if sketch is not None else b'')
+            return
+        except IntegrityError:
+            manager.filter(**lookup).update(count=F('count') + count)
+    if sketch is not None:
+        row = manager.filter(**lookup).only('visitors').first()
+        merged = bytes(HyperLogLog(row.visitors).update(sketch))
+        if merged != bytes(row.visitors):
+            row.visitors = merged
+            row.save(update_fields=['visitors'])
+
+
+def record(day, count, ips=()):
+    """
+    Атомарно добавляет `count` просмотров и IP из `ips` к строке за `day`
+    и ко всем агрегатам (неделя, месяц, всё время), куда попадает этот день.
+    """
+    from .models import PageView, PageViewRollup
+
+    sketch = HyperLogLog.from_values(ips) if ips else None
+    with transaction.atomic():
+        _bump(PageView.objects, {'date': day}, count, sketch)
+        for period in PERIODS:
+            lookup = {'period': period, 'start': period_start(period, day)}
+            _bump(PageViewRollup.objects, lookup, count, sketch)
+
+
+def rebuild_rollups():
+    """Пересчитывает агрегаты с нуля по дневным строкам."""
+    from .models import PageView, PageViewRollup
+
+    totals = {}
+    for day, count, visitors in PageView.objects.values_list('date', 'count', 'visitors').iterator():
+        for period in PERIODS:
+            key = (period, period_start(period, day))
+            entry = totals.setdefault(key, [0, HyperLogLog()])
+            entry[0] += count
+            if visitors:
+                entry[1].update(visitors)
+
+    with transaction.atomic():
+        PageViewRollup.objects.all().delete()
+        PageViewRollup.objects.bulk_create(
+            PageViewRollup(period=period, start=start, count=count, visitors=bytes(sketch))
+            for (period, start), (count, sketch) in totals.items()
+        )
+    return len(totals)
+
+
+def next_period(period, start):
+    """Начало периода, следующего за тем, что начинается в `start`; None после date.max."""
+    try:
+        if period == 'day':
+            return start + timedelta(days=1)
+        if period == 'week':
+            return start + timedelta(days=7)
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    except OverflowError:
+        return None
+
+
+def bucket_count(start, end, granularity):
+    """Сколько корзин day/week/month вернёт series(start, end, granularity)."""
+    if granularity == 'day':
+        return (end - start).days + 1
+    if granularity == 'week':
+        return (period_start('week', end) - period_start('week', start)).days // 7 + 1
+    return (end.year - start.year) * 12 + end.month - start.month + 1
+
+
+def series(start, end, granularity):
+    """
+    Просмотры и уникальные посетители по корзинам day/week/month за [start, end].
+
+    Дни читаются одним запросом по PageView, недели и месяцы — одним запросом
+    по готовым агрегатам; для них границы расширяются до целых периодов.
+    Возвращает (корзины, суммарный скетч за весь диапазон).
+    """
+    from .models import PageView, PageViewRollup
+
+    if granularity == 'day':
+        rows = PageView.objects.filter(date__range=(start, end)).values_list('date', 'count', 'visitors')
+    else:
+        start = period_start(granularity, start)
+        end = period_start(granularity, end)
+        rows = PageViewRollup.objects.filter(
+            period=granularity, start__range=(start, end),
+        ).values_list('start', 'count', 'visitors')
+
+    found = {}
+    for day, count, visitors in rows.order_by():
+        entry = found.setdefault(day, [0, HyperLogLog()])
+        entry[0] += count
+        if visitors:
+            entry[1].update(visitors)
+
+    total = HyperLogLog()
+    buckets = []
+    cursor = start
+    while cursor is not None and cursor <= end:
+        count, sketch = found.get(cursor, (0, None))
+        if sketch is not None:
+            total.update(sketch)
+        buckets.append({
+            'start': str(cursor),
+            'views': count,
+            'unique_visitors': sketch.count() if sketch is not None else 0,
+        })
+        cursor = next_period(granularity, cursor)
+    return buckets, total
+
+
+class PageViewBuffer(FlushBuffer):
+    """Потокобезопасный буфер хитов: {дата: [кол-во, {ip}]}."""
+
+    def __init__(self, max_hits=None, interval=None):
+        super().__init__(
+            max_hits or getattr(settings, 'PAGEVIEW_FLUSH_HITS', 50),
+            interval or getattr(settings, 'PAGEVIEW_FLUSH_INTERVAL', 30),
+        )
+
+    def add(self, day, ip):
+        with self._lock:
+            entry = self._pending.setdefault(day, [0, set()])
+            entry[0] += 1
+            if ip:
+                entry[1].add(ip)
+        self.added()
+
+    def size(self, pending):
+        return sum(count for count, _ in pending.values())
+
+    def write(self, pending):
+        failed = {}
+        for day, (count, ips) in pending.items():
+            try:
+                record(day, count, ips)
+            except Exception:
+                failed[day] = (count, ips)
+        return failed
+
+    def requeue(self, pending):
+        for day, (count, ips) in pending.items():
+            entry = self._pending.setdefault(day, [0, set()])
+            entry[0] += count
+            entry[1].update(ips)
+
+
+buffer = PageViewBuffer()
+atexit.register(buffer.flush)
+
+
+def track(ip, day=None):
+    day = day or date.today()
+    if getattr(settings, 'PAGEVIEW_BUFFERED', True):
+        buffer.add(day, ip)
+    else:
+        record(day, 1, {ip} if ip else ())
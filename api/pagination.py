@@ -0,0 +1,57 @@
+"""
+Keyset-пагинация проектов по (order, -created_at, -id).
+
+Курсор — позиция последней строки страницы, следующая страница берётся
+условием «строго после неё», поэтому стоимость не растёт с номером страницы
+и записи не задваиваются при вставках между запросами.
+"""
+import base64
+import json
+from datetime import datetime
+
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(order, created_at, pk):
+    if isinstance(created_at, datetime):
+        created_at = created_at.isoformat()
+    raw = json.dumps([order, created_at, pk], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        order, created_at, pk = json.loads(raw)
+        return int(order), datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, TypeError):
+        raise InvalidCursor(token)
+
+
+def keyset_page(queryset, cursor, limit, fetch):
+    """
+    Страница из `limit` строк после `cursor`.
+    fetch(queryset) → список dict с ключами order, created_at, id.
+    Возвращает (строки, курсор следующей страницы или None).
+    """
+    queryset = queryset.order_by('order', '-created_at', '-id')
+    if cursor:
+        order, created_at, pk = decode_cursor(cursor)
+        # order >= … отдельным условием: по нему SQLite ищет в индексе
+        # (order, -created_at, -id) диапазоном, OR целиком дал бы полный проход
+        queryset = queryset.filter(
+            Q(order__gte=order),
+            Q(order__gt=order) |
+            Q(created_at__lt=created_at) |
+            Q(created_at=created_at, id__lt=pk)
+        )
+    rows = fetch(queryset[:limit + 1])
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(last['order'], last['created_at'], last['id'])
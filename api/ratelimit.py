@@ -0,0 +1,189 @@
+"""
+Ограничение частоты запросов, общее для всех воркеров gunicorn.
+
+Алгоритмы хранят на ключ константное состояние из трёх чисел:
+  token_bucket   — (токены, время) — ёмкость `limit`, пополнение limit/window в секунду;
+  sliding_window — (начало окна, в текущем, в прошлом) — оценка скользящего окна
+                   по двум соседним фиксированным окнам.
+
+Бэкенды: `sqlite` — отдельный файл с WAL, атомарность через BEGIN IMMEDIATE
+(виден всем процессам на машине); `memory` — словарь процесса (для разработки).
+
+Настройка в settings.RATE_LIMITS по имени эндпоинта:
+    RATE_LIMITS = {'contact': {'algorithm': 'sliding_window', 'limit': 3, 'window': 600}}
+"""
+import os
+import random
+import sqlite3
+import threading
+import time
+
+from django.conf import settings
+
+
+class TokenBucket:
+    def __init__(self, limit, window):
+        self.capacity = float(limit)
+        self.rate = limit / window
+        self.ttl = window
+
+    def apply(self, state, now, cost, consume):
+        tokens, updated = state if state else (self.capacity, now)
+        tokens = min(self.capacity, tokens + (now - updated) * self.rate)
+        allowed = tokens >= cost
+        if allowed and consume:
+            tokens -= cost
+        return (tokens, now), allowed
+
+    def refund(self, state, now, cost):
+        tokens, updated = state if state else (self.capacity, now)
+        tokens = min(self.capacity, tokens + (now - updated) * self.rate + cost)
+        return (tokens, now), True
+
+
+class SlidingWindowCounter:
+    def __init__(self, limit, window):
+        self.limit = limit
+        self.window = window
+        self.ttl = 2 * window
+
+    def apply(self, state, now, cost, consume):
+        start = int(now // self.window) * self.window
+        current = previous = 0
+        if state:
+            saved_start, saved_current, saved_previous = state
+            if saved_start == start:
+                current, previous = saved_current, saved_previous
+            elif saved_start == start - self.window:
+                previous = saved_current
+        weight = 1 - (now - start) / self.window
+        allowed = previous * weight + current + cost <= self.limit
+        if allowed and consume:
+            current += cost
+        return (start, current, previous), allowed
+
+    def refund(self, state, now, cost):
+        start = int(now // self.window) * self.window
+        current = previous = 0
+        if state:
+            saved_start, saved_current, saved_previous = state
+            if saved_start == start:
+                current, previous = max(0, saved_current - cost), saved_previous
+            elif saved_start == start - self.window:
+                # списание попало в прошлое окно
+                previous = max(0, saved_current - cost)
+        return (start, current, previous), True
+
+
+ALGORITHMS = {
+    'token_bucket': TokenBucket,
+    'sliding_window': SlidingWindowCounter,
+}
+
+
+class MemoryBackend:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = {}
+
+    def update(self, key, fn, ttl):
+        with self._lock:
+            state, result = fn(self._data.get(key))
+            self._data[key] = state
+            return result
+
+
+class SQLiteBackend:
+    def __init__(self, path):
+        self.path = str(path)
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS ratelimit '
+                '(key TEXT PRIMARY KEY, a REAL, b REAL, c REAL, expires REAL)'
+            )
+            self._local.conn = conn
+        return conn
+
+    def update(self, key, fn, ttl):
+        conn = self._connection()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT a, b, c FROM ratelimit WHERE key = ?', (key,)).fetchone()
+            state, result = fn(tuple(v for v in row if v is not None) if row else None)
+            values = tuple(state) + (None,) * (3 - len(state))
+            conn.execute(
+                'INSERT OR REPLACE INTO ratelimit (key, a, b, c, expires) VALUES (?, ?, ?, ?, ?)',
+                (key, *values, now + ttl),
+            )
+            if random.random() < 0.01:
+                conn.execute('DELETE FROM ratelimit WHERE expires < ?', (now,))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return result
+
+
+class RateLimiter:
+    def __init__(self, scope, algorithm, backend):
+        self.scope = scope
+        self.algorithm = algorithm
+        self.backend = backend
+
+    def allow(self, key, cost=1, consume=True):
+        """
+        True, если запрос укладывается в лимит. Проверка и списание — одна
+        операция бэкенда, поэтому параллельные запросы не проскочат лимит вместе.
+        consume=False — только проверка, без списания.
+        """
+        now = time.time()
+        return self.backend.update(
+            f'{self.scope}:{key}',
+            lambda state: self.algorithm.apply(state, now, cost, consume),
+            self.algorithm.ttl,
+        )
+
+    def refund(self, key, cost=1):
+        """Вернуть списанное, если запрос в итоге не засчитывается."""
+        now = time.time()
+        self.backend.update(
+            f'{self.scope}:{key}',
+            lambda state: self.algorithm.refund(state, now, cost),
+            self.algorithm.ttl,
+        )
+
+
+_backend = None
+_limiters = {}
+_lock = threading.Lock()
+
+
+def _get_backend():
+    global _backend
+    if _backend is None:
+        name = getattr(settings, 'RATELIMIT_BACKEND', 'sqlite')
+        if name == 'memory':
+            _backend = MemoryBackend()
+        else:
+            _backend = SQLiteBackend(settings.RATELIMIT_DB)
+    return _backend
+
+
+def get(scope):
+    """Лимитер для эндпоинта из settings.RATE_LIMITS[scope]."""
+    limiter = _limiters.get(scope)
+    if limiter is None:
+        with _lock:
+            config = settings.RATE_LIMITS[scope]
+            algorithm = ALGORITHMS[config.get('algorithm', 'sliding_window')](config['limit'], config['window'])
+            limiter = _limiters[scope] = RateLimiter(scope, algorithm, _get_backend())
+    return limiter
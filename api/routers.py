@@ -0,0 +1,37 @@
+"""
+Чтение контента с отдельного соединения только для чтения.
+
+Skill, Project (с технологиями), WorkExperience и ResumeFile меняются только
+из админки, а читаются на каждом запросе. Их SELECT идут через алиас
+`replica` — тот же файл SQLite, открытый с mode=ro: такие соединения никогда
+не берут блокировку записи, а в WAL не ждут пишущих просмотры и сообщения.
+Всё остальное и любые записи — в `default`.
+
+Внутри транзакции на `default` (админка, миграции) чтение остаётся там же,
+чтобы видеть свои ещё не закоммиченные изменения.
+"""
+from django.conf import settings
+from django.db import connections
+
+
+READ_ONLY_MODELS = {'api.skill', 'api.project', 'api.projecttechnology', 'api.workexperience', 'api.resumefile'}
+
+
+class ReadReplicaRouter:
+    alias = 'replica'
+
+    def db_for_read(self, model, **hints):
+        if model._meta.label_lower not in READ_ONLY_MODELS or self.alias not in settings.DATABASES:
+            return None
+        if connections['default'].in_atomic_block:
+            return 'default'
+        return self.alias
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
@@ -0,0 +1,198 @@
+"""
+Поиск по проектам: инвертированный индекс в памяти воркера.
+
+Индекс строится один раз по активным проектам и сохраняется в файл
+(SEARCH_INDEX_PATH) вместе с версией контента Project. Сохранение проекта
+обновляет индекс точечно; остальные воркеры видят новую версию в общем кеше
+и перечитывают файл. Запрос к БД нужен только если файла нет или он устарел.
+"""
+import json
+import math
+import os
+import re
+import tempfile
+import threading
+from bisect import bisect_left, insort
+
+from django.conf import settings
+
+from . import caching
+
+# вес совпадения в зависимости от поля
+FIELD_WEIGHTS = {'title': 3.0, 'stack': 2.5, 'short_description': 1.5, 'description': 1.0}
+PREFIX_WEIGHT = 0.6      # «pyth» → «python» ценится меньше точного совпадения
+MAX_EXPANSIONS = 64      # предел слов на один префикс
+
+_TOKEN_RE = re.compile(r'\w+')
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(str(text).lower().replace('ё', 'е'))
+
+
+class SearchIndex:
+    def __init__(self, version=None):
+        self.version = version
+        self.postings = {}  # слово → {pk: вес}
+        self.docs = {}      # pk → (данные для ответа, [слова])
+        self.terms = []     # отсортированный словарь для поиска по префиксу
+
+    def add(self, pk, doc, fields):
+        """Добавить или заменить документ; новые слова встают в terms по месту."""
+        for token in self._put(pk, doc, fields):
+            insort(self.terms, token)
+
+    def _put(self, pk, doc, fields):
+        """Документ в postings без terms (для массовой сборки). Возвращает новые слова."""
+        self.remove(pk)
+        weights = {}
+        for field, text in fields.items():
+            for token in tokenize(' '.join(text) if isinstance(text, list) else text):
+                weights[token] = weights.get(token, 0.0) + FIELD_WEIGHTS[field]
+        new = []
+        for token, weight in weights.items():
+            posting = self.postings.get(token)
+            if posting is None:
+                posting = self.postings[token] = {}
+                new.append(token)
+            posting[pk] = 1 + math.log(weight)
+        self.docs[pk] = (doc, list(weights))
+        return new
+
+    def remove(self, pk):
+        entry = self.docs.pop(pk, None)
+        if entry is None:
+            return
+        for token in entry[1]:
+            posting = self.postings[token]
+            posting.pop(pk, None)
+            if not posting:
+                del self.postings[token]
+                i = bisect_left(self.terms, token)
+                if i < len(self.terms) and self.terms[i] == token:
+                    del self.terms[i]
+
+    def search(self, query, limit=10):
+        """[(pk, score, данные)] по убыванию релевантности; нужны все слова запроса."""
+        total = len(self.docs)
+        scores = None
+        for token in dict.fromkeys(tokenize(query)):
+            matched = {}
+            start = bisect_left(self.terms, token)
+            for term in self.terms[start:start + MAX_EXPANSIONS]:
+                if not term.startswith(token):
+                    break
+                posting = self.postings[term]
+                boost = (1.0 if term == token else PREFIX_WEIGHT) * math.log(1 + total / len(posting))
+                for pk, weight in posting.items():
+                    score = boost * weight
+                    if score > matched.get(pk, 0.0):
+                        matched[pk] = score
+            scores = matched if scores is None else {
+                pk: scores[pk] + score for pk, score in matched.items() if pk in scores
+            }
+            if not scores:
+                return []
+        ranked = sorted((scores or {}).items(), key=lambda item: (-item[1], item[0]))[:limit]
+        return [(pk, round(score, 4), self.docs[pk][0]) for pk, score in ranked]
+
+    def to_dict(self):
+        return {'version': self.version, 'docs': {str(pk): entry for pk, entry in self.docs.items()},
+                'postings': {t: {str(pk): w for pk, w in p.items()} for t, p in self.postings.items()}}
+
+    @classmethod
+    def from_dict(cls, data):
+        index = cls(data['version'])
+        index.docs = {int(pk): (doc, terms) for pk, (doc, terms) in data['docs'].items()}
+        index.postings = {t: {int(pk): w for pk, w in p.items()} for t, p in data['postings'].items()}
+        index.terms = sorted(index.postings)
+        return index
+
+
+def _document(project):
+    doc = {
+        'id': project.pk, 'slug': project.slug, 'title': project.title,
+        'short_description': project.short_description,
+        'stack': project.stack, 'status': project.status, 'status_display': project.get_status_display(),
+    }
+    fields = {field: getattr(project, field) for field in FIELD_WEIGHTS}
+    return doc, fields
+
+
+def build(version):
+    from .models import Project
+
+    index = SearchIndex(version)
+    for project in Project.objects.filter(is_active=True).only(
+            'id', 'slug', 'title', 'short_description', 'description', 'stack', 'status'):
+        index._put(project.pk, *_document(project))
+    index.terms = sorted(index.postings)
+    return index
+
+
+def _path():
+    return getattr(settings, 'SEARCH_INDEX_PATH', os.path.join(settings.BASE_DIR, '.cache', 'search_index.json'))
+
+
+def save(index):
+    path = _path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as fh:
+        json.dump(index.to_dict(), fh, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def _load(version):
+    try:
+        with open(_path(), encoding='utf-8') as fh:
+            data = json.load(fh)
+    except (OSError, ValueError):
+        return None
+    return SearchIndex.from_dict(data) if data.get('version') == version else None
+
+
+_index = None
+_lock = threading.Lock()
+
+
+def get_index():
+    global _index
+    from .models import Project
+
+    current = caching.version(Project)
+    if _index is None or _index.version != current:
+        with _lock:
+            if _index is None or _index.version != current:
+                index = _load(current)
+                if index is None:
+                    index = build(current)
+                    save(index)
+                _index = index
+    return _index
+
+
+def project_changed(project, previous_version, deleted=False):
+    """
+    Точечное обновление после коммита. previous_version — версия Project до
+    правки: если индекс воркера был старее, обновлять его нельзя, перестроим.
+    """
+    global _index
+    from .models import Project
+
+    with _lock:
+        if _index is None:
+            return
+        if _index.version != previous_version:
+            _index = None
+            return
+        if deleted or not project.is_active:
+            _index.remove(project.pk)
+        else:
+            _index.add(project.pk, *_document(project))
+        _index.version = caching.version(Project)
+        save(_index)
+
+
+def search(query, limit=10):
+    return get_index().search(query, limit)
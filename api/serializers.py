@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from . import images
 from .models import Skill, Project, ContactMessage, WorkExperience
 
 
@@ -12,7 +13,7 @@ class ProjectSerializer(serializers.ModelSerializer):
     status_display = serializers.CharField(source='get_status_display', read_only=True)
     class Meta:
         model = Project
-        fields = ['id', 'title', 'description', 'stack', 'status', 'status_display',
+        fields = ['id', 'slug', 'title', 'description', 'stack', 'status', 'status_display',
                   'github_url', 'demo_url', 'is_featured', 'order', 'created_at']
 
 
@@ -38,10 +39,12 @@ class ContactMessageSerializer(serializers.ModelSerializer):
 
 class WorkExperienceSerializer(serializers.ModelSerializer):
     logo_url = serializers.SerializerMethodField()
+    # {'avif': 'url 64w, …', 'webp': …, 'jpeg': …}; None, пока копии не готовы
+    logo_srcset = serializers.SerializerMethodField()
 
     class Meta:
         model = WorkExperience
-        fields = ['id', 'company', 'role', 'period', 'description', 'logo_url', 'order']
+        fields = ['id', 'company', 'role', 'period', 'description', 'logo_url', 'logo_srcset', 'order']
 
     def get_logo_url(self, obj):
         if obj.logo:
@@ -50,3 +53,8 @@ class WorkExperienceSerializer(serializers.ModelSerializer):
                 return request.build_absolute_uri(obj.logo.url)
             return obj.logo.url
         return None
+
+    def get_logo_srcset(self, obj):
+        if obj.logo:
+            return images.srcset(obj.logo.path, 'logo', self.context.get('request'))
+        return None
@@ -0,0 +1,46 @@
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+
+from . import caching, db, images, search
+from .models import Project, ProjectTechnology, ResumeFile, Skill, WorkExperience
+
+CACHED_MODELS = (Skill, Project, WorkExperience, ResumeFile)
+
+connection_created.connect(db.configure_connection, dispatch_uid='sqlite_pragmas')
+
+
+def bump_content_version(sender, **kwargs):
+    caching.bump(sender)
+
+
+for model in CACHED_MODELS:
+    post_save.connect(bump_content_version, sender=model, dispatch_uid=f'bump_{model.__name__}_save')
+    post_delete.connect(bump_content_version, sender=model, dispatch_uid=f'bump_{model.__name__}_delete')
+
+
+def sync_project_technologies(sender, instance, **kwargs):
+    ProjectTechnology.sync(instance)
+
+
+post_save.connect(sync_project_technologies, sender=Project, dispatch_uid='sync_project_technologies')
+
+
+def update_search_index(sender, instance, **kwargs):
+    # колбэк выполнится после bump версии: оба on_commit, этот зарегистрирован позже
+    deleted = kwargs.get('signal') is post_delete
+    previous = caching.version(Project)
+    transaction.on_commit(lambda: search.project_changed(instance, previous, deleted=deleted))
+
+
+post_save.connect(update_search_index, sender=Project, dispatch_uid='search_project_save')
+post_delete.connect(update_search_index, sender=Project, dispatch_uid='search_project_delete')
+
+
+def make_logo_derivatives(sender, instance, **kwargs):
+    if instance.logo:
+        path = instance.logo.path
+        transaction.on_commit(lambda: images.manifest(path, 'logo'))
+
+
+post_save.connect(make_logo_derivatives, sender=WorkExperience, dispatch_uid='logo_derivatives')
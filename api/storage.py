@@ -0,0 +1,63 @@
+"""
+Хранилище загрузок с хешем содержимого в имени.
+
+logo.png → company_logos/logo.3f2a9c1b7e4d.png: по имени ясно, что байты
+не поменяются, поэтому MediaFilesMiddleware отдаёт их с immutable-кешем.
+Повторная загрузка того же файла (имя и байты) возвращает уже сохранённый.
+Сжимаемые файлы сразу получают соседей .gz/.br.
+"""
+import hashlib
+import os
+import re
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from whitenoise.compress import Compressor
+
+from . import compression
+
+
+HASH_LENGTH = 12
+HASHED_NAME_RE = re.compile(r'\.([0-9a-f]{%d})(\.[^./]+)?$' % HASH_LENGTH)
+MAX_COMPRESS_SIZE = 10 * 1024 * 1024
+
+_compressor = Compressor(quiet=True)
+
+
+def display_name(name):
+    """Имя файла без хеша — для Content-Disposition."""
+    base = os.path.basename(name)
+    return HASHED_NAME_RE.sub(lambda m: m.group(2) or '', base)
+
+
+class HashedMediaStorage(FileSystemStorage):
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        root, ext = os.path.splitext(self.generate_filename(name))
+        name = f'{root}.{digest.hexdigest()[:HASH_LENGTH]}{ext}'
+        if self.exists(name):
+            return name
+        name = super().save(name, content, max_length=max_length)
+        self._precompress(name)
+        return name
+
+    def delete(self, name):
+        super().delete(name)
+        for suffix in ('.gz', '.br'):
+            super().delete(name + suffix)
+
+    def _precompress(self, name):
+        if not _compressor.should_compress(name) or self.size(name) > MAX_COMPRESS_SIZE:
+            return
+        with self.open(name, 'rb') as f:
+            body = f.read()
+        for coding, data in compression.variants(body, quality=compression.STATIC_QUALITY).items():
+            with open(self.path(name) + ('.br' if coding == 'br' else '.gz'), 'wb') as out:
+                out.write(data)
@@ -0,0 +1,151 @@
+"""
+Локальные заглушки Telegram Bot API и SMTP для проверки доставки уведомлений.
+
+    server = FakeTelegramServer().start()   # settings.TELEGRAM_API_URL = server.url
+    smtp = FakeSMTPServer().start()         # EMAIL_HOST/PORT = smtp.host/port, без TLS и пароля
+    ...
+    server.messages, smtp.messages
+    server.stop(); smtp.stop()
+
+fail_rate / delay позволяют изобразить нестабильный или медленный внешний сервис,
+FakeTelegramServer.reject(data) → True — отказ 400, как на кривую разметку.
+"""
+import json
+import random
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _StubServer:
+    def __init__(self, host='127.0.0.1', port=0, fail_rate=0.0, delay=0.0):
+        self.host = host
+        self.port = port
+        self.fail_rate = fail_rate
+        self.delay = delay
+        self.messages = []
+        self._server = None
+        self._thread = None
+
+    def _should_fail(self):
+        if self.delay:
+            time.sleep(self.delay)
+        return random.random() < self.fail_rate
+
+    def _bind(self):
+        self._server = self._make_server()
+        self._server.stub = self
+        self.port = self._server.server_address[1]
+
+    def start(self):
+        """Запуск в фоновом потоке."""
+        self._bind()
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+
+class _TelegramHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        stub = self.server.stub
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        if not self.path.endswith('/sendMessage'):
+            return self._reply(404, {'ok': False, 'error_code': 404, 'description': 'Not Found'})
+        if stub._should_fail():
+            return self._reply(502, {'ok': False, 'error_code': 502, 'description': 'Bad Gateway'})
+        try:
+            data = json.loads(body or b'{}')
+        except ValueError:
+            return self._reply(400, {'ok': False, 'error_code': 400, 'description': 'Bad Request'})
+        if stub.reject and stub.reject(data):
+            return self._reply(400, {'ok': False, 'error_code': 400,
+                                     'description': "Bad Request: can't parse entities"})
+        stub.messages.append(data)
+        self._reply(200, {'ok': True, 'result': {'message_id': len(stub.messages), 'text': data.get('text')}})
+
+    def _reply(self, code, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeTelegramServer(_StubServer):
+    """Отвечает на POST /bot<token>/sendMessage как Bot API, тексты — в .messages."""
+
+    reject = None
+
+    @property
+    def url(self):
+        return f'http://{self.host}:{self.port}'
+
+    def _make_server(self):
+        return ThreadingHTTPServer((self.host, self.port), _TelegramHandler)
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        stub = self.server.stub
+        envelope = {'from': None, 'to': [], 'data': None}
+        self._send('220 stub ESMTP')
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode('utf-8', 'replace').strip()
+            verb = command[:4].upper()
+            if verb in ('HELO', 'EHLO'):
+                self._send('250 stub')
+            elif verb == 'MAIL':
+                envelope = {'from': command[10:].strip(), 'to': [], 'data': None}
+                self._send('250 OK')
+            elif verb == 'RCPT':
+                envelope['to'].append(command[8:].strip())
+                self._send('250 OK')
+            elif verb == 'DATA':
+                self._send('354 End data with <CR><LF>.<CR><LF>')
+                lines = []
+                while True:
+                    chunk = self.rfile.readline()
+                    if not chunk or chunk in (b'.\r\n', b'.\n'):
+                        break
+                    lines.append(chunk[1:] if chunk.startswith(b'..') else chunk)
+                if stub._should_fail():
+                    self._send('451 Temporary failure')
+                    continue
+                envelope['data'] = b''.join(lines).decode('utf-8', 'replace')
+                stub.messages.append(envelope)
+                self._send('250 OK')
+            elif verb in ('RSET', 'NOOP'):
+                self._send('250 OK')
+            elif verb == 'QUIT':
+                self._send('221 Bye')
+                return
+            else:
+                self._send('502 Command not implemented')
+
+    def _send(self, line):
+        self.wfile.write(line.encode() + b'\r\n')
+
+
+class _ThreadingTCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class FakeSMTPServer(_StubServer):
+    """Принимает письма без TLS и авторизации, конверты — в .messages."""
+
+    def _make_server(self):
+        return _ThreadingTCPServer((self.host, self.port), _SMTPHandler)
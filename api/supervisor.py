@@ -0,0 +1,69 @@
+"""
+Фоновый процесс рядом с веб-сервером (см. gunicorn.conf.py).
+
+Supervisor запускает команду и перезапускает её, если она завершилась:
+сразу после запуска упала снова — пауза перед следующей попыткой удваивается
+до max_delay, проработала дольше healthy секунд — пауза сбрасывается.
+"""
+import subprocess
+import sys
+import threading
+import time
+
+
+class Supervisor:
+    def __init__(self, args, restart_delay=1.0, max_delay=60.0, healthy=60.0, log=None):
+        self.args = list(args)
+        self.restart_delay = restart_delay
+        self.max_delay = max_delay
+        self.healthy = healthy
+        self.log = log or (lambda text: print(text, file=sys.stderr))
+        self.process = None
+        self.starts = 0
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='supervisor', daemon=True)
+        self._thread.start()
+        return self
+
+    def _spawn(self):
+        with self._lock:
+            if self._stopping.is_set():
+                return None
+            self.process = subprocess.Popen(self.args)
+            self.starts += 1
+            return self.process
+
+    def _run(self):
+        delay = self.restart_delay
+        while True:
+            started = time.monotonic()
+            process = self._spawn()
+            if process is None:
+                return
+            code = process.wait()
+            if self._stopping.is_set():
+                return
+            delay = self.restart_delay if time.monotonic() - started >= self.healthy else delay
+            self.log(f'{" ".join(self.args)}: завершился с кодом {code}, перезапуск через {delay:g} с')
+            if self._stopping.wait(delay):
+                return
+            delay = min(delay * 2, self.max_delay)
+
+    def stop(self, timeout=10):
+        """Остановить процесс (SIGTERM, через timeout — SIGKILL) и больше не перезапускать."""
+        with self._lock:
+            self._stopping.set()
+            process = self.process
+        if process and process.poll() is None:
+            process.terminate()
+            try:
+                process.wait(timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+        if self._thread:
+            self._thread.join(timeout)
@@ -0,0 +1,138 @@
+"""
+Вход через Telegram Login Widget и сессионный токен.
+
+telegram_auth проверяет подпись виджета и выдаёт токен, подписанный
+SECRET_KEY (django.core.signing): pk, telegram_id, имя, username и время
+выдачи. Дальше запросы проверяют токен в памяти, без обращения к БД.
+
+Повторный вход с тем же профилем ничего не пишет: время входа копится в
+памяти и сбрасывается одним bulk_update (api/buffers.py) — по количеству,
+по таймеру или при остановке процесса.
+"""
+import atexit
+import hashlib
+import hmac
+from collections import namedtuple
+from datetime import datetime, timezone as dt_timezone
+from functools import lru_cache
+
+from django.conf import settings
+from django.core import signing
+from django.utils import timezone
+
+from .buffers import FlushBuffer
+from .models import TelegramUser
+
+
+SALT = 'api.telegram.session'
+
+Session = namedtuple('Session', 'pk telegram_id name username')
+
+
+class InvalidSession(Exception):
+    """Токен передан, но подделан, испорчен или истёк."""
+
+
+@lru_cache(maxsize=4)
+def _widget_secret(bot_token):
+    return hashlib.sha256(bot_token.encode()).digest()
+
+
+def check_widget(data, received_hash):
+    """Подпись данных виджета: HMAC-SHA256 по sha256(токена бота)."""
+    check_string = '\n'.join(f'{k}={v}' for k, v in sorted(data.items()))
+    expected = hmac.new(_widget_secret(settings.TELEGRAM_BOT_TOKEN), check_string.encode(), hashlib.sha256)
+    return hmac.compare_digest(expected.hexdigest(), received_hash)
+
+
+def issue_token(tg_user):
+    return signing.dumps(
+        [tg_user.pk, tg_user.telegram_id, tg_user.full_name, tg_user.username],
+        salt=SALT, compress=True,
+    )
+
+
+def read_token(token):
+    """Session; InvalidSession, если токен подделан или истёк."""
+    try:
+        pk, telegram_id, name, username = signing.loads(
+            token, salt=SALT, max_age=getattr(settings, 'TELEGRAM_SESSION_TTL', 7 * 86400),
+        )
+    except (signing.BadSignature, TypeError, ValueError):
+        raise InvalidSession
+    return Session(pk, telegram_id, name, username)
+
+
+def session_from_request(request):
+    """
+    Токен из заголовка Authorization: Bearer <token> или поля telegram_token.
+    None — токена нет; плохой токен — InvalidSession, а не анонимный доступ.
+    """
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    if header.startswith('Bearer '):
+        token = header[7:].strip()
+    else:
+        token = request.data.get('telegram_token')
+    if not token:
+        return None
+    return read_token(token)
+
+
+def user_from_session(session):
+    """Несохранённый TelegramUser с pk — для FK и текста уведомления без запроса в БД."""
+    return TelegramUser(pk=session.pk, telegram_id=session.telegram_id,
+                        first_name=session.name, username=session.username)
+
+
+PROFILE_FIELDS = ('first_name', 'last_name', 'username', 'photo_url')
+
+
+class LoginBuffer(FlushBuffer):
+    """Время входов {pk: (last_login_at, auth_date)} до пачечной записи."""
+
+    def __init__(self, max_logins=None, interval=None):
+        super().__init__(
+            max_logins or getattr(settings, 'TELEGRAM_LOGIN_FLUSH_SIZE', 50),
+            interval or getattr(settings, 'TELEGRAM_LOGIN_FLUSH_INTERVAL', 60),
+        )
+
+    def add(self, pk, last_login_at, auth_date):
+        with self._lock:
+            self._pending[pk] = (last_login_at, auth_date)
+        self.added()
+
+    def write(self, pending):
+        # при ошибке буфер вернёт входы, более свежие из них не затирая
+        TelegramUser.objects.bulk_update([
+            TelegramUser(pk=pk, last_login_at=last_login_at, auth_date=auth_date)
+            for pk, (last_login_at, auth_date) in pending.items()
+        ], ['last_login_at', 'auth_date'])
+
+
+logins = LoginBuffer()
+atexit.register(logins.flush)
+
+
+def login(data):
+    """
+    Создаёт или обновляет TelegramUser по проверенным данным виджета.
+    Профиль пишется, только если изменился; время входа — через буфер.
+    """
+    telegram_id = int(data['id'])
+    profile = {field: data.get(field, '') for field in PROFILE_FIELDS}
+    auth_date = datetime.fromtimestamp(int(data['auth_date']), tz=dt_timezone.utc)
+
+    tg_user = TelegramUser.objects.filter(telegram_id=telegram_id).first()
+    if tg_user is None:
+        tg_user, _ = TelegramUser.objects.get_or_create(
+            telegram_id=telegram_id,
+            defaults=dict(profile, auth_date=auth_date, last_login_at=timezone.now()),
+        )
+    changed = [field for field, value in profile.items() if getattr(tg_user, field) != value]
+    if changed:
+        for field in changed:
+            setattr(tg_user, field, profile[field])
+        tg_user.save(update_fields=changed)
+
+    logins.add(tg_user.pk, timezone.now(), auth_date)
+    return tg_user
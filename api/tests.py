@@ -0,0 +1,1317 @@
+import gzip
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from importlib import import_module
+from io import StringIO
+from unittest import mock
+
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.management import call_command
+from django.db import DatabaseError, IntegrityError, connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.db.models import QuerySet
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from django.utils.http import http_date
+from PIL import Image
+from rest_framework.renderers import JSONRenderer
+
+from . import (assets, cachestats, caching, compression, db, dedup, fastjson, files, images, notifications,
+               pageviews, pagination, ratelimit, search, storage, telegram)
+from .hll import HyperLogLog
+from .middleware import MediaFilesMiddleware
+from .models import (ContactMessage, Notification, PageView, PageViewRollup, Project, Skill,
+                     TelegramUser, WorkExperience)
+from .ratelimit import SlidingWindowCounter, TokenBucket
+from .routers import ReadReplicaRouter
+from .serializers import ProjectSerializer, SkillSerializer, WorkExperienceSerializer
+from .storage import HashedMediaStorage
+from .stubs import FakeSMTPServer, FakeTelegramServer
+from .supervisor import Supervisor
+
+
+class HyperLogLogTests(SimpleTestCase):
+
+    def assertClose(self, estimate, expected, tolerance):
+        self.assertLessEqual(abs(estimate - expected) / expected, tolerance, f'{estimate} vs {expected}')
+
+    def test_accuracy(self):
+        # стандартная ошибка ~2.3%; на этих наборах ошибка заметно меньше
+        for n in (1000, 100000):
+            with self.subTest(n=n):
+                self.assertClose(HyperLogLog.from_values(f'10.{i}' for i in range(n)).count(), n, 0.03)
+
+    def test_empty_and_small(self):
+        self.assertEqual(HyperLogLog().count(), 0)
+        self.assertEqual(HyperLogLog.from_values(['a', 'b', 'a']).count(), 2)
+
+    def test_merge_equals_union(self):
+        a = HyperLogLog.from_values(range(0, 6000))
+        b = HyperLogLog.from_values(range(4000, 10000))
+        union = HyperLogLog.from_values(range(0, 10000))
+        merged = HyperLogLog(bytes(a)).update(b)
+        self.assertEqual(bytes(merged), bytes(union))
+        self.assertClose(merged.count(), 10000, 0.03)
+
+    def test_round_trip_through_bytes(self):
+        sketch = HyperLogLog.from_values(range(500))
+        self.assertEqual(HyperLogLog(bytes(sketch)).count(), sketch.count())
+        with self.assertRaises(ValueError):
+            HyperLogLog(b'short')
+
+
+class ContactDedupTests(SimpleTestCase):
+    LONG = ('Здравствуйте! Ищем backend-разработчика на Django в команду интернет-магазина, '
+            'удалённо, полный день. Интересно обсудить?')
+
+    def setUp(self):
+        self.recent = dedup.RecentMessages(size=100, ttl=3600, threshold=0.8)
+
+    def test_exact_duplicate_from_same_sender(self):
+        self.recent.add(dedup.fingerprint('Hi, are you available for work?', 'a@example.com'))
+        self.assertTrue(self.recent.seen(dedup.fingerprint('hi,  ARE you available for work', 'A@example.com')))
+
+    def test_short_text_from_different_sender(self):
+        self.recent.add(dedup.fingerprint('Hi, are you available for work?', 'a@example.com'))
+        self.assertFalse(self.recent.seen(dedup.fingerprint('Hi, are you available for work?', 'b@example.com')))
+        self.assertFalse(self.recent.seen(dedup.fingerprint('Hi, are you available for a job?', 'a@example.com')))
+
+    def test_near_duplicate_of_long_text(self):
+        self.recent.add(dedup.fingerprint(self.LONG, 'bot1@example.com'))
+        variant = self.LONG.replace('Здравствуйте', 'Добрый день').replace('Django', 'Djangо')
+        self.assertTrue(self.recent.seen(dedup.fingerprint(variant, 'bot2@example.com')))
+
+    def test_different_long_text(self):
+        self.recent.add(dedup.fingerprint(self.LONG, 'a@example.com'))
+        other = 'Добрый вечер, хочу заказать Telegram-бота для записи клиентов в салон, сколько это будет стоить?'
+        self.assertFalse(self.recent.seen(dedup.fingerprint(other, 'b@example.com')))
+
+
+class PageViewRecordTests(TestCase):
+
+    def test_hits_without_ips_create_rows(self):
+        pageviews.record(date(2020, 1, 1), 3, ())
+        self.assertEqual(PageView.objects.get(date=date(2020, 1, 1)).count, 3)
+        self.assertEqual(PageViewRollup.objects.get(period='all').count, 3)
+
+    def test_ips_merge_into_existing_row(self):
+        pageviews.record(date(2020, 1, 1), 2, ())
+        pageviews.record(date(2020, 1, 1), 2, {'10.0.0.1', '10.0.0.2'})
+        row = PageView.objects.get(date=date(2020, 1, 1))
+        self.assertEqual(row.count, 4)
+        self.assertEqual(HyperLogLog(row.visitors).count(), 2)
+
+
+class PageViewBufferTests(TestCase):
+
+    def setUp(self):
+        self.buffer = pageviews.PageViewBuffer(max_hits=3, interval=3600)
+        self.addCleanup(self.buffer.stop)
+
+    def test_flushes_at_max_hits(self):
+        day = date(2026, 5, 1)
+        self.buffer.add(day, '10.0.0.1')
+        self.buffer.add(day, '10.0.0.1')
+        self.assertFalse(PageView.objects.exists())
+        self.buffer.add(day, '10.0.0.2')
+        row = PageView.objects.get()
+        self.assertEqual((row.date, row.count, row.unique_count), (day, 3, 2))
+        self.assertEqual(self.buffer._pending, {})
+
+    def test_failed_day_is_requeued(self):
+        good, bad = date(2026, 5, 1), date(2026, 5, 2)
+        self.buffer.add(good, '10.0.0.1')
+        self.buffer.add(bad, '10.0.0.2')
+        real_record = pageviews.record
+
+        def record(day, count, ips):
+            if day == bad:
+                raise DatabaseError('database is locked')
+            real_record(day, count, ips)
+        with mock.patch.object(pageviews, 'record', side_effect=record):
+            self.buffer.flush()
+        self.assertEqual(self.buffer._pending, {bad: [1, {'10.0.0.2'}]})
+        self.buffer.add(bad, '10.0.0.3')
+        self.buffer.flush()
+        self.assertEqual(dict(PageView.objects.values_list('date', 'count')), {good: 1, bad: 2})
+        self.assertEqual(PageView.objects.get(date=bad).unique_count, 2)
+
+    def test_row_created_by_another_worker(self):
+        day = date(2026, 5, 1)
+        PageView.objects.create(date=day, count=5)
+        real_update, calls = QuerySet.update, []
+
+        def update(queryset, **kwargs):
+            # другой воркер вставил строку между нашим UPDATE и INSERT
+            calls.append(kwargs)
+            return 0 if len(calls) == 1 else real_update(queryset, **kwargs)
+        with mock.patch.object(QuerySet, 'update', autospec=True, side_effect=update):
+            pageviews.record(day, 1, {'10.0.0.1'})
+        row = PageView.objects.get(date=day)
+        self.assertEqual((row.count, row.unique_count), (6, 1))
+
+
+class PageViewUniqueDateMigrationTests(TransactionTestCase):
+
+    def migrate(self, target):
+        executor = MigrationExecutor(connection)
+        executor.migrate(target)
+        return executor.loader.project_state(target).apps
+
+    def test_duplicate_days_are_merged(self):
+        before = [('api', '0012_project_partial_page_indexes')]
+        self.addCleanup(lambda: self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes()))
+        OldPageView = self.migrate(before).get_model('api', 'PageView')
+        day = date(2026, 5, 1)
+        OldPageView.objects.create(date=day, count=3, visitors=bytes(HyperLogLog.from_values(['a', 'b'])))
+        OldPageView.objects.create(date=day, count=4, visitors=bytes(HyperLogLog.from_values(['b', 'c'])))
+        OldPageView.objects.create(date=date(2026, 5, 2), count=1)
+
+        PageViewModel = self.migrate([('api', '0013_pageview_unique_date')]).get_model('api', 'PageView')
+        row = PageViewModel.objects.get(date=day)
+        self.assertEqual(row.count, 7)
+        self.assertEqual(HyperLogLog(row.visitors).count(), 3)
+        self.assertEqual(PageViewModel.objects.count(), 2)
+        with self.assertRaises(IntegrityError):
+            PageViewModel.objects.create(date=day)
+
+
+class PageViewSeriesTests(TestCase):
+
+    def test_bucket_count(self):
+        self.assertEqual(pageviews.bucket_count(date(2024, 1, 31), date(2024, 3, 1), 'day'), 31)
+        self.assertEqual(pageviews.bucket_count(date(2024, 1, 7), date(2024, 1, 8), 'week'), 2)
+        self.assertEqual(pageviews.bucket_count(date(2024, 1, 31), date(2024, 3, 1), 'month'), 3)
+        self.assertEqual(pageviews.bucket_count(date(2023, 12, 1), date(2024, 1, 1), 'month'), 2)
+
+    def test_end_of_calendar(self):
+        for query in ('granularity=day&from=9999-12-31&to=9999-12-31',
+                      'granularity=week&from=9999-12-01&to=9999-12-31',
+                      'granularity=month&from=9999-11-01&to=9999-12-31'):
+            with self.subTest(query=query):
+                response = self.client.get(f'/api/stats/series/?{query}')
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json()['to'], '9999-12-31')
+
+    def test_start_of_calendar(self):
+        response = self.client.get('/api/stats/series/?to=0001-01-05')
+        self.assertEqual(response.status_code, 400)
+
+    def test_month_range_limit(self):
+        with self.settings(STATS_SERIES_MAX_BUCKETS=12):
+            ok = self.client.get('/api/stats/series/?granularity=month&from=2024-01-01&to=2024-12-31')
+            too_many = self.client.get('/api/stats/series/?granularity=month&from=2024-01-01&to=2025-01-01')
+        self.assertEqual(ok.status_code, 200)
+        self.assertEqual(too_many.status_code, 400)
+
+
+class CompressionTests(SimpleTestCase):
+
+    def test_variants_round_trip_with_fast_brotli(self):
+        body = ('{"title": "Проект", "stack": ["python", "django"]}, ' * 50).encode()
+        with mock.patch.object(compression.brotli, 'compress', wraps=compression.brotli.compress) as compress:
+            found = compression.variants(body)
+        compress.assert_called_once_with(body, quality=compression.DYNAMIC_QUALITY)
+        self.assertEqual(compression.brotli.decompress(found['br']), body)
+        self.assertEqual(gzip.decompress(found['gzip']), body)
+        self.assertEqual(compression.variants(b'{}'), {})
+
+    def test_choose(self):
+        found = {'br': b'', 'gzip': b''}
+        for header, coding in (('br, gzip', 'br'), ('gzip', 'gzip'), ('br;q=0, gzip', 'gzip'), ('*', 'br'),
+                               ('identity', None), ('', None)):
+            with self.subTest(header=header):
+                request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=header)
+                self.assertEqual(compression.choose(request, found), coding)
+
+
+class FastJsonTests(TestCase):
+    """fastjson должен совпадать с DRF-сериализаторами побайтно."""
+
+    def assertSameJson(self, serializer_data, rows):
+        self.assertEqual(JSONRenderer().render(serializer_data), fastjson.to_json(rows))
+
+    def test_skills(self):
+        Skill.objects.create(name='Python', icon='🐍', percent=90, category='backend', order=1)
+        Skill.objects.create(name='SQL "quoted"', icon='', percent=0, category='tools', order=2)
+        qs = Skill.objects.all()
+        self.assertSameJson(SkillSerializer(qs, many=True).data, fastjson.skill_rows(qs))
+
+    def test_projects(self):
+        Project.objects.create(title='Проект', slug='proekt', description='Описание\nс переносом',
+                               stack=['Python', 'Django'], status='done', github_url='https://github.com/x/y',
+                               is_featured=True, order=1)
+        Project.objects.create(title='Без ссылок', slug='bez-ssylok', description='', stack=[], status='planned')
+        qs = Project.objects.all()
+        self.assertSameJson(ProjectSerializer(qs, many=True).data, fastjson.project_rows(qs))
+
+    def test_experience(self):
+        WorkExperience.objects.create(company='Компания', role='Backend', period='2024 — н.в.',
+                                      description='Описание', logo='company_logos/logo.png', order=1)
+        WorkExperience.objects.create(company='Без логотипа', role='Intern', period='2023', order=2)
+        qs = WorkExperience.objects.all()
+        for request in (None, RequestFactory().get('/')):
+            with self.subTest(request=request):
+                context = {'request': request} if request else {}
+                self.assertSameJson(WorkExperienceSerializer(qs, many=True, context=context).data,
+                                    fastjson.experience_rows(qs, request))
+
+
+@override_settings(TELEGRAM_BOT_TOKEN='token', TELEGRAM_CHAT_ID='1', EMAIL_HOST_USER='')
+class NotificationDeliveryTests(TestCase):
+
+    def setUp(self):
+        msg = ContactMessage.objects.create(name='Аня', subject='Тема', message='Текст сообщения')
+        self.item, = notifications.enqueue(msg)
+
+    def deliver(self, status_code, body):
+        response = mock.Mock(status_code=status_code, text=str(body))
+        response.json.return_value = body
+        with mock.patch.object(notifications.session(), 'post', return_value=response):
+            notifications.deliver(self.item)
+        self.item.refresh_from_db()
+
+    def test_client_error_is_dead_at_once(self):
+        self.deliver(403, {'ok': False, 'description': 'Forbidden: bot was blocked by the user'})
+        self.assertEqual((self.item.status, self.item.attempts), ('dead', 1))
+
+    def test_server_error_is_retried(self):
+        self.deliver(502, {})
+        self.assertEqual(self.item.status, 'pending')
+        self.assertGreater(self.item.next_attempt_at, timezone.now())
+
+    def test_too_many_requests_honours_retry_after(self):
+        self.deliver(429, {'ok': False, 'parameters': {'retry_after': 600}})
+        self.assertEqual(self.item.status, 'pending')
+        self.assertGreater(self.item.next_attempt_at, timezone.now() + timedelta(seconds=590))
+
+    def test_digest_escapes_markup(self):
+        msg = ContactMessage.objects.create(name='a_b', subject='*x', message='<b> `code')
+        notifications.enqueue(msg)
+        (items, payload), = notifications.digest_chunks(Notification.objects.all())
+        self.assertEqual(len(items), 2)
+        self.assertEqual(payload['parse_mode'], 'HTML')
+        self.assertIn('&lt;b&gt; `code', payload['text'])
+
+
+@override_settings(TELEGRAM_BOT_TOKEN='token', TELEGRAM_CHAT_ID='42', EMAIL_HOST_USER='site@example.com',
+                   CONTACT_EMAIL='me@example.com', NOTIFY_DIGEST_WINDOW=0)
+class NotificationOutboxTests(TestCase):
+
+    def setUp(self):
+        self.telegram = FakeTelegramServer().start()
+        self.smtp = FakeSMTPServer().start()
+        self.addCleanup(self.telegram.stop)
+        self.addCleanup(self.smtp.stop)
+        patcher = override_settings(
+            TELEGRAM_API_URL=self.telegram.url,
+            EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+            EMAIL_HOST=self.smtp.host, EMAIL_PORT=self.smtp.port, EMAIL_USE_TLS=False, EMAIL_HOST_PASSWORD='',
+        )
+        patcher.enable()
+        self.addCleanup(patcher.disable)
+
+    def post(self, ip, text):
+        data = {'name': 'Аня', 'email': 'anya@example.com', 'subject': 'Hello', 'message': text}
+        return self.client.post('/api/contact/', data, content_type='application/json', REMOTE_ADDR=ip)
+
+    def enqueue(self, channel):
+        msg = ContactMessage.objects.create(name='Аня', email='anya@example.com', subject='Hello', message='Текст')
+        return next(item for item in notifications.enqueue(msg) if item.channel == channel)
+
+    def retry_now(self, item):
+        Notification.objects.filter(pk=item.pk).update(next_attempt_at=timezone.now())
+
+    def test_contact_post_writes_message_and_outbox_together(self):
+        self.assertEqual(self.post('10.7.0.1', 'Первое письмо').status_code, 201)
+        msg = ContactMessage.objects.get()
+        self.assertEqual(sorted(msg.notifications.values_list('channel', flat=True)), ['email', 'telegram'])
+
+        with mock.patch.object(notifications, 'enqueue', side_effect=DatabaseError('disk I/O error')):
+            with self.assertRaises(DatabaseError):
+                self.post('10.7.0.2', 'Второе письмо, которое не сохранится')
+        self.assertEqual(ContactMessage.objects.count(), 1)
+        self.assertEqual(Notification.objects.count(), 2)
+
+    def test_delivers_telegram_and_email(self):
+        self.enqueue('telegram')
+        self.assertEqual(notifications.deliver_batch(), (2, 0))
+        self.assertEqual(Notification.objects.filter(status='sent').count(), 2)
+        data, = self.telegram.messages
+        self.assertEqual((data['chat_id'], data['parse_mode']), ('42', 'HTML'))
+        self.assertIn('Текст', data['text'])
+        envelope, = self.smtp.messages
+        self.assertEqual(envelope['to'], ['<me@example.com>'])
+        self.assertIn('Subject: [Portfolio] Hello', envelope['data'])
+        self.assertEqual(notifications.deliver_batch(), (0, 0))
+
+    def test_failure_is_retried(self):
+        for channel, server in (('telegram', self.telegram), ('email', self.smtp)):
+            with self.subTest(channel=channel):
+                item = self.enqueue(channel)
+                Notification.objects.exclude(pk=item.pk).delete()
+                server.fail_rate = 1.0
+                self.assertEqual(notifications.deliver_batch(), (0, 1))
+                item.refresh_from_db()
+                self.assertEqual((item.status, item.attempts), ('pending', 1))
+                self.assertGreater(item.next_attempt_at, timezone.now())
+                self.assertEqual(notifications.deliver_batch(), (0, 0))
+
+                server.fail_rate = 0.0
+                self.retry_now(item)
+                self.assertEqual(notifications.deliver_batch(), (1, 0))
+                item.refresh_from_db()
+                self.assertEqual((item.status, item.attempts, item.last_error), ('sent', 2, ''))
+
+    @override_settings(NOTIFY_MAX_ATTEMPTS=3)
+    def test_dead_after_max_attempts(self):
+        item = self.enqueue('email')
+        Notification.objects.exclude(pk=item.pk).delete()
+        self.smtp.fail_rate = 1.0
+        for _ in range(3):
+            self.retry_now(item)
+            notifications.deliver_batch()
+        item.refresh_from_db()
+        self.assertEqual((item.status, item.attempts), ('dead', 3))
+        self.assertIn('451', item.last_error)
+        self.retry_now(item)
+        self.assertEqual(notifications.deliver_batch(), (0, 0))
+        self.assertEqual(self.smtp.messages, [])
+
+
+@override_settings(TELEGRAM_BOT_TOKEN='token', TELEGRAM_CHAT_ID='42', EMAIL_HOST_USER='',
+                   NOTIFY_DIGEST_WINDOW=60, NOTIFY_DIGEST_MAX_MESSAGES=20, NOTIFY_DIGEST_MAX_CHARS=4000)
+class NotificationDigestTests(TestCase):
+
+    def setUp(self):
+        self.telegram = FakeTelegramServer().start()
+        self.addCleanup(self.telegram.stop)
+        patcher = override_settings(TELEGRAM_API_URL=self.telegram.url)
+        patcher.enable()
+        self.addCleanup(patcher.disable)
+
+    def enqueue(self, *texts):
+        for text in texts:
+            msg = ContactMessage.objects.create(name='Аня', subject='Hello', message=text)
+            notifications.enqueue(msg)
+
+    def window_passed(self):
+        Notification.objects.update(created_at=timezone.now() - timedelta(seconds=61))
+
+    def test_one_message_per_window(self):
+        self.enqueue('Первое', 'Второе', 'Третье')
+        self.assertEqual(notifications.deliver_batch(), (0, 0))
+        self.assertEqual(self.telegram.messages, [])
+
+        self.window_passed()
+        self.assertEqual(notifications.deliver_batch(), (3, 0))
+        data, = self.telegram.messages
+        self.assertEqual(data['parse_mode'], 'HTML')
+        self.assertIn('Новых сообщений с портфолио: 3', data['text'])
+        for text in ('Первое', 'Второе', 'Третье'):
+            self.assertIn(text, data['text'])
+        self.assertEqual(Notification.objects.filter(status='sent').count(), 3)
+        self.assertEqual(notifications.deliver_batch(), (0, 0))
+
+    @override_settings(NOTIFY_DIGEST_MAX_MESSAGES=2)
+    def test_full_digest_goes_before_window(self):
+        self.enqueue('Первое', 'Второе', 'Третье', 'Четвёртое', 'Пятое')
+        self.assertEqual(notifications.deliver_batch(), (5, 0))
+        self.assertEqual([m['text'].count('— — —') for m in self.telegram.messages], [1, 1, 0])
+
+    @override_settings(NOTIFY_DIGEST_MAX_CHARS=1000)
+    def test_split_at_char_limit(self):
+        self.enqueue(*(f'{n} ' + 'я' * 300 for n in range(6)))
+        self.window_passed()
+        self.assertEqual(notifications.deliver_batch(), (6, 0))
+        self.assertGreater(len(self.telegram.messages), 1)
+        for data in self.telegram.messages:
+            self.assertLessEqual(len(data['text']), 1000)
+        text = ''.join(data['text'] for data in self.telegram.messages)
+        self.assertEqual([text.count(f'{n} я') for n in range(6)], [1] * 6)
+
+    def test_rejected_digest_falls_back_to_single_messages(self):
+        self.enqueue('Первое', 'Битое', 'Третье')
+        self.window_passed()
+        self.telegram.reject = lambda data: 'Битое' in data['text']
+        self.assertEqual(notifications.deliver_batch(), (2, 1))
+        self.assertEqual(len(self.telegram.messages), 2)
+        for data in self.telegram.messages:
+            self.assertNotIn('Новых сообщений', data['text'])
+        dead = Notification.objects.get(status='dead')
+        self.assertIn('Битое', dead.payload['text'])
+        self.assertIn('400', dead.last_error)
+        self.assertEqual(Notification.objects.filter(status='sent').count(), 2)
+
+    def test_digest_is_retried_whole_on_server_error(self):
+        self.enqueue('Первое', 'Второе')
+        self.window_passed()
+        self.telegram.fail_rate = 1.0
+        self.assertEqual(notifications.deliver_batch(), (0, 2))
+        self.assertEqual(Notification.objects.filter(status='pending', attempts=1).count(), 2)
+
+
+class SupervisorTests(SimpleTestCase):
+
+    def wait_for(self, condition, timeout=10):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+
+    def test_restarts_exited_process(self):
+        supervisor = Supervisor([sys.executable, '-c', 'pass'], restart_delay=0.01, log=lambda text: None).start()
+        self.addCleanup(supervisor.stop)
+        self.wait_for(lambda: supervisor.starts >= 3)
+
+    def test_stop_terminates_and_does_not_restart(self):
+        supervisor = Supervisor([sys.executable, '-c', 'import time; time.sleep(60)'], restart_delay=0.01).start()
+        self.wait_for(lambda: supervisor.process is not None)
+        supervisor.stop()
+        self.assertIsNotNone(supervisor.process.returncode)
+        time.sleep(0.05)
+        self.assertEqual(supervisor.starts, 1)
+
+
+@override_settings(TELEGRAM_BOT_TOKEN='', EMAIL_HOST_USER='')
+class ContactSessionTests(TestCase):
+
+    def send(self, text, ip='10.9.9.1', **headers):
+        data = {'name': 'Аня', 'subject': 'Тема', 'message': text}
+        return self.client.post('/api/contact/', data, content_type='application/json',
+                                REMOTE_ADDR=ip, **headers)
+
+    def test_without_token_is_anonymous(self):
+        response = self.send('Сообщение без токена', ip='10.9.9.2')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(ContactMessage.objects.get().source, 'site')
+
+    def test_valid_token(self):
+        user = TelegramUser.objects.create(telegram_id=42, first_name='Аня')
+        response = self.send('Сообщение с токеном', ip='10.9.9.3', HTTP_AUTHORIZATION=f'Bearer {telegram.issue_token(user)}')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(ContactMessage.objects.get().telegram_user_id, user.pk)
+
+    def test_bad_token_is_rejected(self):
+        user = TelegramUser(pk=1, telegram_id=42, first_name='Аня')
+        for token in ('garbage', telegram.issue_token(user)[:-2] + 'xx'):
+            with self.subTest(token=token):
+                response = self.send('Сообщение с плохим токеном', ip='10.9.9.4', HTTP_AUTHORIZATION=f'Bearer {token}')
+                self.assertEqual(response.status_code, 401)
+        self.assertFalse(ContactMessage.objects.exists())
+
+
+class RateLimitTests(SimpleTestCase):
+
+    def test_token_bucket(self):
+        bucket = TokenBucket(limit=2, window=10)
+        state, allowed = bucket.apply(None, 100, 1, True)
+        state, allowed = bucket.apply(state, 100, 1, True)
+        self.assertTrue(allowed)
+        state, allowed = bucket.apply(state, 100, 1, True)
+        self.assertFalse(allowed)
+        # пополнение 0.2 токена в секунду
+        self.assertFalse(bucket.apply(state, 104, 1, True)[1])
+        self.assertTrue(bucket.apply(state, 105, 1, True)[1])
+        state, _ = bucket.refund(state, 100, 1)
+        self.assertTrue(bucket.apply(state, 100, 1, True)[1])
+        self.assertEqual(bucket.refund(None, 100, 1)[0], (2.0, 100))
+
+    def test_token_bucket_check_without_consume(self):
+        bucket = TokenBucket(limit=1, window=10)
+        state, allowed = bucket.apply(None, 100, 1, False)
+        self.assertTrue(allowed)
+        self.assertTrue(bucket.apply(state, 100, 1, True)[1])
+
+    def test_sliding_window(self):
+        window = SlidingWindowCounter(limit=3, window=100)
+        state = None
+        for _ in range(3):
+            state, allowed = window.apply(state, 150, 1, True)
+            self.assertTrue(allowed)
+        self.assertFalse(window.apply(state, 199, 1, True)[1])
+        # в следующем окне прошлое весит 1 - 50/100: 3 * 0.5 + 1 <= 3
+        self.assertTrue(window.apply(state, 250, 1, True)[1])
+        self.assertFalse(window.apply(state, 210, 1, True)[1])
+        # через окно прошлое забыто
+        self.assertEqual(window.apply(state, 400, 1, True)[0], (400, 1, 0))
+
+    def test_sliding_window_refund(self):
+        window = SlidingWindowCounter(limit=1, window=100)
+        state, _ = window.apply(None, 150, 1, True)
+        self.assertFalse(window.apply(state, 150, 1, True)[1])
+        self.assertEqual(window.refund(state, 150, 1)[0], (100, 0, 0))
+        # списали в прошлом окне, вернули уже в следующем
+        self.assertEqual(window.refund(state, 210, 1)[0], (200, 0, 0))
+        self.assertEqual(window.refund(None, 150, 1)[0], (100, 0, 0))
+
+    def test_sqlite_backend(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'ratelimit.sqlite3')
+            limiter = ratelimit.RateLimiter('test', SlidingWindowCounter(2, 600), ratelimit.SQLiteBackend(path))
+            self.assertTrue(limiter.allow('ip'))
+            self.assertTrue(limiter.allow('ip'))
+            self.assertFalse(limiter.allow('ip'))
+            self.assertTrue(limiter.allow('other'))
+            # другой процесс видит то же состояние
+            other = ratelimit.RateLimiter('test', SlidingWindowCounter(2, 600), ratelimit.SQLiteBackend(path))
+            self.assertFalse(other.allow('ip'))
+            other.refund('ip')
+            self.assertTrue(limiter.allow('ip'))
+            self.assertFalse(limiter.allow('ip'))
+
+    def test_sqlite_backend_rolls_back_on_error(self):
+        with tempfile.TemporaryDirectory() as directory:
+            backend = ratelimit.SQLiteBackend(os.path.join(directory, 'ratelimit.sqlite3'))
+            backend.update('key', lambda state: ((1, 2, 3), True), 60)
+
+            def fail(state):
+                raise RuntimeError
+            with self.assertRaises(RuntimeError):
+                backend.update('key', fail, 60)
+            self.assertEqual(backend.update('key', lambda state: (state, state), 60), (1, 2, 3))
+
+
+class ContactRateLimitTests(TestCase):
+
+    def send(self, message, ip):
+        data = {'name': 'Аня', 'subject': 'Тема', 'message': message}
+        return self.client.post('/api/contact/', data, content_type='application/json', REMOTE_ADDR=ip)
+
+    def test_limit(self):
+        texts = ['Первое сообщение про сайт', 'Второе о работе над проектом', 'Третье про сроки и бюджет',
+                 'Четвёртое, уже лишнее']
+        statuses = [self.send(text, '10.8.0.1').status_code for text in texts]
+        self.assertEqual(statuses, [201, 201, 201, 429])
+        self.assertEqual(ContactMessage.objects.count(), 3)
+
+    def test_rejected_posts_are_refunded(self):
+        for _ in range(5):
+            self.assertEqual(self.send('', '10.8.0.2').status_code, 400)
+        self.assertEqual(self.send('Сообщение после ошибок', '10.8.0.2').status_code, 201)
+        # повтор того же текста отсеивается и лимит не тратит
+        for _ in range(3):
+            self.assertEqual(self.send('Сообщение после ошибок', '10.8.0.2').status_code, 201)
+        self.assertEqual(ContactMessage.objects.count(), 1)
+        self.assertEqual(self.send('Другое сообщение', '10.8.0.2').status_code, 201)
+
+
+class ProjectPaginationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        moment = timezone.now()
+        for i in range(13):
+            Project.objects.create(title=f'Проект {i}', description='…', order=i % 3,
+                                   status='active' if i % 2 else 'done', is_featured=i % 4 == 0)
+        Project.objects.create(title='Скрытый', description='…', is_active=False)
+        # совпадения по order и created_at: порядок решает id
+        Project.objects.filter(order=1).update(created_at=moment)
+
+    def pages(self, limit, **filters):
+        ids, url, query = [], '/api/projects/', dict(filters, limit=limit)
+        while url:
+            response = self.client.get(url, query)
+            self.assertEqual(response.status_code, 200)
+            body = response.json()
+            self.assertLessEqual(len(body['results']), limit)
+            ids.extend(row['id'] for row in body['results'])
+            url, query = body['next'], None
+        return ids
+
+    def test_pages_cover_all_rows_in_order(self):
+        combinations = [{}, {'status': 'active'}, {'status': 'done'}, {'is_featured': 'true'},
+                        {'is_featured': 'false'}, {'status': 'active', 'is_featured': 'true'},
+                        {'status': 'done', 'is_featured': 'false'}]
+        for filters in combinations:
+            expected = list(Project.objects.filter(
+                is_active=True,
+                **{k: v == 'true' if k == 'is_featured' else v for k, v in filters.items()},
+            ).order_by('order', '-created_at', '-id').values_list('id', flat=True))
+            for limit in (1, 2, 5, 100):
+                with self.subTest(filters=filters, limit=limit):
+                    self.assertEqual(self.pages(limit, **filters), expected)
+
+    def test_bad_limit(self):
+        for limit in ('0', '-1', 'abc', ''):
+            with self.subTest(limit=limit):
+                self.assertEqual(self.client.get('/api/projects/', {'limit': limit}).status_code, 400)
+
+    def test_limit_is_capped(self):
+        with self.settings(PROJECTS_MAX_PAGE_SIZE=4):
+            self.assertEqual(len(self.client.get('/api/projects/', {'limit': 50}).json()['results']), 4)
+
+    def test_bad_cursor(self):
+        for cursor in ('garbage', 'W10', pagination.encode_cursor(0, 'вчера', 1)):
+            with self.subTest(cursor=cursor):
+                self.assertEqual(self.client.get('/api/projects/', {'cursor': cursor}).status_code, 400)
+
+
+class ProjectSlugTests(TestCase):
+
+    def create(self, title):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Project.objects.create(title=title, description='…')
+
+    def test_generation(self):
+        cases = {'Мой Проект': 'moi-proekt', 'Телеграм-бот ңөү': 'telegram-bot-ngou', '2024': 'project-2024',
+                 '!!!': 'project'}
+        for title, slug in cases.items():
+            with self.subTest(title=title):
+                self.assertEqual(self.create(title).slug, slug)
+
+    def test_uniqueness_and_reserved(self):
+        slugs = [self.create(title).slug for title in ('Бот', 'Бот', 'Бот', '2024', '2024', 'Search')]
+        self.assertEqual(slugs, ['bot', 'bot-2', 'bot-3', 'project-2024', 'project-2024-2', 'search-2'])
+
+    def test_admin_rejects_unroutable_slugs(self):
+        for slug in ('123', 'search'):
+            with self.subTest(slug=slug), self.assertRaises(ValidationError) as caught:
+                Project(title='Проект', description='…', stack=['python'], slug=slug).full_clean()
+            self.assertIn('slug', caught.exception.message_dict)
+        Project(title='Проект', description='…', stack=['python'], slug='2024-review').full_clean()
+
+    def test_migration_fills_routable_slugs(self):
+        fill_slugs = import_module('api.migrations.0010_project_unique_slug').fill_slugs
+        projects = [self.create(title) for title in ('Бот', '2024', 'Сайт')]
+        Project.objects.filter(pk=projects[0].pk).update(slug='')
+        Project.objects.filter(pk=projects[1].pk).update(slug='2024')
+        Project.objects.filter(pk=projects[2].pk).update(slug='search')
+        fill_slugs(django_apps, None)
+        self.assertEqual([p.slug for p in Project.objects.order_by('pk')], ['bot', 'project-2024', 'sait'])
+
+    def test_slug_routes(self):
+        project = self.create('2024')
+        response = self.client.get(f'/api/projects/{project.slug}/')
+        self.assertEqual(response.json()['id'], project.pk)
+        self.assertEqual(self.client.get(f'/api/projects/{project.pk}/').json()['slug'], 'project-2024')
+        self.assertEqual(self.client.get('/api/projects/search/').status_code, 200)
+
+    def test_unknown_slug_needs_no_queries(self):
+        self.create('Бот')
+        self.client.get('/api/projects/bot/')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/api/projects/no-such-project/').status_code, 404)
+            self.assertEqual(self.client.get('/api/projects/bot/').status_code, 200)
+
+
+class LoginBufferTests(TestCase):
+
+    def setUp(self):
+        self.buffer = telegram.LoginBuffer(max_logins=100, interval=3600)
+        self.addCleanup(self.buffer.stop)
+        patcher = mock.patch.object(telegram, 'logins', self.buffer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def login(self, telegram_id, first_name='Аня', auth_date=1700000000):
+        return telegram.login({'id': telegram_id, 'first_name': first_name, 'auth_date': auth_date})
+
+    def test_unchanged_profile_is_not_written(self):
+        user = self.login(42)
+        with self.assertNumQueries(1):
+            self.login(42, auth_date=1700000100)
+        with self.assertNumQueries(2):
+            self.login(42, first_name='Анна')
+        user.refresh_from_db()
+        self.assertEqual(user.first_name, 'Анна')
+
+    def test_flush_is_one_bulk_update(self):
+        for telegram_id in (1, 2, 3):
+            self.login(telegram_id)
+        TelegramUser.objects.update(last_login_at=None)
+        with self.assertNumQueries(1):
+            self.buffer.flush()
+        self.assertFalse(TelegramUser.objects.filter(last_login_at=None).exists())
+        with self.assertNumQueries(0):
+            self.buffer.flush()
+
+    def test_flushes_at_max_logins(self):
+        self.buffer.max_size = 2
+        self.login(1)
+        self.assertEqual(len(self.buffer._pending), 1)
+        self.login(2)
+        self.assertEqual(self.buffer._pending, {})
+
+    def test_failed_flush_keeps_newer_logins(self):
+        user = self.login(1, auth_date=1700000000)
+        newer = datetime.fromtimestamp(1700000500, tz=dt_timezone.utc)
+
+        def fail(*args, **kwargs):
+            # вход, пришедший, пока запись падала, не должен затереться старым
+            self.buffer.add(user.pk, timezone.now(), newer)
+            raise DatabaseError
+        with mock.patch.object(TelegramUser.objects, 'bulk_update', side_effect=fail):
+            self.buffer.flush()
+        self.buffer.flush()
+        user.refresh_from_db()
+        self.assertEqual(user.auth_date.timestamp(), 1700000500)
+
+
+class FlushTimerTests(SimpleTestCase):
+
+    def test_flushes_without_new_writes(self):
+        buffers = [
+            (telegram.LoginBuffer(max_logins=100, interval=0.05), (1, timezone.now(), timezone.now())),
+            (pageviews.PageViewBuffer(max_hits=100, interval=0.05), (date(2026, 5, 1), '10.0.0.1')),
+        ]
+        for buffer, args in buffers:
+            with self.subTest(buffer=type(buffer).__name__):
+                self.addCleanup(buffer.stop)
+                written = threading.Event()
+                with mock.patch.object(buffer, 'write', side_effect=lambda pending: written.set()):
+                    buffer.add(*args)
+                    self.assertTrue(written.wait(5))
+                self.assertEqual(buffer._pending, {})
+
+
+# без collectstatic: манифеста хешированной статики в тестах нет
+@override_settings(STORAGES={
+    'default': {'BACKEND': 'api.storage.HashedMediaStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+})
+class HomeViewTests(TestCase):
+
+    def setUp(self):
+        caches['default'].clear()
+
+    def add_experience(self, company):
+        with self.captureOnCommitCallbacks(execute=True):
+            return WorkExperience.objects.create(company=company, role='Backend', period='2024', order=1)
+
+    def test_second_request_is_served_from_cache(self):
+        self.add_experience('Первая компания')
+        first = self.client.get('/')
+        self.assertEqual((first.status_code, first['X-Cache']), (200, 'MISS'))
+        self.assertContains(first, 'Первая компания')
+        with self.assertNumQueries(0), mock.patch('portfolio.urls.render_to_string') as render:
+            with override_settings(PAGEVIEW_BUFFERED=True), mock.patch.object(pageviews.buffer, 'add'):
+                second = self.client.get('/')
+        render.assert_not_called()
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second.content, first.content)
+
+    def test_content_change_rebuilds_page(self):
+        experience = self.add_experience('Первая компания')
+        self.client.get('/')
+        with self.captureOnCommitCallbacks(execute=True):
+            experience.company = 'Вторая компания'
+            experience.save()
+        response = self.client.get('/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertContains(response, 'Вторая компания')
+        self.assertNotContains(response, 'Первая компания')
+        self.assertEqual(self.client.get('/')['X-Cache'], 'HIT')
+
+    def test_page_views_counted_on_cache_hits(self):
+        for ip in ('10.8.0.1', '10.8.0.2', '10.8.0.1'):
+            self.client.get('/', REMOTE_ADDR=ip)
+        row = PageView.objects.get(date=date.today())
+        self.assertEqual(row.count, 3)
+        self.assertEqual(HyperLogLog(row.visitors).count(), 2)
+
+
+class ReadReplicaRouterTests(TransactionTestCase):
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        self.router = ReadReplicaRouter()
+
+    def test_content_reads_go_to_replica_outside_transaction(self):
+        for model in (Skill, Project, WorkExperience):
+            with self.subTest(model=model.__name__):
+                self.assertEqual(self.router.db_for_read(model), 'replica')
+                self.assertEqual(model.objects.all().db, 'replica')
+        self.assertIsNone(self.router.db_for_read(ContactMessage))
+        self.assertEqual(ContactMessage.objects.all().db, 'default')
+
+    def test_reads_stay_on_default_inside_atomic(self):
+        with transaction.atomic():
+            skill = Skill.objects.create(name='Django', category='backend')
+            self.assertEqual(self.router.db_for_read(Skill), 'default')
+            self.assertEqual(Skill.objects.get(pk=skill.pk).name, 'Django')
+        self.assertEqual(self.router.db_for_read(Skill), 'replica')
+
+    def test_writes_and_migrations_go_to_default(self):
+        self.assertEqual(self.router.db_for_write(Skill), 'default')
+        self.assertEqual(self.router.db_for_write(ContactMessage), 'default')
+        self.assertEqual(Skill.objects.create(name='Python', category='backend')._state.db, 'default')
+        self.assertTrue(self.router.allow_migrate('default', 'api', 'skill'))
+        self.assertFalse(self.router.allow_migrate('replica', 'api', 'skill'))
+
+    def pragmas_for(self, name):
+        conn = mock.MagicMock(vendor='sqlite', settings_dict={'NAME': name})
+        cursor = conn.cursor.return_value.__enter__.return_value
+        db.configure_connection(sender=None, connection=conn)
+        return [call.args[0] for call in cursor.execute.call_args_list]
+
+    def test_journal_mode_skipped_on_read_only_connection(self):
+        default = self.pragmas_for(settings.DATABASES['default']['NAME'])
+        self.assertIn('PRAGMA journal_mode=WAL', default)
+        read_only = self.pragmas_for('file:/tmp/db.sqlite3?mode=ro')
+        self.assertNotIn('PRAGMA journal_mode=WAL', read_only)
+        self.assertEqual(read_only, [p for p in default if 'journal_mode' not in p])
+        self.assertIn('PRAGMA busy_timeout=5000', read_only)
+
+    def test_read_only_connection_rejects_writes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'db.sqlite3')
+            with sqlite3.connect(path) as conn:
+                conn.execute('CREATE TABLE t (x INTEGER)')
+            conn.close()
+            ro = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+            self.addCleanup(ro.close)
+            db.apply_pragmas(ro, {'busy_timeout': 5000, 'cache_size': -20000})
+            with self.assertRaises(sqlite3.OperationalError):
+                ro.execute('PRAGMA journal_mode=WAL')
+            with self.assertRaises(sqlite3.OperationalError):
+                ro.execute('INSERT INTO t VALUES (1)')
+
+
+class CachedResponseTests(SimpleTestCase):
+
+    def setUp(self):
+        caches['default'].clear()
+        self.builds = 0
+
+    def build(self):
+        self.builds += 1
+        return 200, b'{}'
+
+    def get(self, now, max_age=None):
+        with mock.patch('api.caching.time.time', return_value=now):
+            return caching.cached_response(RequestFactory().get('/'), 'test', ['test.label'], self.build,
+                                           'application/json', max_age=max_age)
+
+    def test_max_age_rebuilds_under_the_same_key(self):
+        self.assertEqual(self.get(1000, max_age=30)['X-Cache'], 'MISS')
+        self.assertEqual(self.get(1029, max_age=30)['X-Cache'], 'HIT')
+        self.assertEqual(self.get(1031, max_age=30)['X-Cache'], 'MISS')
+        self.assertEqual(self.builds, 2)
+        keys = [key for key in caches['default']._cache if ':test:' in key]
+        self.assertEqual(len(keys), 1)
+
+    def test_without_max_age_waits_for_version(self):
+        self.get(1000)
+        self.assertEqual(self.get(3000)['X-Cache'], 'HIT')
+
+
+class CacheStatsTests(SimpleTestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        patcher = override_settings(CACHE_STATS_DB=os.path.join(directory.name, 'cache_stats.sqlite3'))
+        patcher.enable()
+        self.addCleanup(patcher.disable)
+        self.counter = self.buffer()
+        patcher = mock.patch.object(cachestats, 'counter', self.counter)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def buffer(self):
+        buffer = cachestats.CacheStatsBuffer(max_requests=1000, interval=3600)
+        self.addCleanup(buffer.stop)
+        return buffer
+
+    def test_workers_add_up(self):
+        other = self.buffer()
+        for buffer, name, hit in ((self.counter, 'projects:abc', True), (self.counter, 'projects:def', False),
+                                  (other, 'projects', True), (other, 'project:12', True)):
+            buffer.add(name, hit)
+        other.flush()
+        self.assertEqual(cachestats.read(), [('project', 1, 0), ('projects', 2, 1)])
+
+    def test_cached_response_is_counted(self):
+        caches['default'].clear()
+        for _ in range(3):
+            caching.cached_response(RequestFactory().get('/'), 'stats-test', ['test.label'],
+                                    lambda: (200, b'{}'), 'application/json')
+        self.assertEqual(self.counter._pending, {'stats-test': [2, 1]})
+
+    def test_command(self):
+        self.counter.add('bootstrap', True)
+        self.counter.add('bootstrap', False)
+        out = StringIO()
+        call_command('cache_stats', stdout=out)
+        self.assertRegex(out.getvalue(), r'bootstrap\s+1\s+1\s+50\.0%')
+        call_command('cache_stats', '--reset', stdout=StringIO())
+        self.assertEqual(cachestats.read(), [])
+
+
+class ConditionalTests(TestCase):
+
+    def get(self, **headers):
+        return self.client.get('/api/skills/', **headers)
+
+    def test_delete_moves_etag_and_last_modified(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            skill = Skill.objects.create(name='Python', percent=90, category='backend')
+        before = self.get()
+        later = int(time.time()) + 60  # правка в ту же секунду HTTP-дата не различит
+        with mock.patch('api.caching.time.time_ns', return_value=later * 10 ** 9), \
+                self.captureOnCommitCallbacks(execute=True):
+            skill.delete()
+        stale = self.get(HTTP_IF_MODIFIED_SINCE=before['Last-Modified'])
+        self.assertEqual(stale.status_code, 200)
+        self.assertNotEqual(stale['ETag'], before['ETag'])
+        self.assertEqual(stale['Last-Modified'], http_date(later))
+        self.assertEqual(self.get(HTTP_IF_MODIFIED_SINCE=stale['Last-Modified']).status_code, 304)
+
+    def test_not_modified_keeps_weak_etag_and_vary(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(20):
+                Skill.objects.create(name=f'Навык {i}', icon='🐍', percent=50, category='backend', order=i)
+        first = self.get(HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(first['Content-Encoding'], 'gzip')
+        self.assertTrue(first['ETag'].startswith('W/'))
+        cached = self.get(HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached['ETag'], first['ETag'])
+        self.assertIn('Accept-Encoding', cached['Vary'])
+        plain = self.get(HTTP_IF_NONE_MATCH=first['ETag'].removeprefix('W/'))
+        self.assertEqual((plain.status_code, plain['ETag']), (304, first['ETag'].removeprefix('W/')))
+
+
+class FileServeTests(SimpleTestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'cv.pdf')
+        self.body = bytes(range(256)) * 4
+        with open(self.path, 'wb') as f:
+            f.write(self.body)
+        self.etag = files.file_etag(self.path)
+        self.last_modified = http_date(int(os.stat(self.path).st_mtime))
+
+    def serve(self, method='get', **headers):
+        request = getattr(RequestFactory(), method)('/api/cv/file/', **headers)
+        response = files.serve(request, self.path, self.etag, 'application/pdf', 'cv.pdf')
+        self.addCleanup(response.close)
+        return response
+
+    def content(self, response):
+        return b''.join(response.streaming_content) if response.streaming else response.content
+
+    def test_parse_range(self):
+        cases = {
+            None: None, '': None, 'bytes=0-99': (0, 99), 'bytes=100-': (100, 1023), 'bytes=-100': (924, 1023),
+            'bytes=-5000': (0, 1023), 'bytes=1000-5000': (1000, 1023), 'bytes=1024-': False, 'bytes=5-4': False,
+            'bytes=-0': False, 'bytes=-': None, 'bytes=0-1,5-6': None, 'items=0-1': None,
+        }
+        for header, expected in cases.items():
+            with self.subTest(header=header):
+                self.assertEqual(files.parse_range(header, 1024), expected)
+
+    def test_full_file(self):
+        response = self.serve()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.content(response), self.body)
+        self.assertEqual(response['Content-Length'], '1024')
+        self.assertEqual((response['ETag'], response['Accept-Ranges']), (self.etag, 'bytes'))
+        self.assertIn('cv.pdf', response['Content-Disposition'])
+
+    def test_partial(self):
+        for header, (start, end) in (('bytes=10-19', (10, 19)), ('bytes=-16', (1008, 1023)),
+                                     ('bytes=1000-', (1000, 1023))):
+            with self.subTest(header=header):
+                response = self.serve(HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(response['Content-Range'], f'bytes {start}-{end}/1024')
+                self.assertEqual(response['Content-Length'], str(end - start + 1))
+                self.assertEqual(self.content(response), self.body[start:end + 1])
+
+    def test_unsatisfiable_range(self):
+        response = self.serve(HTTP_RANGE='bytes=2000-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */1024')
+
+    def test_not_modified(self):
+        for headers in ({'HTTP_IF_NONE_MATCH': self.etag}, {'HTTP_IF_MODIFIED_SINCE': self.last_modified}):
+            with self.subTest(headers=headers):
+                response = self.serve(**headers)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual((response['ETag'], response['Last-Modified']), (self.etag, self.last_modified))
+
+    def test_if_range(self):
+        for if_range, status_code in ((self.etag, 206), (self.last_modified, 206), ('"stale"', 200),
+                                      (http_date(0), 200)):
+            with self.subTest(if_range=if_range):
+                response = self.serve(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=if_range)
+                self.assertEqual(response.status_code, status_code)
+                self.assertEqual(len(self.content(response)), 10 if status_code == 206 else 1024)
+
+    def test_if_match(self):
+        self.assertEqual(self.serve(HTTP_IF_MATCH='"other"').status_code, 412)
+        self.assertEqual(self.serve(HTTP_IF_MATCH=self.etag).status_code, 200)
+
+    def test_head(self):
+        with mock.patch('api.views._active_cv', return_value=None):
+            self.assertEqual(self.client.head('/api/cv/file/').status_code, 404)
+        with mock.patch('api.views._active_cv', return_value={
+                'path': self.path, 'etag': self.etag, 'content_type': 'application/pdf', 'filename': 'cv.pdf'}):
+            response = self.client.head('/api/cv/file/', HTTP_RANGE='bytes=0-9')
+            self.assertEqual(response.status_code, 206)
+            self.assertEqual(response['Content-Length'], '10')
+            self.assertEqual(self.content(response), b'')
+            self.assertEqual(self.client.post('/api/cv/file/').status_code, 405)
+
+
+class AssetsTests(SimpleTestCase):
+
+    CSS = """
+    /* комментарий { } */
+    .hero { color: red ; margin : 0 auto }
+    .hero::before { content: "{ /* не комментарий */ }"; }
+    .reveal { opacity: 0 }
+    .reveal.in { opacity: 1 }
+    .nav a:hover, .nav a:not(.active) { color : blue }
+    .footer { color: gray }
+    #contact, .hero-title { font-weight: 700 }
+    @media (max-width: 600px) {
+        .hero { padding: 0 }
+        .footer { display: none }
+    }
+    @media print { .footer { color: black } }
+    @keyframes fade { from { opacity: 0 } to { opacity: 1 } }
+    @keyframes unused { from { opacity: 0 } to { opacity: 1 } }
+    .hero-title { animation: fade 1s }
+    """
+    HTML = '<section id="hero" class="hero"><h1 class="hero-title reveal">Hi</h1><nav class="nav"></nav></section>'
+
+    def test_minify_js_keeps_tokens_intact(self):
+        cases = [
+            # регулярки после ( и return, // внутри них — не комментарий
+            "s = x.replace(/\\/\\/ not a comment/g, '')",
+            'function f(s) {\nreturn /a\\/b[/]c/.test(s)\n}',
+            'y = typeof /x/; z = a ? /x/ : [/y/]',
+            # вложенные ${…} и } в строке внутри шаблона
+            "t = `a ${ b ? `c ${d}` : '}' } e // не комментарий`",
+            't = `${ {a: 1}.a }`',
+            # строки с // и /*
+            'u = "http://x/*y*/" + \'//z\'',
+            # деление, а не регулярка
+            'q = x.y / 2 / (a) / arr[0]',
+        ]
+        for js in cases:
+            with self.subTest(js=js):
+                self.assertEqual(assets.minify_js(js), js + '\n')
+
+    def test_minify_js_keeps_newlines_for_asi(self):
+        js = 'let a = 1   \n    let b = a\n(b)\n\n\n[1, 2].forEach(f)\nx = a\n++b'
+        self.assertEqual(assets.minify_js(js), 'let a = 1\nlet b = a\n(b)\n[1, 2].forEach(f)\nx = a\n++b\n')
+
+    def test_minify_js_drops_comments(self):
+        js = 'a = b / c // хвост\n/* блок */e = 1 /* ещё */ + 2'
+        self.assertEqual(assets.minify_js(js), 'a = b / c\ne = 1 + 2\n')
+
+    def test_build_css(self):
+        critical, full = assets.build_css(self.CSS, self.HTML)
+        self.assertEqual(critical, (
+            '.hero{color:red;margin:0 auto}.hero::before{content:"{ /* не комментарий */ }"}'
+            '.reveal{opacity:0}.nav a:hover,.nav a:not(.active){color:blue}'
+            '#contact,.hero-title{font-weight:700}@media (max-width: 600px){.hero{padding:0}}'
+            '.hero-title{animation:fade 1s}@keyframes fade{from{opacity:0}to{opacity:1}}'
+        ))
+        self.assertNotIn('/* комментарий', full)
+        for rule in ('.footer{color:gray}', '@media print{.footer{color:black}}', '@keyframes unused'):
+            self.assertIn(rule, full)
+            self.assertNotIn(rule, critical)
+
+    def test_state_classes_from_scripts(self):
+        js = ("el.classList.add('in', \"shown\"); a.classList.toggle('active', a.getAttribute('href') === h);"
+              "b.classList.replace('old', 'new'); b.classList.remove('gone'); b.classList.add(name)")
+        self.assertEqual(assets.script_classes(js), {'in', 'shown', 'active', 'new'})
+        critical, _ = assets.build_css(self.CSS, self.HTML, {'in'})
+        self.assertIn('.reveal.in{opacity:1}', critical)
+
+    def test_build_keeps_state_rules_critical(self):
+        html = (f'<html><head><style>{self.CSS}</style></head><body>{self.HTML}'
+                '<script>\nel.classList.add("in") // показать\n</script></body></html>')
+        template, files = assets.build(html)
+        self.assertIn('.reveal.in{opacity:1}', template.split('</style>')[0])
+        self.assertEqual(files['build/index.js'], 'el.classList.add("in")\n')
+        self.assertIn("{% static 'build/index.css' %}", template)
+
+
+class MediaStorageTests(SimpleTestCase):
+
+    SVG = b'<svg xmlns="http://www.w3.org/2000/svg">' + b'<rect width="10" height="10"/>' * 40 + b'</svg>'
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = directory.name
+        patcher = override_settings(MEDIA_ROOT=self.root, MEDIA_URL='/media/')
+        patcher.enable()
+        self.addCleanup(patcher.disable)
+        self.storage = HashedMediaStorage(location=self.root, base_url='/media/')
+
+    def middleware(self):
+        return MediaFilesMiddleware(lambda request: HttpResponse('not media', status=404))
+
+    def get(self, middleware, url, **headers):
+        response = middleware(RequestFactory().get(url, **headers))
+        self.addCleanup(response.close)
+        return response
+
+    def test_hash_in_name_and_reupload(self):
+        name = self.storage.save('logos/logo.svg', ContentFile(self.SVG))
+        self.assertRegex(name, r'^logos/logo\.[0-9a-f]{12}\.svg$')
+        self.assertEqual(storage.display_name(name), 'logo.svg')
+        with mock.patch.object(FileSystemStorage, 'save') as save:
+            self.assertEqual(self.storage.save('logos/logo.svg', ContentFile(self.SVG)), name)
+        save.assert_not_called()
+        self.assertNotEqual(self.storage.save('logos/logo.svg', ContentFile(self.SVG + b' ')), name)
+
+    def test_compressed_siblings(self):
+        with mock.patch.object(compression, 'variants', wraps=compression.variants) as variants:
+            name = self.storage.save('logos/logo.svg', ContentFile(self.SVG))
+        variants.assert_called_once_with(self.SVG, quality=compression.STATIC_QUALITY)
+        path = self.storage.path(name)
+        with open(path + '.gz', 'rb') as f:
+            self.assertEqual(gzip.decompress(f.read()), self.SVG)
+        with open(path + '.br', 'rb') as f:
+            self.assertEqual(compression.brotli.decompress(f.read()), self.SVG)
+        self.storage.delete(name)
+        for suffix in ('', '.gz', '.br'):
+            self.assertFalse(os.path.exists(path + suffix))
+
+    def test_images_are_not_compressed(self):
+        name = self.storage.save('logos/logo.png', ContentFile(b'\x89PNG' + b'\x00' * 1000))
+        self.assertEqual(os.listdir(os.path.dirname(self.storage.path(name))), [os.path.basename(name)])
+
+    def test_cache_headers(self):
+        hashed = self.storage.save('logos/logo.svg', ContentFile(self.SVG))
+        os.makedirs(os.path.join(self.root, 'old'))
+        with open(os.path.join(self.root, 'old', 'logo.svg'), 'wb') as f:
+            f.write(self.SVG)
+        middleware = self.middleware()
+        response = self.get(middleware, f'/media/{hashed}', HTTP_ACCEPT_ENCODING='br, gzip')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(response['Content-Encoding'], 'br')
+        response = self.get(middleware, '/media/old/logo.svg')
+        self.assertEqual(response['Cache-Control'], 'max-age=3600, public')
+
+    def test_file_from_another_worker_and_deletion(self):
+        middleware = self.middleware()
+        # загружено после старта этого воркера — находится при первом запросе
+        name = self.storage.save('logos/logo.svg', ContentFile(self.SVG))
+        url = f'/media/{name}'
+        self.assertEqual(self.get(middleware, url).status_code, 200)
+        self.assertIn(url, middleware.files)
+        self.storage.delete(name)
+        self.assertEqual(self.get(middleware, url).content, b'not media')
+        self.assertNotIn(url, middleware.files)
+        self.assertEqual(self.get(middleware, url + '.gz').status_code, 404)
+        self.assertEqual(self.get(middleware, '/media/../settings.py').status_code, 404)
+
+
+@override_settings(IMAGE_DERIVATIVES={'logo': (32, 64, 128)}, IMAGE_FORMATS=('avif', 'webp', 'jpeg'))
+class ImageDerivativeTests(TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = directory.name
+        patcher = override_settings(MEDIA_ROOT=self.root)
+        patcher.enable()
+        self.addCleanup(patcher.disable)
+
+    def source(self, width, height, mode='RGB', color=(200, 30, 30)):
+        path = os.path.join(self.root, f'logo.{width}x{height}.{mode}.png')
+        Image.new(mode, (width, height), color).save(path)
+        return path
+
+    def open(self, name):
+        image = Image.open(os.path.join(self.root, name))
+        self.addCleanup(image.close)
+        return image
+
+    def generate(self, path):
+        with self.captureOnCommitCallbacks(execute=True):
+            return images.generate(path, 'logo')
+
+    def test_formats_and_widths(self):
+        found = self.generate(self.source(200, 100))
+        self.assertEqual(list(found), ['avif', 'webp', 'jpeg'])
+        for fmt, entries in found.items():
+            self.assertEqual([width for width, _ in entries], [32, 64, 128])
+            for width, name in entries:
+                self.assertEqual(self.open(name).size, (width, width // 2))
+                self.assertEqual(self.open(name).format, fmt.upper())
+
+    def test_no_upscaling(self):
+        found = self.generate(self.source(50, 50))
+        self.assertEqual([width for width, _ in found['webp']], [32, 50])
+        found = self.generate(self.source(20, 20))
+        self.assertEqual([width for width, _ in found['webp']], [20])
+
+    def test_alpha_is_flattened_for_jpeg_only(self):
+        found = self.generate(self.source(64, 64, 'RGBA', (0, 0, 0, 0)))
+        jpeg = self.open(found['jpeg'][0][1])
+        self.assertEqual((jpeg.mode, jpeg.getpixel((10, 10))[:3]), ('RGB', (255, 255, 255)))
+        self.assertEqual(self.open(found['webp'][0][1]).mode, 'RGBA')
+
+    def test_failed_format_is_skipped(self):
+        real_save = images._save
+
+        def save(image, fmt, *args):
+            if fmt == 'avif':
+                raise OSError('encoder error')
+            return real_save(image, fmt, *args)
+        with mock.patch.object(images, '_save', side_effect=save):
+            found = self.generate(self.source(64, 64))
+        self.assertEqual(list(found), ['webp', 'jpeg'])
+
+        path = self.source(65, 65)
+        with mock.patch.object(images, '_save', side_effect=OSError('encoder error')):
+            with self.assertRaises(OSError):
+                self.generate(path)
+        self.assertFalse(os.path.exists(images._manifest_path(images.source_key(path))))
+
+    def test_manifest_is_written_last_and_bumps_version(self):
+        path = self.source(128, 128)
+        before = caching.version(images.VERSION)
+        with mock.patch.object(images.os, 'replace', wraps=os.replace) as replace:
+            found = self.generate(path)
+        targets = [call.args[1] for call in replace.call_args_list]
+        self.assertEqual(targets[-1], images._manifest_path(images.source_key(path)))
+        self.assertEqual(len(targets), 1 + sum(len(entries) for entries in found.values()))
+        with open(targets[-1]) as f:
+            self.assertEqual(json.load(f), found)
+        self.assertNotEqual(caching.version(images.VERSION), before)
+        srcset = images.srcset(path, 'logo')
+        self.assertRegex(srcset['webp'], r'^/media/derivatives/\w+/logo-32w\.\w+\.webp 32w, .* 128w$')
+
+
+class SearchIndexTests(SimpleTestCase):
+
+    def doc(self, pk, title, stack=()):
+        return pk, {'id': pk}, {'title': title, 'stack': list(stack), 'short_description': '', 'description': ''}
+
+    def test_terms_stay_sorted_on_add_and_remove(self):
+        index = search.SearchIndex()
+        index.add(*self.doc(1, 'Telegram бот', ['aiogram']))
+        index.add(*self.doc(2, 'Django API', ['python']))
+        index.add(*self.doc(1, 'Telegram бот на Python'))
+        self.assertEqual(index.terms, sorted(index.postings))
+        self.assertNotIn('aiogram', index.terms)
+        self.assertEqual([pk for pk, _, _ in index.search('pyth')], [1, 2])
+        index.remove(2)
+        self.assertEqual(index.terms, sorted(index.postings))
+        self.assertEqual(index.search('django'), [])
@@ -4,10 +4,15 @@ from . import views
 urlpatterns = [
     path('skills/', views.skills_list),
     path('projects/', views.projects_list),
+    path('projects/search/', views.projects_search),
     path('projects/<int:pk>/', views.project_detail),
+    path('projects/<slug:slug>/', views.project_by_slug),
     path('experience/', views.experience_list),
     path('cv/', views.cv_download),
+    path('cv/file/', views.cv_file),
     path('contact/', views.contact_send),
     path('stats/', views.page_views_stats),
+    path('stats/series/', views.page_views_series),
     path('auth/telegram/', views.telegram_auth),
+    path('bootstrap/', views.bootstrap),
 ]
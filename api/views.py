@@ -1,37 +1,120 @@
 import hashlib
-import hmac
+import mimetypes
+import os
 import time
-import requests
 from datetime import date, timedelta
 from django.conf import settings
 from django.core.cache import cache
-from django.core.mail import send_mail
-from django.http import FileResponse, Http404
+from django.db import IntegrityError, transaction
+from django.db.models import Sum
+from django.http import Http404
+from django.urls import reverse
+from django.views.decorators.http import require_safe
 from rest_framework import status
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
-from .models import Skill, Project, ContactMessage, PageView, TelegramUser, WorkExperience, ResumeFile
-from .serializers import SkillSerializer, ProjectSerializer, ContactMessageSerializer, WorkExperienceSerializer
+from . import caching, dedup, fastjson, files, images, notifications, pageviews, pagination, ratelimit, search, storage, telegram
+from .models import (
+    Skill, Project, ProjectTechnology, ContactMessage, PageView, PageViewRollup,
+    WorkExperience, ResumeFile,
+)
+from .serializers import ContactMessageSerializer
 
 
 # ── Skills ──
+@caching.conditional(Skill)
 @api_view(['GET'])
 def skills_list(request):
-    return Response(SkillSerializer(Skill.objects.filter(is_active=True), many=True).data)
+    return caching.cached_json(request, 'skills', [Skill], lambda: fastjson.skill_rows(
+        Skill.objects.filter(is_active=True)))
 
 
 # ── Projects ──
+@caching.conditional(Project)
 @api_view(['GET'])
 def projects_list(request):
-    return Response(ProjectSerializer(Project.objects.filter(is_active=True), many=True).data)
+    """
+    Без параметров — все активные проекты массивом, как раньше.
+    Фильтры: ?status=, ?is_featured=true|false, ?stack=python (можно несколько).
+    ?limit= или ?cursor= включают keyset-пагинацию: {"results": [...], "next": url|null}.
+    """
+    params = request.query_params
+    queryset = Project.objects.filter(is_active=True)
+
+    project_status = params.get('status')
+    if project_status:
+        if project_status not in dict(Project.STATUS_CHOICES):
+            return Response({'error': 'Неизвестный статус'}, status=status.HTTP_400_BAD_REQUEST)
+        queryset = queryset.filter(status=project_status)
+    featured = params.get('is_featured')
+    if featured:
+        if featured.lower() not in ('true', 'false', '1', '0'):
+            return Response({'error': 'is_featured: true или false'}, status=status.HTTP_400_BAD_REQUEST)
+        queryset = queryset.filter(is_featured=featured.lower() in ('true', '1'))
+    for tech in ProjectTechnology.normalize(params.getlist('stack')):
+        queryset = queryset.filter(technologies__name=tech)
+
+    paginate = 'limit' in params or 'cursor' in params
+    if paginate:
+        try:
+            limit = min(int(params.get('limit', settings.PROJECTS_PAGE_SIZE)), settings.PROJECTS_MAX_PAGE_SIZE)
+        except ValueError:
+            limit = 0
+        if limit < 1:
+            return Response({'error': 'limit: целое число больше 0'}, status=status.HTTP_400_BAD_REQUEST)
+
+    def build():
+        if not paginate:
+            return fastjson.project_rows(queryset)
+        rows, next_cursor = pagination.keyset_page(queryset, params.get('cursor'), limit, fastjson.project_rows)
+        next_url = None
+        if next_cursor:
+            query = params.copy()
+            query['cursor'] = next_cursor
+            next_url = f'{request.path}?{query.urlencode()}'
+        return {'results': rows, 'next': next_url}
+
+    name = 'projects'
+    if params:
+        query = '&'.join(f'{k}={v}' for k, v in sorted(params.lists()))
+        name += ':' + hashlib.md5(query.encode()).hexdigest()
+    try:
+        return caching.cached_json(request, name, [Project], build)
+    except pagination.InvalidCursor:
+        return Response({'error': 'Неверный cursor'}, status=status.HTTP_400_BAD_REQUEST)
 
 @api_view(['GET'])
-def project_detail(request, pk):
+def projects_search(request):
+    """?q=строка поиска (префиксы считаются), ?limit= до 50."""
+    query = request.query_params.get('q', '').strip()
     try:
-        project = Project.objects.get(pk=pk, is_active=True)
-    except Project.DoesNotExist:
+        limit = max(1, min(int(request.query_params.get('limit', 10)), 50))
+    except ValueError:
+        return Response({'error': 'limit: целое число'}, status=status.HTTP_400_BAD_REQUEST)
+    results = [dict(doc, score=score) for _, score, doc in search.search(query, limit)] if query else []
+    return Response({'query': query, 'results': results})
+
+@caching.conditional(Project)
+@api_view(['GET'])
+def project_detail(request, pk):
+    return _project_response(request, pk)
+
+@caching.conditional(Project)
+@api_view(['GET'])
+def project_by_slug(request, slug):
+    # slug → id из памяти: и неизвестный slug, и попадание в кеш обходятся без БД
+    slugs = caching.memoized('project_slugs', [Project], lambda: dict(
+        Project.objects.filter(is_active=True).values_list('slug', 'id')))
+    if slug not in slugs:
         return Response({'error': 'Не найден'}, status=status.HTTP_404_NOT_FOUND)
-    return Response(ProjectSerializer(project).data)
+    return _project_response(request, slugs[slug])
+
+
+def _project_response(request, pk):
+    def build():
+        rows = fastjson.project_rows(Project.objects.filter(pk=pk, is_active=True))
+        return rows[0] if rows else None
+    return caching.cached_json(request, f'project:{pk}', [Project], build)
 
 
 # ── Telegram Auth ──
@@ -41,6 +124,9 @@ def telegram_auth(request):
     Принимает данные от Telegram Login Widget,
     проверяет подпись и сохраняет/обновляет пользователя.
     """
+    if not ratelimit.get('telegram_auth').allow(_get_ip(request)):
+        return Response({'error': 'Слишком много попыток'}, status=status.HTTP_429_TOO_MANY_REQUESTS)
+
     data = request.data.copy()
     received_hash = data.pop('hash', None)
 
@@ -57,26 +143,16 @@ def telegram_auth(request):
     if not bot_token:
         return Response({'error': 'Бот не настроен'}, status=status.HTTP_400_BAD_REQUEST)
 
-    secret_key = hashlib.sha256(bot_token.encode()).digest()
-    check_string = '\n'.join(f'{k}={v}' for k, v in sorted(data.items()))
-    expected_hash = hmac.new(secret_key, check_string.encode(), hashlib.sha256).hexdigest()
-
-    if not hmac.compare_digest(expected_hash, received_hash):
+    if not telegram.check_widget(data, received_hash):
         return Response({'error': 'Неверная подпись'}, status=status.HTTP_403_FORBIDDEN)
 
-    # Сохраняем пользователя
-    tg_user, created = TelegramUser.objects.update_or_create(
-        telegram_id=int(data['id']),
-        defaults={
-            'first_name': data.get('first_name', ''),
-            'last_name': data.get('last_name', ''),
-            'username': data.get('username', ''),
-            'photo_url': data.get('photo_url', ''),
-        }
-    )
+    # Сохраняем пользователя (без записи, если профиль не менялся)
+    tg_user = telegram.login(data)
 
     return Response({
         'success': True,
+        # передавать в Authorization: Bearer <token> (или поле telegram_token)
+        'token': telegram.issue_token(tg_user),
         'user': {
             'id': tg_user.telegram_id,
             'name': tg_user.full_name,
@@ -89,19 +165,22 @@ def telegram_auth(request):
 # ── Contact Form ──
 @api_view(['POST'])
 def contact_send(request):
+    # клиент прислал токен — он должен быть годным, иначе не молча «аноним»
+    try:
+        session = telegram.session_from_request(request)
+    except telegram.InvalidSession:
+        return Response({'error': 'Войди через Telegram заново'}, status=status.HTTP_401_UNAUTHORIZED)
+
     data = request.data.copy()
-    telegram_user_id = data.pop('telegram_user_id', None)
+    data.pop('telegram_user_id', None)  # не доверяем: пользователь берётся из токена
+    data.pop('telegram_token', None)
     data.pop('website', None)  # honeypot, уже проверен в сериализаторе
 
-    # Rate limiting
+    # Rate limiting: общий для всех воркеров. Списываем сразу (иначе параллельные
+    # запросы пройдут проверку вместе), неуспешные отправки возвращаем
     ip = _get_ip(request)
-    cache_key = f"contact_{ip}"
-    attempts = cache.get(cache_key, [])
-    now = time.time()
-    window = getattr(settings, 'CONTACT_RATE_WINDOW', 600)
-    limit = getattr(settings, 'CONTACT_RATE_LIMIT', 3)
-    attempts = [t for t in attempts if now - t < window]
-    if len(attempts) >= limit:
+    limiter = ratelimit.get('contact')
+    if not limiter.allow(ip):
         return Response(
             {'error': 'Слишком много сообщений. Подожди несколько минут.'},
             status=status.HTTP_429_TOO_MANY_REQUESTS
@@ -113,38 +192,38 @@ def contact_send(request):
 
     serializer = ContactMessageSerializer(data=data)
     if not serializer.is_valid():
+        limiter.refund(ip)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-    tg_user = None
-    if telegram_user_id:
-        try:
-            tg_user = TelegramUser.objects.get(telegram_id=int(telegram_user_id))
-        except TelegramUser.DoesNotExist:
-            pass
-
-    msg = ContactMessage.objects.create(
-        ip_address=ip,
-        telegram_user=tg_user,
-        source='telegram' if tg_user else 'site',
-        **{k: v for k, v in serializer.validated_data.items() if k != 'website'}
-    )
-
-    attempts.append(now)
-    cache.set(cache_key, attempts, window)
+    # Повтор недавнего сообщения (флуд с разных IP) — тихо отбрасываем:
+    # ни записи в БД, ни уведомлений, бот видит обычный ответ
+    fields = serializer.validated_data
+    fp = dedup.fingerprint(f"{fields['subject']}\n{fields['message']}", sender=fields['email'] or fields['name'])
+    if dedup.recent.seen(fp):
+        limiter.refund(ip)
+        return Response(
+            {'success': True, 'message': 'Сообщение отправлено! Отвечу как можно скорее 🚀'},
+            status=status.HTTP_201_CREATED
+        )
 
-    _notify_telegram(msg)
+    tg_user = telegram.user_from_session(session) if session else None
 
+    # уведомления уходят через outbox (deliver_notifications), ответ не ждёт Telegram/SMTP
     try:
-        if data.get('email') and settings.EMAIL_HOST_USER:
-            send_mail(
-                subject=f'[Portfolio] {msg.subject}',
-                message=f'От: {msg.name} <{msg.email}>\n\n{msg.message}',
-                from_email=settings.EMAIL_HOST_USER,
-                recipient_list=[settings.CONTACT_EMAIL],
-                fail_silently=True,
+        with transaction.atomic():
+            msg = ContactMessage.objects.create(
+                ip_address=ip,
+                telegram_user=tg_user,
+                source='telegram' if tg_user else 'site',
+                **{k: v for k, v in serializer.validated_data.items() if k != 'website'}
             )
-    except Exception:
-        pass
+            notifications.enqueue(msg)
+    except IntegrityError:
+        # пользователя из токена удалили после входа
+        limiter.refund(ip)
+        return Response({'error': 'Войди через Telegram заново'}, status=status.HTTP_401_UNAUTHORIZED)
+
+    dedup.recent.add(fp)
 
     return Response(
         {'success': True, 'message': 'Сообщение отправлено! Отвечу как можно скорее 🚀'},
@@ -153,76 +232,131 @@ def contact_send(request):
 
 
 # ── Experience ──
+@caching.conditional(WorkExperience, images.VERSION)
 @api_view(['GET'])
 def experience_list(request):
-    items = WorkExperience.objects.filter(is_active=True)
-    return Response(WorkExperienceSerializer(items, many=True, context={'request': request}).data)
+    return caching.cached_json(request, 'experience', [WorkExperience, images.VERSION], lambda: fastjson.experience_rows(
+        WorkExperience.objects.filter(is_active=True), request), per_host=True)
 
 
 # ── CV Download ──
+@caching.conditional(ResumeFile)
 @api_view(['GET'])
 def cv_download(request):
     """Возвращает URL активного CV или 404."""
-    cv = ResumeFile.objects.filter(is_active=True).order_by('-updated_at').first()
-    if not cv or not cv.file:
+    url = _active_cv_url(request)
+    if not url:
         return Response({'url': None}, status=status.HTTP_404_NOT_FOUND)
-    from django.conf import settings
-    url = request.build_absolute_uri(cv.file.url)
     return Response({'url': url})
 
 
+@require_safe
+def cv_file(request):
+    """Сам файл активного CV: Range, ETag, sendfile."""
+    cv = _active_cv()
+    if cv is None:
+        raise Http404('CV не загружено')
+    return files.serve(request, cv['path'], cv['etag'], cv['content_type'], cv['filename'])
+
+
 # ── Stats ──
 @api_view(['GET'])
 def page_views_stats(request):
+    return Response(_stats_data())
+
+
+@api_view(['GET'])
+def page_views_series(request):
+    """
+    Ряд просмотров: ?from=YYYY-MM-DD&to=YYYY-MM-DD&granularity=day|week|month.
+    По умолчанию — последние 30 дней по дням.
+    """
+    granularity = request.query_params.get('granularity', 'day')
+    if granularity not in ('day', 'week', 'month'):
+        return Response({'error': 'granularity: day, week или month'}, status=status.HTTP_400_BAD_REQUEST)
     today = date.today()
-    last_7 = []
-    for i in range(6, -1, -1):
-        d = today - timedelta(days=i)
-        try:
-            count = PageView.objects.get(date=d).count
-        except PageView.DoesNotExist:
-            count = 0
-        last_7.append({'date': str(d), 'views': count})
     try:
-        today_views = PageView.objects.get(date=today).count
-    except PageView.DoesNotExist:
-        today_views = 0
-    return Response({
-        'total_views': PageView.get_total(),
-        'unique_visitors': PageView.get_unique_total(),
-        'today_views': today_views,
+        end = date.fromisoformat(request.query_params['to']) if 'to' in request.query_params else today
+        start = date.fromisoformat(request.query_params['from']) \
+            if 'from' in request.query_params else end - timedelta(days=29)
+    except (ValueError, OverflowError):
+        return Response({'error': 'Даты в формате YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+    if start > end:
+        return Response({'error': 'from позже to'}, status=status.HTTP_400_BAD_REQUEST)
+    if pageviews.bucket_count(start, end, granularity) > getattr(settings, 'STATS_SERIES_MAX_BUCKETS', 1000):
+        return Response({'error': 'Слишком большой диапазон'}, status=status.HTTP_400_BAD_REQUEST)
+
+    cache_key = f'stats_series:{granularity}:{start}:{end}'
+    data = cache.get(cache_key)
+    if data is None:
+        buckets, total = pageviews.series(start, end, granularity)
+        data = {
+            'from': buckets[0]['start'],
+            'to': str(end),
+            'granularity': granularity,
+            'total_views': sum(b['views'] for b in buckets),
+            'unique_visitors': total.count(),
+            'buckets': buckets,
+        }
+        cache.set(cache_key, data, getattr(settings, 'STATS_SERIES_CACHE_TTL', 60))
+    return Response(data)
+
+
+# ── Bootstrap ──
+@api_view(['GET'])
+def bootstrap(request):
+    """Всё, что нужно главной странице, одним ответом."""
+    return caching.cached_json(
+        request, 'bootstrap', [Skill, Project, WorkExperience, ResumeFile, images.VERSION], lambda: {
+            'skills': fastjson.skill_rows(Skill.objects.filter(is_active=True)),
+            'projects': fastjson.project_rows(Project.objects.filter(is_active=True)),
+            'experience': fastjson.experience_rows(WorkExperience.objects.filter(is_active=True), request),
+            'cv': {'url': _active_cv_url(request)},
+            'stats': _stats_data(),
+        }, per_host=True, max_age=getattr(settings, 'BOOTSTRAP_STATS_TTL', 30))
+
+
+def _active_cv():
+    """Путь, ETag и тип активного CV; пересчитывается только при правке ResumeFile."""
+    def build():
+        cv = ResumeFile.objects.filter(is_active=True).order_by('-updated_at').first()
+        if not cv or not cv.file or not os.path.exists(cv.file.path):
+            return None
+        return {
+            'path': cv.file.path,
+            'etag': files.file_etag(cv.file.path),
+            'content_type': mimetypes.guess_type(cv.file.name)[0] or 'application/octet-stream',
+            'filename': storage.display_name(cv.file.name),
+        }
+    return caching.memoized('active_cv', [ResumeFile], build)
+
+
+def _active_cv_url(request):
+    if _active_cv() is None:
+        return None
+    return request.build_absolute_uri(reverse(cv_file))
+
+
+def _stats_data():
+    today = date.today()
+    start = today - timedelta(days=6)
+    daily = dict(
+        PageView.objects.filter(date__range=(start, today))
+        .order_by().values_list('date').annotate(views=Sum('count'))
+    )
+    last_7 = []
+    for i in range(7):
+        d = start + timedelta(days=i)
+        last_7.append({'date': str(d), 'views': daily.get(d, 0)})
+    all_time = PageViewRollup.objects.filter(period='all').first()
+    return {
+        'total_views': all_time.count if all_time else 0,
+        'unique_visitors': all_time.unique_count if all_time else 0,
+        'today_views': daily.get(today, 0),
         'last_7_days': last_7,
-    })
+    }
 
 
 def _get_ip(request):
     x = request.META.get('HTTP_X_FORWARDED_FOR')
     return x.split(',')[0].strip() if x else request.META.get('REMOTE_ADDR')
-
-
-def _notify_telegram(msg):
-    token = settings.TELEGRAM_BOT_TOKEN
-    chat_id = settings.TELEGRAM_CHAT_ID
-    if not token or not chat_id:
-        return
-    tg_info = ''
-    if msg.telegram_user:
-        u = msg.telegram_user
-        tg_info = f'\n🔗 *Telegram:* [{u.full_name}](tg://user?id={u.telegram_id})'
-        if u.username:
-            tg_info += f' @{u.username}'
-    text = (
-        f"📬 *Новое сообщение с портфолио!*\n\n"
-        f"👤 *Имя:* {msg.name}{tg_info}\n"
-        f"📧 *Email:* {msg.email or '—'}\n"
-        f"📝 *Тема:* {msg.subject}\n\n"
-        f"💬 *Сообщение:*\n{msg.message}"
-    )
-    try:
-        requests.post(
-            f'https://api.telegram.org/bot{token}/sendMessage',
-            json={'chat_id': chat_id, 'text': text, 'parse_mode': 'Markdown'},
-            timeout=5
-        )
-    except Exception:
-        pass
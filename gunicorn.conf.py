@@ -0,0 +1,31 @@
+"""
+Настройки gunicorn: файл подхватывается из текущего каталога сам.
+
+Доставка уведомлений (manage.py deliver_notifications) идёт рядом с веб-
+воркерами в том же контейнере: на Railway у каждого сервиса свой диск, и
+отдельный worker-сервис не видит SQLite-файл, в который contact_send пишет
+outbox. Мастер gunicorn держит процесс доставки запущенным и перезапускает,
+если тот упал. NOTIFY_IN_WEB=False — если доставка запущена отдельно с
+доступом к той же БД.
+"""
+import sys
+
+import decouple  # имя config занято: gunicorn читает его как свою настройку
+
+from api.supervisor import Supervisor
+
+_delivery = None
+
+
+def when_ready(server):
+    global _delivery
+    if decouple.config("NOTIFY_IN_WEB", default=True, cast=bool):
+        _delivery = Supervisor(
+            [sys.executable, "manage.py", "deliver_notifications"], log=server.log.warning,
+        ).start()
+        server.log.info("Доставка уведомлений запущена")
+
+
+def on_exit(server):
+    if _delivery:
+        _delivery.stop()
@@ -1,3 +1,7 @@
+import atexit
+import shutil
+import sys
+import tempfile
 from pathlib import Path
 from decouple import config
 
@@ -42,6 +46,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
+    "api.middleware.MediaFilesMiddleware",
 
     "corsheaders.middleware.CorsMiddleware",
 
@@ -61,8 +66,14 @@ TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
         "DIRS": [BASE_DIR / "templates"],
-        "APP_DIRS": True,
         "OPTIONS": {
+            # шаблоны компилируются один раз на воркер
+            "loaders": [
+                ("django.template.loaders.cached.Loader", [
+                    "django.template.loaders.filesystem.Loader",
+                    "django.template.loaders.app_directories.Loader",
+                ]),
+            ],
             "context_processors": [
                 "django.template.context_processors.debug",
                 "django.template.context_processors.request",
@@ -77,17 +88,66 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        # соединение на воркер живёт между запросами, PRAGMA ставятся один раз
+        "CONN_MAX_AGE": config("DB_CONN_MAX_AGE", default=600, cast=int),
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {
+            # запись сразу берёт блокировку — без SQLITE_BUSY при повышении с чтения
+            "transaction_mode": "IMMEDIATE",
+            "timeout": 5,
+        },
+    }
+}
+
+# Контент (Skill, Project, WorkExperience, ResumeFile) читается с того же файла,
+# открытого только для чтения — без блокировок записи (api/routers.py)
+if config("DB_READ_REPLICA", default=True, cast=bool):
+    DATABASES["replica"] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": DATABASES["default"]["NAME"].as_uri() + "?mode=ro",
+        "CONN_MAX_AGE": DATABASES["default"]["CONN_MAX_AGE"],
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {"uri": True, "timeout": 5},
+        "TEST": {"MIRROR": "default"},
     }
+DATABASE_ROUTERS = ["api.routers.ReadReplicaRouter"]
+
+# Выполняются на каждом новом соединении SQLite (api/db.py)
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,         # мс
+    "mmap_size": 128 * 1024 ** 2,  # байт
+    "cache_size": -20000,         # KiB, ~20 МБ
+    "temp_store": "MEMORY",
 }
 
 
 STATIC_URL = "/static/"
 STATIC_ROOT = BASE_DIR / "staticfiles"
-STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 STATICFILES_DIRS = [BASE_DIR / "static"] if (BASE_DIR / "static").exists() else []
 
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
+# Загрузки без хеша в имени (старые) — сколько кешировать; с хешем — навсегда
+MEDIA_MAX_AGE = 3600  # секунд
+
+# Уменьшенные копии картинок (api/images.py): ширины в px по назначению
+IMAGE_DERIVATIVES = {
+    "logo": (64, 128, 192),         # .exp-logo — 64×64
+    "portrait": (340, 680, 960),    # .photo-container — 340×420
+}
+IMAGE_FORMATS = ("avif", "webp", "jpeg")
+
+# Главная из templates/build/ (manage.py build_assets): критический CSS
+# встроен, остальное — минифицированные файлы в static/build/
+ASSETS_USE_BUILD = config("ASSETS_USE_BUILD", default=not DEBUG, cast=bool)
+
+STORAGES = {
+    # загрузки: имя с хешем содержимого + .gz/.br рядом (api/storage.py)
+    "default": {"BACKEND": "api.storage.HashedMediaStorage"},
+    "staticfiles": {"BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage"},
+}
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
@@ -101,7 +161,7 @@ REST_FRAMEWORK = {
 EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
 EMAIL_HOST = config("EMAIL_HOST", default="smtp.gmail.com")
 EMAIL_PORT = config("EMAIL_PORT", default=587, cast=int)
-EMAIL_USE_TLS = True
+EMAIL_USE_TLS = config("EMAIL_USE_TLS", default=True, cast=bool)
 EMAIL_HOST_USER = config("EMAIL_HOST_USER", default="")
 EMAIL_HOST_PASSWORD = config("EMAIL_HOST_PASSWORD", default="")
 CONTACT_EMAIL = config("CONTACT_EMAIL", default="")
@@ -109,21 +169,91 @@ CONTACT_EMAIL = config("CONTACT_EMAIL", default="")
 
 TELEGRAM_BOT_TOKEN = config("TELEGRAM_BOT_TOKEN", default="")
 TELEGRAM_CHAT_ID = config("TELEGRAM_CHAT_ID", default="")
-
-# Кеш для rate limiting (форма контакта)
+TELEGRAM_API_URL = config("TELEGRAM_API_URL", default="https://api.telegram.org")
+# Срок жизни токена, выданного после входа через Telegram
+TELEGRAM_SESSION_TTL = 7 * 86400  # секунд
+# Время входов копится в памяти и пишется пачкой
+TELEGRAM_LOGIN_FLUSH_SIZE = 50
+TELEGRAM_LOGIN_FLUSH_INTERVAL = 60  # секунд
+
+# Доставка уведомлений (manage.py deliver_notifications)
+NOTIFY_TIMEOUT = 10  # секунд на один запрос к Telegram/SMTP
+NOTIFY_MAX_ATTEMPTS = 8  # после — статус «Не доставлено»
+NOTIFY_RETRY_BASE = 30  # секунд, удваивается с каждой попыткой
+NOTIFY_RETRY_MAX = 3600
+NOTIFY_LEASE = 120  # секунд: захваченное воркером не берут другие
+# Telegram-дайджест: уведомления за окно уходят одним сообщением (0 — по одному)
+NOTIFY_DIGEST_WINDOW = config("NOTIFY_DIGEST_WINDOW", default=30, cast=int)  # секунд
+NOTIFY_DIGEST_MAX_MESSAGES = 20
+NOTIFY_DIGEST_MAX_CHARS = 4000  # лимит Telegram — 4096
+
+# default — локальный кеш воркера (rate limiting, готовые ответы API)
+# shared — общий для всех воркеров: версии контента для сброса кеша
 CACHES = {
     "default": {
         "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
-    }
+    },
+    "shared": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": config("SHARED_CACHE_DIR", default=str(BASE_DIR / ".cache")),
+    },
 }
 
+# Сколько живут готовые ответы API (сбрасываются раньше при правке контента)
+API_CACHE_TTL = 3600  # секунд
+# /api/bootstrap/: как часто обновлять счётчики просмотров в ответе
+BOOTSTRAP_STATS_TTL = 30  # секунд
+# HIT/MISS кеша ответов по всем воркерам (manage.py cache_stats)
+CACHE_STATS_DB = config("CACHE_STATS_DB", default=str(BASE_DIR / ".cache" / "cache_stats.sqlite3"))
+CACHE_STATS_FLUSH_INTERVAL = 30  # секунд
+
 # Контакт: макс 3 отправки с одного IP за 10 минут
 CONTACT_RATE_LIMIT = 3
 CONTACT_RATE_WINDOW = 600  # секунд
 
+# Контакт: отсев повторов (api/dedup.py) — окно последних сообщений в памяти воркера
+CONTACT_DEDUP_WINDOW = 500        # сообщений
+CONTACT_DEDUP_TTL = 3600          # секунд
+CONTACT_DEDUP_THRESHOLD = 0.8     # похожесть по Жаккару, выше — повтор
+
+# Rate limiting по эндпоинтам (api/ratelimit.py): sliding_window или token_bucket
+RATE_LIMITS = {
+    "contact": {"algorithm": "sliding_window", "limit": CONTACT_RATE_LIMIT, "window": CONTACT_RATE_WINDOW},
+    "telegram_auth": {"algorithm": "token_bucket", "limit": 10, "window": 60},
+}
+# sqlite — файл, общий для всех воркеров на машине; memory — только текущий процесс
+RATELIMIT_BACKEND = config("RATELIMIT_BACKEND", default="sqlite")
+RATELIMIT_DB = config("RATELIMIT_DB", default=str(BASE_DIR / ".cache" / "ratelimit.sqlite3"))
+
+# Просмотры копятся в памяти воркера и пишутся в БД пачкой
+PAGEVIEW_BUFFERED = config("PAGEVIEW_BUFFERED", default=True, cast=bool)
+PAGEVIEW_FLUSH_HITS = 50
+PAGEVIEW_FLUSH_INTERVAL = 30  # секунд
+
+# /api/projects/?limit=…: размер страницы по умолчанию и максимум
+PROJECTS_PAGE_SIZE = 20
+PROJECTS_MAX_PAGE_SIZE = 100
+
+# Файл индекса поиска по проектам (/api/projects/search/)
+SEARCH_INDEX_PATH = config("SEARCH_INDEX_PATH", default=str(BASE_DIR / ".cache" / "search_index.json"))
+
+# /api/stats/series/: кеш ответа и предел числа корзин
+STATS_SERIES_CACHE_TTL = 60  # секунд
+STATS_SERIES_MAX_BUCKETS = 1000
+
 LANGUAGE_CODE = "ru-ru"
 TIME_ZONE = "Asia/Bishkek"
 USE_I18N = True
 USE_TZ = True
 
-
+# manage.py test: всё, что пишется на диск, — во временный каталог,
+# иначе счётчики лимитов и кеш переживают прогоны тестов
+if sys.argv[1:2] == ["test"]:
+    TEST_DIR = Path(tempfile.mkdtemp(prefix="portfolio-test-"))
+    atexit.register(shutil.rmtree, TEST_DIR, ignore_errors=True)
+    CACHES["shared"]["LOCATION"] = str(TEST_DIR / "cache")
+    RATELIMIT_DB = str(TEST_DIR / "ratelimit.sqlite3")
+    CACHE_STATS_DB = str(TEST_DIR / "cache_stats.sqlite3")
+    SEARCH_INDEX_PATH = str(TEST_DIR / "search_index.json")
+    MEDIA_ROOT = TEST_DIR / "media"
+    PAGEVIEW_BUFFERED = False
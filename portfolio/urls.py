@@ -1,21 +1,31 @@
+from django.conf import settings
 from django.contrib import admin
+from django.contrib.staticfiles import finders
 from django.http import HttpResponse
-from django.shortcuts import render
+from django.template.loader import render_to_string
 from django.urls import path, include
-from django.conf import settings
-from django.conf.urls.static import static
 from django.views.generic import TemplateView
-from api.models import WorkExperience
+from api import caching, fastjson, images
+from api.models import Project, ResumeFile, Skill, WorkExperience
+
+# Модели, которые видны на главной (сервером или через API), и копии картинок
+PAGE_MODELS = [Skill, Project, WorkExperience, ResumeFile, images.VERSION]
+# Собранный build_assets шаблон, если он есть; иначе исходный
+HOME_TEMPLATES = ['build/index.html', 'index.html'] if settings.ASSETS_USE_BUILD else ['index.html']
 
 
 def home_view(request):
-    """Главная с опыт работы — рендерим на сервере, чтобы не было пусто."""
-    from api.serializers import WorkExperienceSerializer
-    experience = WorkExperience.objects.filter(is_active=True)
-    experience_data = WorkExperienceSerializer(
-        experience, many=True, context={'request': request}
-    ).data
-    return render(request, 'index.html', {'experience': experience_data})
+    """Главная с опыт работы — рендерим на сервере, чтобы не было пусто.
+
+    HTML одинаков для всех посетителей, поэтому отдаётся из кеша до смены
+    контента. Просмотры считает middleware, он срабатывает и на попадании.
+    """
+    def build():
+        experience = fastjson.experience_rows(WorkExperience.objects.filter(is_active=True), request)
+        portrait = images.srcset(finders.find('images/me.jpg'), 'portrait', request)
+        return render_to_string(HOME_TEMPLATES, {'experience': experience, 'portrait': portrait}, request)
+
+    return caching.cached_html(request, 'home', PAGE_MODELS, build, per_host=True)
 
 
 def robots_txt(request):
@@ -38,7 +48,7 @@ urlpatterns = [
     path('sitemap.xml', sitemap_xml),
     path('admin/', admin.site.urls),
     path('api/', include('api.urls')),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+]
 
 admin.site.site_header = "TheKubanych Portfolio"
 admin.site.site_title = "Portfolio Admin"